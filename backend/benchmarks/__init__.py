@@ -0,0 +1 @@
+"""Benchmarks and load-test tooling for the backend (run from the backend directory)."""
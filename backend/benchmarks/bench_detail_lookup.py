@@ -0,0 +1,92 @@
+"""SerpAPI searches and latency per job detail view, against the in-process mock SerpAPI.
+
+Usage (from backend/):  python -m benchmarks.bench_detail_lookup [--views 200] [--latency-ms 400]
+
+Each view clears the worker caches and resolves one job id through the same strategies as
+``fetch_job_detail_from_serpapi``. Hits are the ids on the first recorded page, which the
+mock returns for every search; misses are synthetic ids whose posting is in no result page,
+so every strategy runs. Both are measured with the configured hedge delay
+(``SERPAPI_DETAIL_HEDGE_SECONDS``) and with every strategy started at once, which is what
+detail lookups did before the hedge.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+from typing import Any
+
+import httpx
+
+from benchmarks import mock_upstreams, run
+from services import serpapi_client
+from services.serpapi_budget import TokenBucket, serpapi_budget
+
+MOCK_URL = "http://mock-upstreams"
+
+
+def _miss_ids(count: int) -> list[str]:
+  return [
+    base64.b64encode(
+      json.dumps({"job_title": f"Gone {index}", "company_name": "Nowhere", "htidocid": f"gone-{index}"}).encode()
+    ).decode()
+    for index in range(count)
+  ]
+
+
+async def _views(job_ids: list[str], hedge_delay: float) -> dict[str, Any]:
+  mock_upstreams.CALLS.clear()
+  latencies: list[float] = []
+  found = 0
+  for job_id in job_ids:
+    serpapi_client.JOB_CACHE.clear()
+    serpapi_client.HTID_CACHE.clear()
+    strategies, matches = serpapi_client._detail_lookups(job_id)
+    started = time.perf_counter()
+    if await serpapi_client._first_matching_job(strategies, matches, hedge_delay):
+      found += 1
+    latencies.append(time.perf_counter() - started)
+  latencies.sort()
+  return {
+    "views": len(job_ids),
+    "found": found,
+    "searches_per_view": round(mock_upstreams.CALLS["serpapi"] / len(job_ids), 3),
+    "p50_ms": round(run.percentile(latencies, 0.50) * 1000, 1),
+    "p95_ms": round(run.percentile(latencies, 0.95) * 1000, 1),
+  }
+
+
+async def _measure(args: argparse.Namespace) -> dict[str, Any]:
+  mock_upstreams.BEHAVIOUR["serpapi"] = mock_upstreams.UpstreamBehaviour(latency_ms=args.latency_ms, jitter_ms=args.latency_ms * 0.2)
+  serpapi_budget.global_bucket = TokenBucket(1e6, 1e6)
+  serpapi_client.SERP_API_URL = f"{MOCK_URL}/search.json"
+  serpapi_client._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_upstreams.app))
+
+  # The mock answers every first-page search with page 1, so only its ids can be found.
+  fixture_ids = [job["job_id"] for job in mock_upstreams._PAGES[0]["jobs_results"]]
+  hits = [fixture_ids[index % len(fixture_ids)] for index in range(args.views)]
+  misses = _miss_ids(args.views)
+  modes = {"hedged": serpapi_client.DETAIL_HEDGE_SECONDS, "all_at_once": 1e-6}
+  try:
+    return {
+      "mock_latency_ms": args.latency_ms,
+      "hedge_seconds": serpapi_client.DETAIL_HEDGE_SECONDS,
+      **{mode: {"hits": await _views(hits, delay), "misses": await _views(misses, delay)} for mode, delay in modes.items()},
+    }
+  finally:
+    await serpapi_client.close_http_client()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--views", type=int, default=200)
+  parser.add_argument("--latency-ms", type=float, default=400.0)
+  args = parser.parse_args()
+  print(json.dumps(asyncio.run(_measure(args)), indent=2))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,100 @@
+"""Mapping CPU per page for recorded SerpAPI google_jobs payloads.
+
+Usage (from backend/):  python -m benchmarks.bench_mapping [--iterations 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+from models.jobs import JobApplyOption, JobHighlight, JobListing, JobSearchResponse
+from services import serpapi_client
+from services.serpapi_client import _decode_job_payload, _job_fields, _map_jobs
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _load_pages() -> list[list[dict]]:
+  return [json.loads(path.read_text())["jobs_results"] for path in sorted(FIXTURES.glob("serpapi_google_jobs_page*.json"))]
+
+
+def _legacy_map_job(job: dict) -> JobListing:
+  """Per-result mapping as it was before the bulk path: nested models built one by one."""
+  detected_extensions = job.get("detected_extensions") or {}
+  payload = _decode_job_payload(job.get("job_id"))
+  return JobListing(
+    job_id=job.get("job_id"),
+    htidocid=(payload or {}).get("htidocid") or job.get("htidocid"),
+    title=job.get("title") or job.get("job_title"),
+    company=job.get("company_name"),
+    location=job.get("location"),
+    via=job.get("via"),
+    description=job.get("description") or job.get("description_full"),
+    posted_at=detected_extensions.get("posted_at"),
+    salary=detected_extensions.get("salary"),
+    extensions=job.get("extensions") or [],
+    detected_extensions=detected_extensions,
+    apply_options=[
+      JobApplyOption(title=option.get("title"), link=option.get("link"))
+      for option in job.get("apply_options") or []
+      if option.get("link")
+    ],
+    job_highlights=[
+      JobHighlight(title=highlight.get("title"), items=highlight.get("items") or [])
+      for highlight in job.get("job_highlights") or []
+    ],
+    share_link=job.get("share_link"),
+  )
+
+
+def legacy_page(jobs_raw: list[dict]) -> bytes:
+  jobs = [_legacy_map_job(job) for job in jobs_raw]
+  response = JobSearchResponse(query="software engineer", location="United States", page=1, jobs=jobs)
+  # FastAPI's response_model path: dump, re-validate, then encode.
+  revalidated = JobSearchResponse.model_validate(response.model_dump())
+  return revalidated.model_dump_json().encode()
+
+
+def bulk_page(jobs_raw: list[dict]) -> bytes:
+  jobs = _map_jobs(jobs_raw)
+  response = JobSearchResponse(query="software engineer", location="United States", page=1, jobs=jobs)
+  return response.model_dump_json().encode()
+
+
+def fields_only(jobs_raw: list[dict]) -> list[dict]:
+  return [_job_fields(job) for job in jobs_raw]
+
+
+def _measure(fn: Callable[[list[dict]], object], pages: list[list[dict]], iterations: int) -> float:
+  start = time.process_time()
+  for _ in range(iterations):
+    for page in pages:
+      fn(page)
+  return (time.process_time() - start) / (iterations * len(pages))
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--iterations", type=int, default=2000)
+  args = parser.parse_args()
+
+  pages = _load_pages()
+  results = {
+    "pages": len(pages),
+    "results_per_page": sum(len(page) for page in pages) / len(pages),
+    "legacy_us_per_page": _measure(legacy_page, pages, args.iterations) * 1e6,
+    "bulk_us_per_page": _measure(bulk_page, pages, args.iterations) * 1e6,
+    "field_projection_us_per_page": _measure(fields_only, pages, args.iterations) * 1e6,
+  }
+  results["speedup"] = results["legacy_us_per_page"] / results["bulk_us_per_page"]
+  serpapi_client.JOB_CACHE.clear()
+  serpapi_client.HTID_CACHE.clear()
+  print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+  main()
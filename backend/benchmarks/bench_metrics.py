@@ -0,0 +1,116 @@
+"""Overhead of the metrics layer: recording primitives, decorators and the ASGI middleware.
+
+Usage (from backend/):  python -m benchmarks.bench_metrics [--iterations 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from middleware.metrics import MetricsMiddleware
+from services.metrics import Counter, Histogram, REGISTRY, instrument_upstream
+
+
+async def _noop() -> int:
+  return 1
+
+
+@instrument_upstream("bench", "noop")
+async def _instrumented_noop() -> int:
+  return 1
+
+
+async def _endpoint(request) -> Response:
+  return Response(b"{}", media_type="application/json")
+
+
+def _app(with_metrics: bool):
+  app = Starlette(routes=[Route("/items/{item_id}", _endpoint)])
+  return MetricsMiddleware(app) if with_metrics else app
+
+
+async def _drive(app, iterations: int) -> float:
+  scope = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/items/42",
+    "raw_path": b"/items/42",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [],
+    "client": ("127.0.0.1", 1234),
+    "server": ("testserver", 80),
+  }
+
+  async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+  async def send(message):
+    return None
+
+  start = time.perf_counter()
+  for _ in range(iterations):
+    await app(dict(scope), receive, send)
+  return (time.perf_counter() - start) / iterations
+
+
+async def _time_coroutine(fn, iterations: int) -> float:
+  start = time.perf_counter()
+  for _ in range(iterations):
+    await fn()
+  return (time.perf_counter() - start) / iterations
+
+
+def _time_sync(fn, iterations: int) -> float:
+  start = time.perf_counter()
+  for _ in range(iterations):
+    fn()
+  return (time.perf_counter() - start) / iterations
+
+
+async def _run(iterations: int) -> dict:
+  histogram = Histogram("bench_seconds", "bench", ("route",))
+  counter = Counter("bench_total", "bench", ("route",))
+  labels = ("/items/{item_id}",)
+  request_iterations = max(1, iterations // 10)
+
+  bare_call = await _time_coroutine(_noop, iterations)
+  instrumented_call = await _time_coroutine(_instrumented_noop, iterations)
+  bare_request = await _drive(_app(False), request_iterations)
+  instrumented_request = await _drive(_app(True), request_iterations)
+
+  render_start = time.perf_counter()
+  exposition = REGISTRY.render()
+  render_seconds = time.perf_counter() - render_start
+
+  return {
+    "histogram_observe_ns": _time_sync(lambda: histogram.observe(0.012, labels), iterations) * 1e9,
+    "counter_inc_ns": _time_sync(lambda: counter.inc(labels), iterations) * 1e9,
+    "decorator_overhead_ns": (instrumented_call - bare_call) * 1e9,
+    "request_us_without_middleware": bare_request * 1e6,
+    "request_us_with_middleware": instrumented_request * 1e6,
+    "middleware_overhead_us": (instrumented_request - bare_request) * 1e6,
+    "render_ms": render_seconds * 1e3,
+    "render_bytes": len(exposition),
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--iterations", type=int, default=200_000)
+  args = parser.parse_args()
+  print(json.dumps(asyncio.run(_run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,158 @@
+"""Stored bytes and codec CPU per saved listing: JSONB, plain zstd and dictionary zstd.
+
+Usage (from backend/):
+
+  python -m benchmarks.bench_payload_storage [--listings 4000] [--iterations 20] [--database]
+
+The recorded SerpAPI pages are expanded into ``--listings`` distinct listings (fresh job ids
+and apply links, rotated titles), split in half: one half trains the dictionary, the other is
+measured, so the ratio is for listings the dictionary has not seen. The fixtures hold only a
+few dozen descriptions, so treat the dictionary ratio as an upper bound. The report gives mean
+stored bytes per listing and mean encode/decode CPU per listing for compact JSON, zstd
+without a dictionary and zstd with the trained dictionary, plus the summary projection.
+
+With ``--database`` (and DATABASE_URL pointing at a disposable local Postgres) the measured
+half is also written to temporary tables as JSONB, as dictionary zstd and as the summary
+projection, and the report adds ``pg_total_relation_size`` per row (heap plus TOAST) and the
+wall time to read every row back, decoded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks import run
+from benchmarks.bench_mapping import _load_pages
+from services.payload_codec import DICTIONARY_BYTES, PayloadCodec, encode_json, summarize_listing, train_dictionary, zstandard
+from services.serpapi_client import _job_fields
+
+
+def _listings(count: int) -> list[dict[str, Any]]:
+  base = [_job_fields(job) for page in _load_pages() for job in page]
+  listings = []
+  for index in range(count):
+    listing = dict(base[index % len(base)])
+    job_id = uuid.uuid4().hex
+    listing["job_id"] = job_id
+    listing["title"] = f"{listing.get('title') or 'Engineer'} {index // len(base)}"
+    listing["apply_options"] = [
+      {**option, "link": f"{option.get('link') or 'https://example.com'}?ref={job_id[:12]}"}
+      for option in listing.get("apply_options") or []
+    ]
+    listings.append(listing)
+  return listings
+
+
+def _measure(fn: Callable[[Any], object], items: list[Any], iterations: int) -> float:
+  start = time.process_time()
+  for _ in range(iterations):
+    for item in items:
+      fn(item)
+  return (time.process_time() - start) / (iterations * len(items))
+
+
+def _codec_row(codec: PayloadCodec, listings: list[dict[str, Any]], iterations: int) -> dict[str, float]:
+  blobs = [codec.encode(listing) for listing in listings]
+  return {
+    "bytes": round(sum(map(len, blobs)) / len(blobs)),
+    "encode_us": round(_measure(codec.encode, listings, iterations) * 1e6, 2),
+    "decode_us": round(_measure(codec.decode, blobs, iterations) * 1e6, 2),
+  }
+
+
+def _offline(listings: list[dict[str, Any]], training: list[dict[str, Any]], iterations: int) -> tuple[dict[str, Any], PayloadCodec]:
+  plain = PayloadCodec(enabled=True)
+  trained = PayloadCodec(enabled=True)
+  dictionary = train_dictionary([encode_json(listing) for listing in training], DICTIONARY_BYTES)
+  if dictionary is None:
+    raise SystemExit("Dictionary training failed; raise --listings.")
+  trained.install([dictionary])
+
+  json_bytes = [len(encode_json(listing)) for listing in listings]
+  summary_bytes = [len(encode_json(summarize_listing(listing))) for listing in listings]
+  results: dict[str, Any] = {
+    "json": {
+      "bytes": round(sum(json_bytes) / len(json_bytes)),
+      "encode_us": round(_measure(encode_json, listings, iterations) * 1e6, 2),
+      "decode_us": round(_measure(json.loads, [encode_json(listing) for listing in listings], iterations) * 1e6, 2),
+    },
+    "zstd": _codec_row(plain, listings, iterations),
+    "zstd_dictionary": _codec_row(trained, listings, iterations),
+    "summary_json_bytes": round(sum(summary_bytes) / len(summary_bytes)),
+    "dictionary_bytes": len(dictionary[1]),
+  }
+  results["ratio_zstd"] = round(results["json"]["bytes"] / results["zstd"]["bytes"], 2)
+  results["ratio_zstd_dictionary"] = round(results["json"]["bytes"] / results["zstd_dictionary"]["bytes"], 2)
+  return results, trained
+
+
+async def _database(listings: list[dict[str, Any]], codec: PayloadCodec) -> dict[str, Any]:
+  from sqlalchemy import bindparam, text
+  from sqlalchemy.dialects.postgresql import JSONB
+
+  from db.database import dispose_db, engine
+
+  tables = {
+    "jsonb": ("payload JSONB", [{"payload": listing} for listing in listings]),
+    "zstd_dictionary": ("payload BYTEA", [{"payload": codec.encode(listing)} for listing in listings]),
+    "summary": ("payload JSONB", [{"payload": summarize_listing(listing)} for listing in listings]),
+  }
+  results: dict[str, Any] = {}
+  try:
+    async with engine.connect() as conn:
+      for name, (column, rows) in tables.items():
+        table = f"bench_payload_{name}"
+        await conn.execute(text(f"CREATE TEMP TABLE {table} (id serial PRIMARY KEY, {column})"))
+        insert = text(f"INSERT INTO {table} (payload) VALUES (:payload)")
+        if column.endswith("JSONB"):
+          insert = insert.bindparams(bindparam("payload", type_=JSONB))
+        await conn.execute(insert, rows)
+        await conn.execute(text(f"ANALYZE {table}"))
+        size = await conn.scalar(text(f"SELECT pg_total_relation_size('{table}')"))
+
+        started = time.perf_counter()
+        stored = (await conn.execute(text(f"SELECT payload FROM {table}"))).scalars().all()
+        if name == "zstd_dictionary":
+          stored = [codec.decode(blob) for blob in stored]
+        read_ms = (time.perf_counter() - started) * 1000
+        results[name] = {"bytes_per_row": round(size / len(rows)), "read_all_ms": round(read_ms, 2)}
+      await conn.rollback()
+  finally:
+    await dispose_db()
+  results["ratio_zstd_dictionary"] = round(
+    results["jsonb"]["bytes_per_row"] / results["zstd_dictionary"]["bytes_per_row"], 2
+  )
+  return results
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--listings", type=int, default=4000)
+  parser.add_argument("--iterations", type=int, default=20)
+  parser.add_argument("--database", action="store_true")
+  parser.add_argument("--output", default=str(run.BACKEND_DIR / "benchmarks" / "results" / "bench_payload_storage.json"))
+  args = parser.parse_args()
+  if zstandard is None:
+    raise SystemExit("zstandard is not installed.")
+
+  listings = _listings(args.listings)
+  training, measured = listings[::2], listings[1::2]
+  offline, codec = _offline(measured, training, args.iterations)
+  results: dict[str, Any] = {"listings": len(measured), "training_samples": len(training), "codec": offline}
+  if args.database:
+    results["postgres"] = asyncio.run(_database(measured, codec))
+
+  text_out = json.dumps(results, indent=2)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text_out + "\n")
+  print(text_out)
+
+
+if __name__ == "__main__":
+  main()
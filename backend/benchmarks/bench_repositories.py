@@ -0,0 +1,210 @@
+"""Per-call overhead of the hot read repositories, ORM entity loading versus Core rows.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.bench_repositories [--iterations 2000] [--saved-jobs 25] [--skip-migrations]
+
+Rows for a throwaway user are seeded first: one search cache entry, ``--saved-jobs`` saved
+listings built from the recorded SerpAPI pages, and a subscription. Each hot path then runs
+``--iterations`` times, each call in its own session as a request would, once through the
+ORM queries the repositories used to run (``select(Entity)`` plus ``upsert`` by
+get/add/commit/refresh) and once through the current repository functions. The report gives
+mean and p50/p99 wall time and mean CPU time per call. The seeded rows are deleted at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import delete, select
+
+from benchmarks import run
+from benchmarks.bench_mapping import _load_pages
+from db.database import SessionLocal, dispose_db
+from db.models.job_search import JobSearch
+from db.models.saved_job import SavedJob
+from db.models.user_subscription import UserSubscription
+from db.repositories.job_search_repository import cache_job_search_result, get_cached_search_entry
+from db.repositories.saved_job_repository import get_saved_job, list_saved_jobs_for_user, upsert_saved_job
+from db.repositories.user_subscription_repository import get_subscription_for_user
+from services.payload_codec import summarize_listing
+from services.serpapi_client import _job_fields
+
+SEARCH_KEY = {
+  "query": "bench repositories",
+  "location": "United States",
+  "page": 1,
+  "employment_type": None,
+  "roles": None,
+  "seniority_filters": None,
+}
+
+
+async def orm_get_cached_search_entry(session, **key: Any) -> Optional[JobSearch]:
+  cutoff = datetime.now(timezone.utc) - timedelta(seconds=3600)
+  stmt = (
+    select(JobSearch)
+    .where(
+      JobSearch.query == key["query"],
+      JobSearch.location == key["location"],
+      JobSearch.page == key["page"],
+      JobSearch.employment_type == key["employment_type"],
+      JobSearch.role_filters == [],
+      JobSearch.seniority_filters == [],
+      JobSearch.created_at >= cutoff,
+    )
+    .order_by(JobSearch.created_at.desc())
+    .limit(1)
+  )
+  return (await session.execute(stmt)).scalar_one_or_none()
+
+
+async def orm_list_saved_jobs(session, user_id: str) -> list[SavedJob]:
+  stmt = select(SavedJob).where(SavedJob.user_id == user_id).order_by(SavedJob.created_at.desc())
+  return list((await session.execute(stmt)).scalars().all())
+
+
+async def orm_get_saved_job(session, user_id: str, job_id: str) -> Optional[SavedJob]:
+  stmt = select(SavedJob).where(SavedJob.user_id == user_id, SavedJob.job_id == job_id).limit(1)
+  return (await session.execute(stmt)).scalar_one_or_none()
+
+
+async def orm_upsert_saved_job(session, user_id: str, job_id: str, payload: dict) -> SavedJob:
+  record = await orm_get_saved_job(session, user_id, job_id)
+  if record:
+    record.job_data = payload
+    record.job_summary = summarize_listing(payload)
+  else:
+    record = SavedJob(user_id=user_id, job_id=job_id, job_data=payload, job_summary=summarize_listing(payload))
+  session.add(record)
+  await session.commit()
+  await session.refresh(record)
+  return record
+
+
+async def orm_get_subscription(session, user_id: str) -> Optional[UserSubscription]:
+  stmt = select(UserSubscription).where(UserSubscription.user_id == user_id).limit(1)
+  return (await session.execute(stmt)).scalar_one_or_none()
+
+
+async def _seed(user_id: str, listings: list[dict[str, Any]], pages: list[list[dict]]) -> None:
+  async with SessionLocal() as session:
+    await cache_job_search_result(session, **SEARCH_KEY, payload={"jobs": listings[:10]})
+    for listing in listings:
+      session.add(
+        SavedJob(
+          user_id=user_id,
+          job_id=listing["job_id"],
+          job_data=listing,
+          job_summary=summarize_listing(listing),
+          htidocid=listing.get("htidocid"),
+        )
+      )
+    session.add(UserSubscription(user_id=user_id, status="active", plan="monthly"))
+    await session.commit()
+
+
+async def _cleanup(user_id: str) -> None:
+  async with SessionLocal() as session:
+    await session.execute(delete(SavedJob).where(SavedJob.user_id == user_id))
+    await session.execute(delete(UserSubscription).where(UserSubscription.user_id == user_id))
+    await session.execute(delete(JobSearch).where(JobSearch.query == SEARCH_KEY["query"]))
+    await session.commit()
+
+
+async def _time(call: Callable[[Any], Awaitable[Any]], iterations: int) -> dict[str, float]:
+  for _ in range(min(50, iterations)):  # warm the pool, compiled cache and prepared statements
+    async with SessionLocal() as session:
+      await call(session)
+  wall: list[float] = []
+  cpu_started = time.process_time()
+  for _ in range(iterations):
+    started = time.perf_counter()
+    async with SessionLocal() as session:
+      await call(session)
+    wall.append(time.perf_counter() - started)
+  cpu = (time.process_time() - cpu_started) / iterations
+  wall.sort()
+  return {
+    "mean_us": round(sum(wall) / len(wall) * 1e6, 1),
+    "p50_us": round(run.percentile(wall, 0.50) * 1e6, 1),
+    "p99_us": round(run.percentile(wall, 0.99) * 1e6, 1),
+    "cpu_us": round(cpu * 1e6, 1),
+  }
+
+
+async def _measure(args: argparse.Namespace) -> dict[str, Any]:
+  user_id = f"bench-repo-{uuid.uuid4().hex[:8]}"
+  pages = _load_pages()
+  raw = [job for page in pages for job in page]
+  listings = []
+  for index in range(args.saved_jobs):
+    listing = _job_fields(raw[index % len(raw)])
+    listings.append({**listing, "job_id": f"{listing['job_id']}-{index}"})
+  job_id = listings[0]["job_id"]
+  payload = listings[0]
+
+  cases = {
+    "get_cached_search_entry": (
+      lambda session: orm_get_cached_search_entry(session, **SEARCH_KEY),
+      lambda session: get_cached_search_entry(session, **SEARCH_KEY),
+    ),
+    "list_saved_jobs_for_user": (
+      lambda session: orm_list_saved_jobs(session, user_id),
+      lambda session: list_saved_jobs_for_user(session, user_id),
+    ),
+    "get_saved_job": (
+      lambda session: orm_get_saved_job(session, user_id, job_id),
+      lambda session: get_saved_job(session, user_id, job_id),
+    ),
+    "get_subscription_for_user": (
+      lambda session: orm_get_subscription(session, user_id),
+      lambda session: get_subscription_for_user(session, user_id),
+    ),
+    "upsert_saved_job": (
+      lambda session: orm_upsert_saved_job(session, user_id, job_id, payload),
+      lambda session: upsert_saved_job(session, user_id, job_id, payload),
+    ),
+  }
+  await _seed(user_id, listings, pages)
+  try:
+    results: dict[str, Any] = {}
+    for name, (orm_call, core_call) in cases.items():
+      orm = await _time(orm_call, args.iterations)
+      core = await _time(core_call, args.iterations)
+      results[name] = {"orm": orm, "core": core, "cpu_speedup": round(orm["cpu_us"] / max(core["cpu_us"], 0.1), 2)}
+    return {"iterations": args.iterations, "saved_jobs": args.saved_jobs, "results": results}
+  finally:
+    await _cleanup(user_id)
+    await dispose_db()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--iterations", type=int, default=2000)
+  parser.add_argument("--saved-jobs", type=int, default=25)
+  parser.add_argument("--skip-migrations", action="store_true")
+  parser.add_argument("--output", default=str(run.BACKEND_DIR / "benchmarks" / "results" / "bench_repositories.json"))
+  args = parser.parse_args()
+
+  if not args.skip_migrations:
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=run.BACKEND_DIR, check=True)
+  results = asyncio.run(_measure(args))
+
+  text = json.dumps(results, indent=2)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text + "\n")
+  print(text)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,79 @@
+"""Response bytes and serialization CPU per search page for each listing view.
+
+Usage (from backend/):  python -m benchmarks.bench_views [--iterations 2000]
+
+Recorded SerpAPI pages are mapped once into cached search payloads, then encoded the way
+``/jobs/search`` does for ``view=full``, for ``view=summary`` on a view-cache miss (projection
+plus encoding), and for ``view=summary`` on a view-cache hit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+
+from benchmarks.bench_mapping import _load_pages
+from services.listing_views import SUMMARY_FIELDS, ViewBodyCache, project_listings
+from services.serpapi_client import _job_fields
+
+# Same adapter as routes.jobs, which cannot be imported without a database URL.
+_PAYLOAD_ADAPTER = TypeAdapter(dict[str, Any])
+
+
+def _payloads() -> list[dict[str, Any]]:
+  return [
+    {"query": "software engineer", "location": "United States", "page": 1, "employment_type": None,
+     "role_filters": [], "seniority_filters": [], "jobs": [_job_fields(job) for job in page]}
+    for page in _load_pages()
+  ]
+
+
+def full_body(payload: dict[str, Any]) -> bytes:
+  return _PAYLOAD_ADAPTER.dump_json(payload)
+
+
+def summary_body(payload: dict[str, Any]) -> bytes:
+  return _PAYLOAD_ADAPTER.dump_json({**payload, "jobs": project_listings(payload["jobs"], SUMMARY_FIELDS)})
+
+
+def _measure(fn: Callable[[Any], object], items: list[Any], iterations: int) -> float:
+  start = time.process_time()
+  for _ in range(iterations):
+    for item in items:
+      fn(item)
+  return (time.process_time() - start) / (iterations * len(items))
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--iterations", type=int, default=2000)
+  args = parser.parse_args()
+
+  payloads = _payloads()
+  cache = ViewBodyCache()
+  etags = [uuid.uuid4().hex for _ in payloads]
+  for etag, payload in zip(etags, payloads):
+    cache.put(etag, summary_body(payload))
+
+  full_bytes = sum(len(full_body(payload)) for payload in payloads) / len(payloads)
+  summary_bytes = sum(len(summary_body(payload)) for payload in payloads) / len(payloads)
+  results = {
+    "pages": len(payloads),
+    "full_bytes_per_page": round(full_bytes),
+    "summary_bytes_per_page": round(summary_bytes),
+    "bytes_ratio": round(full_bytes / summary_bytes, 1),
+    "full_us_per_page": round(_measure(full_body, payloads, args.iterations) * 1e6, 2),
+    "summary_miss_us_per_page": round(_measure(summary_body, payloads, args.iterations) * 1e6, 2),
+    "summary_hit_us_per_page": round(_measure(cache.get, etags, args.iterations) * 1e6, 2),
+  }
+  results["cpu_ratio_miss"] = round(results["full_us_per_page"] / results["summary_miss_us_per_page"], 1)
+  print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+  main()
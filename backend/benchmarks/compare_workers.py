@@ -0,0 +1,75 @@
+"""Throughput with one worker versus N workers, using the production server flags.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.compare_workers --workers 4 [--scenarios cached_search,saved_crud] [--requests 1000]
+
+Each configuration starts a fresh app via benchmarks.run with ``--workers N --loop auto
+--http auto``. WEB_CONCURRENCY=N and DB_MAX_CONNECTIONS_BUDGET are set so every run gets
+the same total number of Postgres connections. Results for both runs are written next to
+``--output-dir`` and summarised as a speedup per scenario.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from benchmarks import run
+
+DEFAULT_SCENARIOS = "cached_search,saved_crud,cold_search"
+
+
+def _run(workers: int, args: argparse.Namespace) -> dict:
+  output = Path(args.output_dir) / f"workers-{workers}.json"
+  argv = [
+    "--scenarios", args.scenarios,
+    "--requests", str(args.requests),
+    "--concurrency", str(args.concurrency),
+    "--output", str(output),
+    "--app-arg=--workers", f"--app-arg={workers}",
+    "--app-arg=--loop", "--app-arg=auto",
+    "--app-arg=--http", "--app-arg=auto",
+    "--app-env", f"WEB_CONCURRENCY={workers}",
+    "--app-env", f"DB_MAX_CONNECTIONS_BUDGET={args.connection_budget}",
+  ]
+  if args.mock_config:
+    argv += ["--mock-config", args.mock_config]
+  if run.main(argv) != 0:
+    raise SystemExit(f"benchmark run with {workers} worker(s) failed")
+  return json.loads(output.read_text())
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--workers", type=int, default=4)
+  parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+  parser.add_argument("--requests", type=int, default=1000)
+  parser.add_argument("--concurrency", type=int, default=64)
+  parser.add_argument("--connection-budget", type=int, default=40)
+  parser.add_argument("--mock-config", help="Forwarded to benchmarks.run")
+  parser.add_argument("--output-dir", default=str(run.BACKEND_DIR / "benchmarks" / "results"))
+  args = parser.parse_args()
+
+  single = _run(1, args)
+  multi = _run(args.workers, args)
+
+  summary = {}
+  for name, result in single["scenarios"].items():
+    other = multi["scenarios"].get(name)
+    if not other:
+      continue
+    base = result["throughput_ops_per_second"]
+    summary[name] = {
+      "ops_per_second_1_worker": base,
+      f"ops_per_second_{args.workers}_workers": other["throughput_ops_per_second"],
+      "speedup": round(other["throughput_ops_per_second"] / base, 2) if base else None,
+      "p95_ms_1_worker": result["latency_ms"]["p95"],
+      f"p95_ms_{args.workers}_workers": other["latency_ms"]["p95"],
+    }
+  print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+  main()
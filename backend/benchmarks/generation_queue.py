@@ -0,0 +1,118 @@
+"""Queued generation throughput as the number of queue workers grows.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.generation_queue [--jobs 200] [--workers 2 --workers 8] [--openai-latency-ms 1500]
+
+For each worker count the app is started fresh with ``GENERATION_WORKERS`` set to it, and
+``--jobs`` project-helper generations are submitted at once to ``/generation-jobs``. Submits
+only insert a row, so their latency should stay flat. The script polls each job until it
+finishes and reports submit p50/p99, time to drain the queue and completed jobs per second.
+With the mock OpenAI latency fixed, throughput should grow roughly linearly with the worker
+count while the number of open HTTP requests stays the same.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks import run
+
+PROJECT_HELPER_PAYLOAD = {
+  "job_description": "Build and operate Python services on Postgres and AWS.",
+  "role": "Backend Engineer",
+}
+
+
+async def _submit(client: httpx.AsyncClient, latencies: list[float], statuses: Counter) -> str | None:
+  started = time.perf_counter()
+  response = await client.post("/generation-jobs/project-helper", json=PROJECT_HELPER_PAYLOAD)
+  latencies.append(time.perf_counter() - started)
+  statuses[str(response.status_code)] += 1
+  return response.json()["job_id"] if response.status_code == 202 else None
+
+
+async def _await_job(client: httpx.AsyncClient, job_id: str, poll_seconds: float) -> str:
+  while True:
+    response = await client.get(f"/generation-jobs/{job_id}")
+    state = response.json().get("status") if response.status_code == 200 else str(response.status_code)
+    if state not in ("queued", "running"):
+      return state
+    await asyncio.sleep(poll_seconds)
+
+
+async def _measure(app_url: str, args: argparse.Namespace, workers: int) -> dict[str, Any]:
+  async with httpx.AsyncClient(base_url=app_url, timeout=60.0) as client:
+    submit_latencies: list[float] = []
+    submit_statuses: Counter = Counter()
+    started = time.perf_counter()
+    job_ids = await asyncio.gather(*(_submit(client, submit_latencies, submit_statuses) for _ in range(args.jobs)))
+    submitted = time.perf_counter() - started
+    outcomes = Counter(
+      await asyncio.gather(*(_await_job(client, job_id, args.poll_seconds) for job_id in job_ids if job_id))
+    )
+    drained = time.perf_counter() - started
+
+  submit_latencies.sort()
+  return {
+    "workers": workers,
+    "jobs": args.jobs,
+    "submit": {
+      "seconds": round(submitted, 3),
+      "p50_ms": round(run.percentile(submit_latencies, 0.50) * 1000, 2),
+      "p99_ms": round(run.percentile(submit_latencies, 0.99) * 1000, 2),
+      "statuses": dict(submit_statuses),
+    },
+    "drain_seconds": round(drained, 3),
+    "jobs_per_second": round(outcomes.get("succeeded", 0) / drained, 3) if drained else 0.0,
+    "outcomes": dict(outcomes),
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--jobs", type=int, default=200)
+  parser.add_argument("--workers", type=int, action="append", help="Worker counts to compare (default 2, 4, 8)")
+  parser.add_argument("--openai-latency-ms", type=float, default=1500.0)
+  parser.add_argument("--poll-seconds", type=float, default=0.25)
+  parser.add_argument("--app-port", type=int, default=8911)
+  parser.add_argument("--mock-port", type=int, default=8910)
+  parser.add_argument("--skip-migrations", action="store_true")
+  parser.add_argument("--output", default=str(run.BACKEND_DIR / "benchmarks" / "results" / "generation_queue.json"))
+  args = parser.parse_args()
+
+  results = []
+  with ExitStack() as stack:
+    mock_url = run.start_mock(stack, args.mock_port, {"openai": {"latency_ms": args.openai_latency_ms}})
+    for index, workers in enumerate(args.workers or [2, 4, 8]):
+      with ExitStack() as app_stack:
+        env = run.app_environment(
+          mock_url,
+          {"GENERATION_WORKERS": str(workers), "GENERATION_MAX_QUEUED": str(args.jobs * 2)},
+        )
+        app_url = run.start_app(
+          app_stack,
+          args.app_port,
+          env,
+          migrate=index == 0 and not args.skip_migrations,
+          log_name=f"app-workers-{workers}",
+        )
+        results.append(asyncio.run(_measure(app_url, args, workers)))
+
+  text = json.dumps({"openai_latency_ms": args.openai_latency_ms, "runs": results}, indent=2)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text + "\n")
+  print(text)
+
+
+if __name__ == "__main__":
+  main()
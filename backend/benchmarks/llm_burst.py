@@ -0,0 +1,147 @@
+"""Cheap-route latency under a burst of LLM requests, with and without admission control.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.llm_burst [--llm-concurrency 64] [--burst-seconds 20] [--openai-latency-ms 1500]
+
+For each mode the app is started fresh against the mock upstreams. Mode ``admission`` uses the
+default limits and mode ``unlimited`` sets ADMISSION_ENABLED=false. Cheap clients poll
+``/billing/status`` and ``/jobs/saved`` throughout. They run alone for ``--quiet-seconds`` and
+then alongside ``--llm-concurrency`` clients sending behavioral assistant turns, which hold an
+entitlement DB session for the whole slow OpenAI call. The report compares cheap-route
+p50/p99 between the quiet and burst phases and counts LLM outcomes by status (200, 429, 503).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks import run
+from benchmarks.scenarios import USER_HEADERS, RunContext, ScenarioError, _grant_entitlement, _interview_turn
+
+MODES = {"admission": {"ADMISSION_ENABLED": "true"}, "unlimited": {"ADMISSION_ENABLED": "false"}}
+CHEAP_PATHS = ("/billing/status", "/jobs/saved")
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float]:
+  latencies = sorted(latencies)
+  return {
+    "requests": len(latencies),
+    "p50_ms": round(run.percentile(latencies, 0.50) * 1000, 2),
+    "p99_ms": round(run.percentile(latencies, 0.99) * 1000, 2),
+    "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+  }
+
+
+async def _cheap_worker(client: httpx.AsyncClient, stop_at: float, latencies: list[float], statuses: Counter) -> None:
+  i = 0
+  while time.monotonic() < stop_at:
+    path = CHEAP_PATHS[i % len(CHEAP_PATHS)]
+    i += 1
+    started = time.perf_counter()
+    try:
+      response = await client.get(path, headers=USER_HEADERS)
+      statuses[str(response.status_code)] += 1
+    except httpx.HTTPError as exc:
+      statuses[type(exc).__name__] += 1
+    latencies.append(time.perf_counter() - started)
+
+
+async def _llm_worker(client: httpx.AsyncClient, stop_at: float, ctx: RunContext, statuses: Counter) -> None:
+  i = 0
+  while time.monotonic() < stop_at:
+    i += 1
+    try:
+      await _interview_turn(client, i, ctx)
+      statuses["200"] += 1
+    except ScenarioError as exc:
+      statuses[str(exc.status_code)] += 1
+      if exc.status_code in (429, 503):
+        # Well-behaved clients back off instead of hammering a shedding server.
+        await asyncio.sleep(0.25)
+    except httpx.HTTPError as exc:
+      statuses[type(exc).__name__] += 1
+
+
+async def _measure(app_url: str, args: argparse.Namespace) -> dict[str, Any]:
+  ctx = RunContext(run_id=uuid.uuid4().hex[:8])
+  cheap_limits = httpx.Limits(max_connections=args.cheap_concurrency)
+  llm_limits = httpx.Limits(max_connections=args.llm_concurrency)
+  async with httpx.AsyncClient(base_url=app_url, timeout=60.0, limits=cheap_limits) as cheap, httpx.AsyncClient(
+    base_url=app_url, timeout=120.0, limits=llm_limits
+  ) as llm:
+    await _grant_entitlement(cheap, -1, ctx)
+
+    quiet: list[float] = []
+    quiet_statuses: Counter = Counter()
+    stop_at = time.monotonic() + args.quiet_seconds
+    await asyncio.gather(*(_cheap_worker(cheap, stop_at, quiet, quiet_statuses) for _ in range(args.cheap_concurrency)))
+
+    burst: list[float] = []
+    burst_statuses: Counter = Counter()
+    llm_statuses: Counter = Counter()
+    stop_at = time.monotonic() + args.burst_seconds
+    await asyncio.gather(
+      *(_cheap_worker(cheap, stop_at, burst, burst_statuses) for _ in range(args.cheap_concurrency)),
+      *(_llm_worker(llm, stop_at, ctx, llm_statuses) for _ in range(args.llm_concurrency)),
+    )
+    admission = (await cheap.get("/metrics/admission")).json()
+
+  return {
+    "cheap_quiet": {**_latency_summary(quiet), "statuses": dict(quiet_statuses)},
+    "cheap_burst": {**_latency_summary(burst), "statuses": dict(burst_statuses)},
+    "llm_statuses": dict(llm_statuses),
+    "admission_after_burst": admission,
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--modes", default=",".join(MODES), help=f"Comma separated subset of: {', '.join(MODES)}")
+  parser.add_argument("--quiet-seconds", type=float, default=5.0)
+  parser.add_argument("--burst-seconds", type=float, default=20.0)
+  parser.add_argument("--cheap-concurrency", type=int, default=8)
+  parser.add_argument("--llm-concurrency", type=int, default=64)
+  parser.add_argument("--openai-latency-ms", type=float, default=1500.0)
+  parser.add_argument("--app-port", type=int, default=8901)
+  parser.add_argument("--mock-port", type=int, default=8900)
+  parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE environment for the app")
+  parser.add_argument("--skip-migrations", action="store_true")
+  parser.add_argument("--output", default=str(run.BACKEND_DIR / "benchmarks" / "results" / "llm_burst.json"))
+  args = parser.parse_args()
+
+  extra_env = dict(item.split("=", 1) for item in args.app_env)
+  results: dict[str, Any] = {}
+  for mode in args.modes.split(","):
+    print(f"running {mode} ...", flush=True)
+    with ExitStack() as stack:
+      mock_url = run.start_mock(stack, args.mock_port, {"openai": {"latency_ms": args.openai_latency_ms}})
+      env = run.app_environment(mock_url, {**MODES[mode], **extra_env})
+      app_url = run.start_app(stack, args.app_port, env, migrate=not args.skip_migrations, log_name=f"app-{mode}")
+      results[mode] = asyncio.run(_measure(app_url, args))
+
+  text = json.dumps(results, indent=2)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text + "\n")
+  print(text)
+  print(f"{'mode':<12}{'quiet p99':>12}{'burst p99':>12}{'llm 200':>10}{'llm 429':>10}{'llm 503':>10}")
+  for mode, result in results.items():
+    llm = result["llm_statuses"]
+    print(
+      f"{mode:<12}{result['cheap_quiet']['p99_ms']:>12.1f}{result['cheap_burst']['p99_ms']:>12.1f}"
+      f"{llm.get('200', 0):>10}{llm.get('429', 0):>10}{llm.get('503', 0):>10}"
+    )
+
+
+if __name__ == "__main__":
+  main()
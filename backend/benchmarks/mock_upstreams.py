@@ -0,0 +1,252 @@
+"""Mock SerpAPI, OpenAI and Stripe endpoints for benchmarks.
+
+Run standalone (from backend/):  python -m uvicorn benchmarks.mock_upstreams:app --port 8900
+
+SerpAPI answers from the recorded google_jobs fixtures and paginates with synthetic
+``next_page_token`` values up to ``MOCK_SERPAPI_MAX_PAGES`` (default 10). OpenAI chat completions return canned JSON
+matching whichever generator prompted them, and Stripe returns minimal checkout session and
+subscription objects.
+
+Each upstream has its own latency (base + uniform jitter, in ms) and error rate. Defaults come
+from ``MOCK_<UPSTREAM>_LATENCY_MS``, ``MOCK_<UPSTREAM>_JITTER_MS`` and
+``MOCK_<UPSTREAM>_ERROR_RATE``, and ``POST /__config`` changes them at runtime. Injected
+errors are 503s, so they exercise the retry and circuit breaker paths. ``GET /__stats``
+returns call counts per upstream and ``POST /__reset`` clears them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@dataclass
+class UpstreamBehaviour:
+  latency_ms: float = 0.0
+  jitter_ms: float = 0.0
+  error_rate: float = 0.0
+
+  @classmethod
+  def from_env(cls, name: str, latency_ms: float) -> "UpstreamBehaviour":
+    prefix = f"MOCK_{name.upper()}"
+    latency_ms = float(os.getenv(f"{prefix}_LATENCY_MS", latency_ms))
+    return cls(
+      latency_ms=latency_ms,
+      jitter_ms=float(os.getenv(f"{prefix}_JITTER_MS", latency_ms * 0.2)),
+      error_rate=float(os.getenv(f"{prefix}_ERROR_RATE", 0.0)),
+    )
+
+
+BEHAVIOUR = {
+  "serpapi": UpstreamBehaviour.from_env("serpapi", 400.0),
+  "openai": UpstreamBehaviour.from_env("openai", 1200.0),
+  "stripe": UpstreamBehaviour.from_env("stripe", 250.0),
+}
+MAX_PAGES = int(os.getenv("MOCK_SERPAPI_MAX_PAGES", "10"))
+CALLS: Counter[str] = Counter()
+ERRORS: Counter[str] = Counter()
+
+_PAGES = [json.loads(path.read_text()) for path in sorted(FIXTURES.glob("serpapi_google_jobs_page*.json"))]
+
+
+async def _simulate(upstream: str) -> JSONResponse | None:
+  """Apply the configured latency; return a 503 response when a fault is injected."""
+  CALLS[upstream] += 1
+  behaviour = BEHAVIOUR[upstream]
+  delay = behaviour.latency_ms + random.uniform(0, behaviour.jitter_ms)
+  if delay > 0:
+    await asyncio.sleep(delay / 1000)
+  if behaviour.error_rate and random.random() < behaviour.error_rate:
+    ERRORS[upstream] += 1
+    # Stripe and OpenAI SDKs both parse ``{"error": {"type", "message"}}`` bodies.
+    return JSONResponse({"error": {"type": "api_error", "message": f"injected {upstream} failure"}}, status_code=503)
+  return None
+
+
+async def serpapi_search(request: Request) -> JSONResponse:
+  failure = await _simulate("serpapi")
+  if failure:
+    return failure
+  token = request.query_params.get("next_page_token") or ""
+  page = int(token.rsplit("-", 1)[1]) if token.startswith("mock-page-") else 1
+  payload = copy.deepcopy(_PAGES[(page - 1) % len(_PAGES)])
+  payload["search_parameters"] = dict(request.query_params)
+  if page < MAX_PAGES:
+    payload["serpapi_pagination"] = {"next_page_token": f"mock-page-{page + 1}"}
+  else:
+    payload.pop("serpapi_pagination", None)
+  return JSONResponse(payload)
+
+
+_TURN = {
+  "question": "Tell me about a time you untangled a production incident under pressure.",
+  "follow_up": "What would you do differently next time?",
+  "feedback": {
+    "summary": "Clear situation and actions; quantify the outcome more.",
+    "score": 7,
+    "star": {
+      "situation": {"status": "strong", "note": "Context was concrete."},
+      "task": {"status": "okay", "note": "Ownership could be sharper."},
+      "action": {"status": "strong", "note": "Decisions were explained."},
+      "result": {"status": "light", "note": "Add a metric."},
+    },
+    "strengths": ["Structured narrative"],
+    "improvements": ["Lead with impact"],
+    "next_practice": "Rehearse a 60-second version.",
+  },
+}
+_QUESTIONS = {
+  "role": "Software Engineer",
+  "seniority": "",
+  "questions": [
+    {
+      "question": "Describe a disagreement with a teammate and how you resolved it.",
+      "why_it_matters": "Collaboration across teams.",
+      "coaching_points": ["Show empathy", "Close with the outcome"],
+      "signals": ["Collaboration"],
+    }
+  ],
+}
+_PROJECT_HELPER = {
+  "title": "Job board aggregator",
+  "summary": "Aggregate listings and rank them by fit.",
+  "tech_stack": ["FastAPI", "Postgres"],
+  "implementation_steps": ["Model listings", "Build search", "Ship"],
+}
+_PROJECT_COACH = {"message": "Start with the data model.", "next_steps": ["Sketch tables"], "questions": ["Who are the users?"]}
+
+
+def _completion_content(prompt: str) -> dict:
+  if '"follow_up"' in prompt:
+    return _TURN
+  if '"why_it_matters"' in prompt:
+    return _QUESTIONS
+  if '"implementation_steps"' in prompt:
+    return _PROJECT_HELPER
+  return _PROJECT_COACH
+
+
+async def openai_chat_completions(request: Request) -> JSONResponse:
+  body = await request.json()
+  failure = await _simulate("openai")
+  if failure:
+    return failure
+  prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+  return JSONResponse(
+    {
+      "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+      "object": "chat.completion",
+      "created": int(time.time()),
+      "model": body.get("model", "gpt-4o-mini"),
+      "choices": [
+        {
+          "index": 0,
+          "message": {"role": "assistant", "content": json.dumps(_completion_content(prompt))},
+          "finish_reason": "stop",
+        }
+      ],
+      "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+  )
+
+
+def _checkout_session(session_id: str) -> dict:
+  return {
+    "id": session_id,
+    "object": "checkout.session",
+    "url": f"https://checkout.stripe.test/{session_id}",
+    "status": "complete",
+    "payment_status": "paid",
+    "mode": "subscription",
+    "client_reference_id": "bench-user",
+    "customer": "cus_bench",
+    "subscription": "sub_bench",
+    "metadata": {"user_id": "bench-user", "plan": "monthly"},
+  }
+
+
+async def stripe_create_checkout_session(request: Request) -> JSONResponse:
+  failure = await _simulate("stripe")
+  if failure:
+    return failure
+  return JSONResponse(_checkout_session(f"cs_test_{uuid.uuid4().hex[:16]}"))
+
+
+async def stripe_retrieve_checkout_session(request: Request) -> JSONResponse:
+  failure = await _simulate("stripe")
+  if failure:
+    return failure
+  return JSONResponse(_checkout_session(request.path_params["session_id"]))
+
+
+async def stripe_retrieve_subscription(request: Request) -> JSONResponse:
+  failure = await _simulate("stripe")
+  if failure:
+    return failure
+  return JSONResponse(
+    {
+      "id": request.path_params["subscription_id"],
+      "object": "subscription",
+      "status": "active",
+      "current_period_end": int(time.time()) + 30 * 86400,
+      "metadata": {"user_id": "bench-user", "plan": "monthly"},
+    }
+  )
+
+
+async def stats(request: Request) -> JSONResponse:
+  return JSONResponse(
+    {
+      "calls": dict(CALLS),
+      "injected_errors": dict(ERRORS),
+      "behaviour": {name: asdict(behaviour) for name, behaviour in BEHAVIOUR.items()},
+    }
+  )
+
+
+async def reset(request: Request) -> JSONResponse:
+  CALLS.clear()
+  ERRORS.clear()
+  return JSONResponse({"ok": True})
+
+
+async def configure(request: Request) -> JSONResponse:
+  """Body: ``{"serpapi": {"latency_ms": 50, "error_rate": 0.1}, ...}``."""
+  body = await request.json()
+  for name, settings in body.items():
+    if name not in BEHAVIOUR:
+      return JSONResponse({"error": f"unknown upstream {name}"}, status_code=400)
+    for key, value in settings.items():
+      if not hasattr(BEHAVIOUR[name], key):
+        return JSONResponse({"error": f"unknown setting {key}"}, status_code=400)
+      setattr(BEHAVIOUR[name], key, float(value))
+  return JSONResponse({name: asdict(behaviour) for name, behaviour in BEHAVIOUR.items()})
+
+
+app = Starlette(
+  routes=[
+    Route("/search.json", serpapi_search),
+    Route("/v1/chat/completions", openai_chat_completions, methods=["POST"]),
+    Route("/v1/checkout/sessions", stripe_create_checkout_session, methods=["POST"]),
+    Route("/v1/checkout/sessions/{session_id}", stripe_retrieve_checkout_session),
+    Route("/v1/subscriptions/{subscription_id}", stripe_retrieve_subscription),
+    Route("/__stats", stats),
+    Route("/__reset", reset, methods=["POST"]),
+    Route("/__config", configure, methods=["POST"]),
+  ]
+)
@@ -0,0 +1,43 @@
+"""Sample the search mapping and serialization path with the built-in profiler.
+
+Usage (from backend/):  python -m benchmarks.profile_search_path [--seconds 3] [--format summary]
+
+Shows how CPU splits between field projection, Pydantic validation of the listings and
+JSON encoding of ``JobSearchResponse`` -- the same view ``/admin/profile`` gives in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.bench_mapping import _load_pages, bulk_page
+from services.profiler import SamplingProfiler, render_profile
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("--seconds", type=float, default=3.0)
+  parser.add_argument("--interval-ms", type=float, default=1.0)
+  parser.add_argument("--format", choices=("summary", "collapsed", "speedscope"), default="summary")
+  args = parser.parse_args()
+
+  pages = _load_pages()
+  deadline = time.perf_counter() + args.seconds
+  with SamplingProfiler(args.interval_ms / 1000) as profiler:
+    while time.perf_counter() < deadline:
+      for page in pages:
+        bulk_page(page)
+  profile = profiler.profile
+
+  if args.format == "summary":
+    print(json.dumps({"samples": profile.samples, "top_frames": profile.top(20)}, indent=2))
+  else:
+    body, _ = render_profile(profile, args.format)
+    sys.stdout.write(body.decode())
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,138 @@
+"""Replay a recorded search log and compare cache hit rates for raw and canonical keys.
+
+Usage (from backend/):
+
+  python -m benchmarks.query_replay                                   # bundled sample log
+  python -m benchmarks.query_replay --log access_queries.jsonl --ttl-seconds 3600
+
+The log is JSON lines with ``q`` and optional ``location``, ``page``, ``employment_type``,
+``roles`` and ``ts`` (epoch seconds or ISO 8601) fields. Lines without ``ts`` are spaced one
+second apart. Each entry is looked up in a simulated search cache with the route's TTL, once
+keyed the way ``/jobs/search`` did before canonicalization (raw query, stripped location)
+and once through ``services.search_normalization``. A miss costs one SerpAPI call per page.
+No database or network access is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from benchmarks.run import BACKEND_DIR
+from db.repositories.job_search_repository import DEFAULT_CACHE_TTL_SECONDS
+from services.search_normalization import DEFAULT_LOCATION, canonical_location, canonical_query, canonical_terms
+
+SAMPLE_LOG = BACKEND_DIR / "benchmarks" / "fixtures" / "query_log.jsonl"
+
+Key = tuple[Any, ...]
+
+
+def _timestamp(value: Any, fallback: float) -> float:
+  if value is None:
+    return fallback
+  if isinstance(value, (int, float)):
+    return float(value)
+  return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def load_log(path: Path) -> list[dict[str, Any]]:
+  entries = []
+  for index, line in enumerate(path.read_text().splitlines()):
+    if not line.strip():
+      continue
+    entry = json.loads(line)
+    entry["ts"] = _timestamp(entry.get("ts"), float(index))
+    entries.append(entry)
+  entries.sort(key=lambda entry: entry["ts"])
+  return entries
+
+
+def raw_key(entry: dict[str, Any]) -> Key:
+  roles = sorted({role.strip() for role in entry.get("roles") or [] if role and role.strip()})
+  return (
+    entry["q"],
+    (entry.get("location") or "").strip() or DEFAULT_LOCATION,
+    entry.get("page", 1),
+    entry.get("employment_type"),
+    tuple(roles),
+  )
+
+
+def canonical_key(entry: dict[str, Any]) -> Key:
+  return (
+    canonical_query(entry["q"]),
+    canonical_location(entry.get("location")),
+    entry.get("page", 1),
+    entry.get("employment_type"),
+    tuple(canonical_terms(entry.get("roles"))),
+  )
+
+
+def replay(entries: Iterable[dict[str, Any]], key: Callable[[dict[str, Any]], Key], ttl: float) -> dict[str, Any]:
+  stored_at: dict[Key, float] = {}
+  hits = misses = upstream_calls = 0
+  for entry in entries:
+    cache_key = key(entry)
+    written = stored_at.get(cache_key)
+    if written is not None and entry["ts"] - written <= ttl:
+      hits += 1
+      continue
+    misses += 1
+    upstream_calls += entry.get("page", 1)
+    stored_at[cache_key] = entry["ts"]
+  total = hits + misses
+  return {
+    "requests": total,
+    "hits": hits,
+    "hit_rate": round(hits / total, 4) if total else 0.0,
+    "distinct_keys": len(stored_at),
+    "serpapi_calls": upstream_calls,
+  }
+
+
+def merged_groups(entries: list[dict[str, Any]], top: int) -> dict[str, list[str]]:
+  """Canonical keys that absorbed the most distinct raw spellings."""
+  groups: dict[Key, set[Key]] = defaultdict(set)
+  for entry in entries:
+    groups[canonical_key(entry)].add(raw_key(entry))
+  largest = sorted(groups.items(), key=lambda item: -len(item[1]))[:top]
+  return {
+    f"{key[0]} @ {key[1]}": sorted(f"{raw[0]!r} @ {raw[1]!r}" for raw in raws)
+    for key, raws in largest
+    if len(raws) > 1
+  }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--log", default=str(SAMPLE_LOG))
+  parser.add_argument("--ttl-seconds", type=float, default=DEFAULT_CACHE_TTL_SECONDS)
+  parser.add_argument("--top", type=int, default=10, help="Merged spelling groups to list")
+  parser.add_argument("--output", default=str(BACKEND_DIR / "benchmarks" / "results" / "query_replay.json"))
+  args = parser.parse_args(argv)
+
+  entries = load_log(Path(args.log))
+  raw = replay(entries, raw_key, args.ttl_seconds)
+  canonical = replay(entries, canonical_key, args.ttl_seconds)
+  results = {
+    "log": args.log,
+    "ttl_seconds": args.ttl_seconds,
+    "raw": raw,
+    "canonical": canonical,
+    "hit_rate_change": round(canonical["hit_rate"] - raw["hit_rate"], 4),
+    "serpapi_calls_saved": raw["serpapi_calls"] - canonical["serpapi_calls"],
+    "merged_groups": merged_groups(entries, args.top),
+  }
+
+  text = json.dumps(results, indent=2, ensure_ascii=False)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text + "\n")
+  print(text)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,322 @@
+"""Benchmark runner: starts mock upstreams and the app, runs scenarios, writes JSON results.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.run                                   # all scenarios
+  python -m benchmarks.run --scenarios cold_search,cached_search --requests 500 --concurrency 50
+  python -m benchmarks.run --output results.json --save-baseline benchmarks/baseline.json
+  python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.10 --fail-on-regression
+
+The app runs as a separate uvicorn process. It is pointed at the mock server through
+SERPAPI_URL, OPENAI_BASE_URL and STRIPE_API_BASE, with rate limits and the daily budget
+lifted. Migrations are applied first unless ``--skip-migrations`` is given. Use ``--app-url``
+to benchmark an app that is already running (it must be wired to the same mock server).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from benchmarks.scenarios import SCENARIOS, RunContext, Scenario
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+  """Nearest-rank percentile of an already sorted list."""
+  if not sorted_values:
+    return 0.0
+  rank = max(1, min(len(sorted_values), int(round(fraction * len(sorted_values) + 0.5))))
+  return sorted_values[rank - 1]
+
+
+def _spawn(args: list[str], env: dict[str, str], log_name: str, stack: ExitStack) -> subprocess.Popen:
+  log = stack.enter_context(open(BACKEND_DIR / f".bench-{log_name}.log", "w"))
+  process = subprocess.Popen(args, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+  def _stop() -> None:
+    process.terminate()
+    try:
+      process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+      process.kill()
+
+  stack.callback(_stop)
+  return process
+
+
+def _wait_for(url: str, process: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if process is not None and process.poll() is not None:
+      raise RuntimeError(f"process serving {url} exited with code {process.returncode}")
+    try:
+      if httpx.get(url, timeout=2.0).status_code < 500:
+        return
+    except httpx.HTTPError:
+      pass
+    time.sleep(0.3)
+  raise RuntimeError(f"timed out waiting for {url}")
+
+
+def app_environment(mock_url: str, extra: Optional[dict[str, str]] = None) -> dict[str, str]:
+  env = dict(os.environ)
+  env.update(
+    {
+      "SERPAPI_URL": f"{mock_url}/search.json",
+      "SERPAPI_API_KEY": "bench",
+      "OPENAI_BASE_URL": f"{mock_url}/v1",
+      "OPENAI_API_KEY": "bench",
+      "STRIPE_API_BASE": mock_url,
+      "STRIPE_SECRET_KEY": "sk_test_bench",
+      "STRIPE_PRICE_ID": "price_bench",
+      "STRIPE_SUCCESS_URL": "http://localhost:3000/billing/success",
+      "STRIPE_CANCEL_URL": "http://localhost:3000/billing/cancel",
+      "SERPAPI_DAILY_BUDGET": "0",
+      "SERPAPI_GLOBAL_RATE_PER_SECOND": "100000",
+      "SERPAPI_GLOBAL_BURST": "100000",
+      "USER_RATE_PER_MINUTE": "1000000",
+      "USER_BURST": "100000",
+      "IP_RATE_PER_MINUTE": "1000000",
+      "IP_BURST": "100000",
+    }
+  )
+  env.update(extra or {})
+  return env
+
+
+def start_mock(stack: ExitStack, port: int, config: Optional[dict[str, Any]] = None) -> str:
+  """Start the mock upstream server and return its base URL."""
+  mock_url = f"http://127.0.0.1:{port}"
+  process = _spawn(
+    [sys.executable, "-m", "uvicorn", "benchmarks.mock_upstreams:app", "--port", str(port), "--log-level", "warning"],
+    dict(os.environ),
+    "mock",
+    stack,
+  )
+  _wait_for(f"{mock_url}/__stats", process)
+  if config:
+    httpx.post(f"{mock_url}/__config", json=config).raise_for_status()
+  return mock_url
+
+
+def start_app(
+  stack: ExitStack,
+  port: int,
+  env: dict[str, str],
+  app_args: Optional[list[str]] = None,
+  *,
+  migrate: bool = True,
+  log_name: str = "app",
+) -> str:
+  """Apply migrations, start the app under uvicorn and wait until it is ready."""
+  app_url = f"http://127.0.0.1:{port}"
+  if migrate:
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True)
+  process = _spawn(
+    [
+      sys.executable, "-m", "uvicorn", "main:app",
+      "--port", str(port), "--log-level", "warning", "--no-access-log",
+      *(app_args or []),
+    ],
+    env,
+    log_name,
+    stack,
+  )
+  _wait_for(f"{app_url}/readyz", process)
+  return app_url
+
+
+async def run_scenario(
+  scenario: Scenario,
+  *,
+  app_url: str,
+  mock_url: str,
+  requests: int,
+  concurrency: int,
+  warmup: int,
+) -> dict[str, Any]:
+  ctx = RunContext(run_id=uuid.uuid4().hex[:8])
+  limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+  async with httpx.AsyncClient(base_url=app_url, timeout=120.0, limits=limits) as client, httpx.AsyncClient(
+    base_url=mock_url
+  ) as mock:
+    if scenario.setup:
+      await scenario.setup(client, -1, ctx)
+    for i in range(warmup):
+      try:
+        await scenario.operation(client, -(i + 2), ctx)
+      except Exception:
+        pass
+    await mock.post("/__reset")
+
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    next_index = 0
+
+    async def worker() -> None:
+      nonlocal next_index
+      while next_index < requests:
+        index = next_index
+        next_index += 1
+        started = time.perf_counter()
+        try:
+          await scenario.operation(client, index, ctx)
+        except Exception as exc:
+          key = str(getattr(exc, "status_code", type(exc).__name__))
+          errors[key] = errors.get(key, 0) + 1
+          continue
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    upstream = (await mock.get("/__stats")).json()
+
+  latencies.sort()
+  calls = upstream.get("calls", {})
+  return {
+    "description": scenario.description,
+    "operations": requests,
+    "succeeded": len(latencies),
+    "errors": errors,
+    "elapsed_seconds": round(elapsed, 3),
+    "throughput_ops_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    "latency_ms": {
+      "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+      "p50": round(percentile(latencies, 0.50) * 1000, 2),
+      "p95": round(percentile(latencies, 0.95) * 1000, 2),
+      "p99": round(percentile(latencies, 0.99) * 1000, 2),
+      "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    },
+    "upstream_calls": calls,
+    "upstream_calls_per_operation": {name: round(count / requests, 3) for name, count in calls.items()},
+    "injected_upstream_errors": upstream.get("injected_errors", {}),
+  }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+  """Print a comparison table and return the names of regressed scenarios."""
+  regressions: list[str] = []
+  print(f"{'scenario':<18}{'ops/s':>10}{'base':>10}{'Δ%':>8}{'p95 ms':>10}{'base':>10}{'Δ%':>8}")
+  for name, current in results["scenarios"].items():
+    base = baseline.get("scenarios", {}).get(name)
+    if not base:
+      continue
+    tput, base_tput = current["throughput_ops_per_second"], base["throughput_ops_per_second"]
+    p95, base_p95 = current["latency_ms"]["p95"], base["latency_ms"]["p95"]
+    tput_delta = (tput - base_tput) / base_tput * 100 if base_tput else 0.0
+    p95_delta = (p95 - base_p95) / base_p95 * 100 if base_p95 else 0.0
+    regressed = tput_delta < -tolerance * 100 or p95_delta > tolerance * 100
+    flag = "  REGRESSION" if regressed else ""
+    print(f"{name:<18}{tput:>10.1f}{base_tput:>10.1f}{tput_delta:>8.1f}{p95:>10.1f}{base_p95:>10.1f}{p95_delta:>8.1f}{flag}")
+    if regressed:
+      regressions.append(name)
+  return regressions
+
+
+def _git_revision() -> Optional[str]:
+  try:
+    return subprocess.run(
+      ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--scenarios", default="all", help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+  parser.add_argument("--requests", type=int, default=200, help="Operations per scenario")
+  parser.add_argument("--concurrency", type=int, default=20)
+  parser.add_argument("--warmup", type=int, default=5)
+  parser.add_argument("--app-port", type=int, default=8901)
+  parser.add_argument("--mock-port", type=int, default=8900)
+  parser.add_argument("--app-url", help="Benchmark an already running app instead of starting one")
+  parser.add_argument("--app-arg", action="append", default=[], help="Extra argument for the app's uvicorn command")
+  parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE environment for the app")
+  parser.add_argument("--mock-config", help='JSON latency/fault settings, e.g. \'{"serpapi": {"latency_ms": 50}}\'')
+  parser.add_argument("--skip-migrations", action="store_true")
+  parser.add_argument("--output", default=str(BACKEND_DIR / "benchmarks" / "results" / "latest.json"))
+  parser.add_argument("--baseline", help="Compare against a previous results file")
+  parser.add_argument("--save-baseline", help="Also write the results to this path")
+  parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%)")
+  parser.add_argument("--fail-on-regression", action="store_true")
+  return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+  args = build_parser().parse_args(argv)
+  names = list(SCENARIOS) if args.scenarios == "all" else [name.strip() for name in args.scenarios.split(",")]
+  unknown = [name for name in names if name not in SCENARIOS]
+  if unknown:
+    raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+  mock_url = f"http://127.0.0.1:{args.mock_port}"
+  app_url = args.app_url or f"http://127.0.0.1:{args.app_port}"
+  extra_env = dict(item.split("=", 1) for item in args.app_env)
+  env = app_environment(mock_url, extra_env)
+
+  with ExitStack() as stack:
+    start_mock(stack, args.mock_port, json.loads(args.mock_config) if args.mock_config else None)
+    if not args.app_url:
+      start_app(stack, args.app_port, env, args.app_arg, migrate=not args.skip_migrations)
+
+    scenario_results: dict[str, Any] = {}
+    for name in names:
+      print(f"running {name} ...", flush=True)
+      scenario_results[name] = asyncio.run(
+        run_scenario(
+          SCENARIOS[name],
+          app_url=app_url,
+          mock_url=mock_url,
+          requests=args.requests,
+          concurrency=args.concurrency,
+          warmup=args.warmup,
+        )
+      )
+    mock_behaviour = httpx.get(f"{mock_url}/__stats").json()["behaviour"]
+
+  results = {
+    "meta": {
+      "timestamp": datetime.now(timezone.utc).isoformat(),
+      "git_revision": _git_revision(),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "requests_per_scenario": args.requests,
+      "concurrency": args.concurrency,
+      "app_args": args.app_arg,
+      "app_env": extra_env,
+      "mock_upstreams": mock_behaviour,
+    },
+    "scenarios": scenario_results,
+  }
+  text = json.dumps(results, indent=2)
+  for path in filter(None, (args.output, args.save_baseline)):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(text + "\n")
+  print(text)
+
+  if args.baseline:
+    regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    if regressions and args.fail_on_regression:
+      return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
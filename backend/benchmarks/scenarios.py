@@ -0,0 +1,132 @@
+"""Scripted request scenarios for the benchmark runner.
+
+Each scenario issues one logical operation per iteration. Saved-jobs CRUD counts a full
+save, list, get and delete cycle as one operation. Every scenario gets a fresh ``run_id``,
+so "cold" scenarios never hit cache rows left by earlier runs.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BENCH_USER = "bench-user"
+USER_HEADERS = {"X-User-Id": BENCH_USER}
+
+
+def fixture_jobs() -> list[dict]:
+  jobs: list[dict] = []
+  for path in sorted(FIXTURES.glob("serpapi_google_jobs_page*.json")):
+    jobs.extend(json.loads(path.read_text())["jobs_results"])
+  return jobs
+
+
+@dataclass
+class RunContext:
+  run_id: str
+  job_ids: list[str] = field(default_factory=lambda: [job["job_id"] for job in fixture_jobs()])
+
+
+Operation = Callable[[httpx.AsyncClient, int, RunContext], Awaitable[None]]
+
+
+class ScenarioError(Exception):
+  """Raised by an operation when the app answers with an unexpected status."""
+
+  def __init__(self, status_code: int) -> None:
+    super().__init__(f"unexpected status {status_code}")
+    self.status_code = status_code
+
+
+def _expect(response: httpx.Response, *statuses: int) -> None:
+  if response.status_code not in (statuses or (200,)):
+    raise ScenarioError(response.status_code)
+
+
+@dataclass
+class Scenario:
+  name: str
+  operation: Operation
+  setup: Optional[Operation] = None
+  description: str = ""
+
+
+async def _cold_search(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  response = await client.get("/jobs/search", params={"q": f"bench cold {ctx.run_id} {i}", "location": "Austin, TX"})
+  _expect(response)
+
+
+async def _warm_cached_search(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  response = await client.get("/jobs/search", params={"q": f"bench cached {ctx.run_id}", "location": "Austin, TX"})
+  _expect(response)
+
+
+async def _deep_pagination(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  response = await client.get(
+    "/jobs/search",
+    params={"q": f"bench deep {ctx.run_id} {i}", "location": "Austin, TX", "page": 5},
+  )
+  _expect(response)
+
+
+async def _detail_lookup(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  response = await client.get(f"/jobs/detail/{ctx.job_ids[i % len(ctx.job_ids)]}")
+  _expect(response, 200, 404)
+
+
+async def _saved_crud(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  job = dict(fixture_jobs()[i % 10])
+  job_id = f"bench-{ctx.run_id}-{i}"
+  listing = {"job_id": job_id, "title": job.get("title"), "company": job.get("company_name"), "location": job.get("location")}
+  _expect(await client.post("/jobs/saved", json={"job": listing}, headers=USER_HEADERS), 201)
+  _expect(await client.get("/jobs/saved", headers=USER_HEADERS))
+  _expect(await client.get(f"/jobs/saved/{job_id}", headers=USER_HEADERS))
+  _expect(await client.delete(f"/jobs/saved/{job_id}", headers=USER_HEADERS), 204)
+
+
+async def _grant_entitlement(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  # The mock Stripe session is paid and owned by BENCH_USER, so confirming it activates Pro.
+  _expect(await client.post("/billing/confirm", json={"session_id": f"cs_test_{ctx.run_id}"}, headers=USER_HEADERS))
+
+
+async def _checkout(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  _expect(await client.post("/billing/checkout", json={"plan": "monthly"}, headers=USER_HEADERS), 201)
+
+
+async def _interview_turn(client: httpx.AsyncClient, i: int, ctx: RunContext) -> None:
+  payload = {
+    "job_description": "Build and operate Python services that power job search for millions of users.",
+    "role": "Backend Engineer",
+    "answer": "I led the rollback, added a canary stage and cut incident time by 40%." if i % 2 else None,
+    "previous_questions": ["Tell me about a production incident."] if i % 2 else [],
+  }
+  _expect(await client.post("/behavioral/assistant/turn", json=payload, headers=USER_HEADERS))
+
+
+SCENARIOS: dict[str, Scenario] = {
+  scenario.name: scenario
+  for scenario in (
+    Scenario("cold_search", _cold_search, description="Unique query per request; one SerpAPI call each."),
+    Scenario(
+      "cached_search",
+      _warm_cached_search,
+      setup=_warm_cached_search,
+      description="Same query after one warm-up request; served from the search cache.",
+    ),
+    Scenario("deep_pagination", _deep_pagination, description="Unique query at page 5; walks five SerpAPI pages."),
+    Scenario("detail_lookup", _detail_lookup, description="Fixture job ids; upstream calls per view are reported."),
+    Scenario("saved_crud", _saved_crud, description="Save, list, get and delete one job per operation."),
+    Scenario("checkout", _checkout, description="Checkout session creation; one Stripe call each."),
+    Scenario(
+      "interview_turns",
+      _interview_turn,
+      setup=_grant_entitlement,
+      description="Behavioral assistant turns (entitlement granted through the mock Stripe confirm flow).",
+    ),
+  )
+}
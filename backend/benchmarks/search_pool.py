@@ -0,0 +1,172 @@
+"""Pool checkout waits under concurrent cold searches against a slow SerpAPI.
+
+Usage (from backend/, with DATABASE_URL pointing at a disposable local Postgres):
+
+  python -m benchmarks.search_pool [--searches 200] [--search-concurrency 40] [--serpapi-latency-ms 2000]
+
+The app is started with a deliberately small pool (``--pool-size``, no overflow) and the mock
+SerpAPI answers slowly. Search clients issue unique cold queries while cheap clients poll
+``/jobs/saved``. The report takes ``db_pool_checkout_wait_seconds`` from ``/metrics`` before
+and after the run, samples ``db_pool_checked_out`` throughout, and gives cheap-route latency.
+Connections are only held around the cache read and write, so checked-out connections should
+stay well under the pool size and checkout waits near zero however slow SerpAPI is. Run the
+same command at an older revision to compare.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks import run
+from benchmarks.scenarios import USER_HEADERS
+
+SLOW_WAIT_SECONDS = 0.01
+
+
+def _scrape(text: str) -> dict[str, float]:
+  wanted = (
+    "db_pool_checkout_wait_seconds_sum",
+    "db_pool_checkout_wait_seconds_count",
+    f'db_pool_checkout_wait_seconds_bucket{{le="{SLOW_WAIT_SECONDS!r}"}}',
+    "db_pool_checked_out",
+  )
+  values: dict[str, float] = {}
+  for line in text.splitlines():
+    name, _, value = line.rpartition(" ")
+    if name in wanted:
+      values[name] = float(value)
+  return values
+
+
+def _checkout_waits(before: dict[str, float], after: dict[str, float]) -> dict[str, Any]:
+  def delta(key: str) -> float:
+    return after.get(key, 0.0) - before.get(key, 0.0)
+
+  count = delta("db_pool_checkout_wait_seconds_count")
+  total = delta("db_pool_checkout_wait_seconds_sum")
+  fast = delta(f'db_pool_checkout_wait_seconds_bucket{{le="{SLOW_WAIT_SECONDS!r}"}}')
+  return {
+    "checkouts": int(count),
+    "total_wait_s": round(total, 3),
+    "mean_wait_ms": round(total / count * 1000, 3) if count else 0.0,
+    f"waits_over_{int(SLOW_WAIT_SECONDS * 1000)}ms": int(count - fast),
+  }
+
+
+async def _search_worker(client: httpx.AsyncClient, queue: asyncio.Queue, run_id: str, statuses: Counter) -> None:
+  while True:
+    try:
+      i = queue.get_nowait()
+    except asyncio.QueueEmpty:
+      return
+    try:
+      response = await client.get("/jobs/search", params={"q": f"bench pool {run_id} {i}", "location": "Austin, TX"})
+      statuses[str(response.status_code)] += 1
+    except httpx.HTTPError as exc:
+      statuses[type(exc).__name__] += 1
+
+
+async def _cheap_worker(client: httpx.AsyncClient, done: asyncio.Event, latencies: list[float], statuses: Counter) -> None:
+  while not done.is_set():
+    started = time.perf_counter()
+    try:
+      response = await client.get("/jobs/saved", headers=USER_HEADERS)
+      statuses[str(response.status_code)] += 1
+    except httpx.HTTPError as exc:
+      statuses[type(exc).__name__] += 1
+    latencies.append(time.perf_counter() - started)
+
+
+async def _sample_checked_out(client: httpx.AsyncClient, done: asyncio.Event, samples: list[float]) -> None:
+  while not done.is_set():
+    samples.append(_scrape((await client.get("/metrics")).text).get("db_pool_checked_out", 0.0))
+    await asyncio.sleep(0.1)
+
+
+async def _measure(app_url: str, args: argparse.Namespace) -> dict[str, Any]:
+  run_id = uuid.uuid4().hex[:8]
+  limits = httpx.Limits(max_connections=args.search_concurrency + args.cheap_concurrency + 1)
+  async with httpx.AsyncClient(base_url=app_url, timeout=120.0, limits=limits) as client:
+    before = _scrape((await client.get("/metrics")).text)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.searches):
+      queue.put_nowait(i)
+
+    done = asyncio.Event()
+    cheap_latencies: list[float] = []
+    cheap_statuses: Counter = Counter()
+    search_statuses: Counter = Counter()
+    checked_out: list[float] = []
+    background = [
+      *(asyncio.create_task(_cheap_worker(client, done, cheap_latencies, cheap_statuses)) for _ in range(args.cheap_concurrency)),
+      asyncio.create_task(_sample_checked_out(client, done, checked_out)),
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(_search_worker(client, queue, run_id, search_statuses) for _ in range(args.search_concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*background)
+    after = _scrape((await client.get("/metrics")).text)
+
+  cheap_latencies.sort()
+  return {
+    "pool_size": args.pool_size,
+    "searches": args.searches,
+    "elapsed_seconds": round(elapsed, 3),
+    "search_statuses": dict(search_statuses),
+    "checkout_waits": _checkout_waits(before, after),
+    "peak_checked_out": int(max(checked_out, default=0)),
+    "cheap_route": {
+      "requests": len(cheap_latencies),
+      "p50_ms": round(run.percentile(cheap_latencies, 0.50) * 1000, 2),
+      "p99_ms": round(run.percentile(cheap_latencies, 0.99) * 1000, 2),
+      "statuses": dict(cheap_statuses),
+    },
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--searches", type=int, default=200)
+  parser.add_argument("--search-concurrency", type=int, default=40)
+  parser.add_argument("--cheap-concurrency", type=int, default=4)
+  parser.add_argument("--serpapi-latency-ms", type=float, default=2000.0)
+  parser.add_argument("--pool-size", type=int, default=5)
+  parser.add_argument("--app-port", type=int, default=8901)
+  parser.add_argument("--mock-port", type=int, default=8900)
+  parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE environment for the app")
+  parser.add_argument("--skip-migrations", action="store_true")
+  parser.add_argument("--output", default=str(run.BACKEND_DIR / "benchmarks" / "results" / "search_pool.json"))
+  args = parser.parse_args()
+
+  env_overrides = {
+    "DB_POOL_SIZE": str(args.pool_size),
+    "DB_MAX_OVERFLOW": "0",
+    # Keep search admission from masking the pool: every cold search goes upstream.
+    "SEARCH_ADMISSION_MAX_CONCURRENT": str(args.search_concurrency),
+    **dict(item.split("=", 1) for item in args.app_env),
+  }
+  with ExitStack() as stack:
+    mock_url = run.start_mock(stack, args.mock_port, {"serpapi": {"latency_ms": args.serpapi_latency_ms}})
+    env = run.app_environment(mock_url, env_overrides)
+    app_url = run.start_app(stack, args.app_port, env, migrate=not args.skip_migrations)
+    results = asyncio.run(_measure(app_url, args))
+
+  text = json.dumps(results, indent=2)
+  Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+  Path(args.output).write_text(text + "\n")
+  print(text)
+
+
+if __name__ == "__main__":
+  main()
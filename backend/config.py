@@ -0,0 +1,109 @@
+"""Application settings, read from the environment (and ``.env``) exactly once.
+
+Credentials and endpoints live on ``Settings`` (``get_settings()``). Modules keep their own
+tuning knobs as module constants but read them through ``env_int``/``env_float``/``env_bool``,
+which share the same one-time ``.env`` load.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+
+
+@lru_cache
+def load_environment() -> None:
+  """Merge ``.env`` into ``os.environ`` once per process; real environment variables win."""
+  load_dotenv()
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+  load_environment()
+  return os.getenv(name, default)
+
+
+def env_int(name: str, default: int) -> int:
+  try:
+    return int(env_str(name, str(default)))
+  except (TypeError, ValueError):
+    return default
+
+
+def env_float(name: str, default: float) -> float:
+  try:
+    return float(env_str(name, str(default)))
+  except (TypeError, ValueError):
+    return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+  value = env_str(name)
+  if value is None:
+    return default
+  return value.strip().lower() not in {"0", "false", "no", "off", ""}
+
+
+def _database_url() -> str:
+  url = env_str("DATABASE_URL")
+  if url:
+    return url
+  password = env_str("POSTGRES_PASSWORD")
+  password_section = f":{quote_plus(password)}" if password else ""
+  return (
+    f"postgresql+asyncpg://{env_str('POSTGRES_USER')}{password_section}"
+    f"@{env_str('POSTGRES_HOST')}:{env_str('POSTGRES_PORT')}/{env_str('POSTGRES_DBNAME')}"
+  )
+
+
+@dataclass(frozen=True)
+class Settings:
+  database_url: str
+  database_replica_url: Optional[str] = None
+  openai_api_key: Optional[str] = None
+  openai_base_url: Optional[str] = None
+  serpapi_api_key: Optional[str] = None
+  serpapi_url: str = "https://serpapi.com/search.json"
+  stripe_secret_key: Optional[str] = None
+  stripe_api_base: Optional[str] = None
+  stripe_webhook_secret: Optional[str] = None
+  stripe_success_url: Optional[str] = None
+  stripe_cancel_url: Optional[str] = None
+  stripe_price_id: Optional[str] = None
+  stripe_plan_price_ids: dict[str, Optional[str]] = field(default_factory=dict)
+  admin_token: Optional[str] = None
+  trace_exporter: str = "none"
+  trace_file: str = "traces.jsonl"
+
+  @classmethod
+  def from_env(cls) -> "Settings":
+    return cls(
+      database_url=_database_url(),
+      database_replica_url=env_str("DATABASE_REPLICA_URL") or None,
+      openai_api_key=env_str("OPENAI_API_KEY"),
+      openai_base_url=env_str("OPENAI_BASE_URL"),
+      serpapi_api_key=env_str("SERPAPI_API_KEY"),
+      serpapi_url=env_str("SERPAPI_URL", cls.serpapi_url),
+      stripe_secret_key=env_str("STRIPE_SECRET_KEY"),
+      stripe_api_base=env_str("STRIPE_API_BASE"),
+      stripe_webhook_secret=env_str("STRIPE_WEBHOOK_SECRET"),
+      stripe_success_url=env_str("STRIPE_SUCCESS_URL"),
+      stripe_cancel_url=env_str("STRIPE_CANCEL_URL"),
+      stripe_price_id=env_str("STRIPE_PRICE_ID"),
+      stripe_plan_price_ids={
+        "monthly": env_str("STRIPE_MONTHLY_PRICE_ID"),
+        "lifetime": env_str("STRIPE_LIFETIME_PRICE_ID"),
+      },
+      admin_token=env_str("ADMIN_TOKEN"),
+      trace_exporter=env_str("TRACE_EXPORTER", cls.trace_exporter),
+      trace_file=env_str("TRACE_FILE", cls.trace_file),
+    )
+
+
+@lru_cache
+def get_settings() -> Settings:
+  return Settings.from_env()
@@ -0,0 +1,28 @@
+"""Execution helpers for hot read paths that skip ORM entity loading.
+
+Statements passed here are Core ``select``/``insert``/``delete`` constructs built once at
+import time with ``bindparam`` placeholders. They run on the session's connection rather
+than through ``Session.execute``, so there is no ORM compile step, identity map or attribute
+instrumentation. Because the statement object is the same each call, SQLAlchemy's compiled
+cache always hits and the asyncpg dialect reuses its prepared statement. Results come back
+as ``Row`` tuples with attribute access (``row.job_data``), which is all the callers read.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import Executable, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def fetch_one(session: AsyncSession, stmt: Executable, params: dict[str, Any]) -> Optional[Row]:
+  connection = await session.connection()
+  result = await connection.execute(stmt, params)
+  return result.first()
+
+
+async def fetch_all(session: AsyncSession, stmt: Executable, params: dict[str, Any]) -> list[Row]:
+  connection = await session.connection()
+  result = await connection.execute(stmt, params)
+  return list(result.all())
@@ -1,51 +1,185 @@
-import os
-from typing import AsyncGenerator
-from urllib.parse import quote_plus
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncGenerator, AsyncIterator, Optional
 
-from dotenv import load_dotenv
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-load_dotenv()
-
-def _get_int(name: str, default: int) -> int:
-  try:
-    return int(os.getenv(name, str(default)))
-  except (TypeError, ValueError):
-    return default
-
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-  db_user = os.getenv("POSTGRES_USER")
-  db_password = os.getenv("POSTGRES_PASSWORD")
-  db_host = os.getenv("POSTGRES_HOST")
-  db_port = os.getenv("POSTGRES_PORT")
-  db_name = os.getenv("POSTGRES_DBNAME")
-  password_section = f":{quote_plus(db_password)}" if db_password else ""
-  DATABASE_URL = f"postgresql+asyncpg://{db_user}{password_section}@{db_host}:{db_port}/{db_name}"
-
-POOL_SIZE = _get_int("DB_POOL_SIZE", 5)
-MAX_OVERFLOW = _get_int("DB_MAX_OVERFLOW", 10)
-
-engine: AsyncEngine = create_async_engine(
-  DATABASE_URL,
-  pool_size=POOL_SIZE,
-  max_overflow=MAX_OVERFLOW,
-  pool_pre_ping=True,
+from config import env_int, get_settings
+from db.routing import replica_eligible
+from services.metrics import DB_POOL_CHECKOUT_WAIT, DB_STATEMENT_ROUTES, register_callback_gauge
+
+DATABASE_URL = get_settings().database_url
+# Optional streaming replica; when set, ``@replica_read`` repository calls run there (see db.routing).
+DATABASE_REPLICA_URL = get_settings().database_replica_url
+
+
+def pool_limits(
+  pool_size: int,
+  max_overflow: int,
+  connection_budget: int,
+  processes: int,
+  reserved: int = 0,
+) -> tuple[int, int]:
+  """Split a server's total connection budget across the processes that connect to it.
+
+  Each process may open at most ``connection_budget // processes`` connections. ``reserved``
+  of those are kept for connections outside the pool, and pool plus overflow get the rest,
+  so N processes together stay under Postgres ``max_connections``. Every process keeps at
+  least one pooled connection. A budget of 0 keeps the configured per-process values.
+  """
+  if connection_budget <= 0:
+    return pool_size, max_overflow
+  per_process = max(1, connection_budget // max(1, processes) - reserved)
+  size = max(1, min(pool_size, per_process))
+  return size, max(0, min(max_overflow, per_process - size))
+
+
+WEB_CONCURRENCY = max(1, env_int("WEB_CONCURRENCY", 1))
+# Standalone ``generation_worker`` processes connect with the same settings and share the budget.
+WORKER_PROCESSES = max(0, env_int("DB_WORKER_PROCESSES", 0))
+DB_PROCESSES = WEB_CONCURRENCY + WORKER_PROCESSES
+CONNECTION_BUDGET = env_int("DB_MAX_CONNECTIONS_BUDGET", 0)
+# Per process, outside the pool: one health probe plus the advisory locks held by the cache
+# warmer and the saved job refresher, all on the unpooled ``probe_engine``. The generation and
+# webhook workers draw from the pool itself.
+UNPOOLED_CONNECTIONS = 3
+POOL_SIZE, MAX_OVERFLOW = pool_limits(
+  env_int("DB_POOL_SIZE", 5),
+  env_int("DB_MAX_OVERFLOW", 10),
+  CONNECTION_BUDGET,
+  DB_PROCESSES,
+  reserved=UNPOOLED_CONNECTIONS,
+)
+# The replica is a separate server with its own max_connections; only the replica pools of
+# the same processes connect to it.
+REPLICA_CONNECTION_BUDGET = env_int("DB_REPLICA_MAX_CONNECTIONS_BUDGET", CONNECTION_BUDGET)
+REPLICA_POOL_SIZE, REPLICA_MAX_OVERFLOW = pool_limits(
+  env_int("DB_POOL_SIZE", 5),
+  env_int("DB_MAX_OVERFLOW", 10),
+  REPLICA_CONNECTION_BUDGET,
+  DB_PROCESSES,
+)
+POOL_TIMEOUT = env_int("DB_POOL_TIMEOUT_SECONDS", 30)
+POOL_RECYCLE = env_int("DB_POOL_RECYCLE_SECONDS", 1800)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+  """Queue pool that records how long each checkout waits for a connection."""
+
+  def _do_get(self):
+    started = time.perf_counter()
+    try:
+      return super()._do_get()
+    finally:
+      DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def _pooled_engine(url: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+  return create_async_engine(
+    url,
+    poolclass=InstrumentedQueuePool,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_timeout=POOL_TIMEOUT,
+    pool_recycle=POOL_RECYCLE,
+    pool_pre_ping=True,
+  )
+
+
+engine: AsyncEngine = _pooled_engine(DATABASE_URL, POOL_SIZE, MAX_OVERFLOW)
+replica_engine: Optional[AsyncEngine] = (
+  _pooled_engine(DATABASE_REPLICA_URL, REPLICA_POOL_SIZE, REPLICA_MAX_OVERFLOW) if DATABASE_REPLICA_URL else None
 )
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+_USED_PRIMARY = "db_used_primary"
+
+
+class RoutingSession(Session):
+  """Bind ``@replica_read`` statements to the replica and everything else to the primary.
+
+  A session sticks to the primary once it has used it, and flushes always go there.
+  """
+
+  def get_bind(self, mapper=None, clause=None, **kw):
+    if not self.info.get(_USED_PRIMARY) and not self._flushing and replica_eligible():
+      DB_STATEMENT_ROUTES.inc(("replica",))
+      return replica_engine.sync_engine
+    self.info[_USED_PRIMARY] = True
+    DB_STATEMENT_ROUTES.inc(("primary",))
+    return engine.sync_engine
+
+
+if replica_engine is None:
+  SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+else:
+  SessionLocal = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=RoutingSession)
+# Health probes connect through their own unpooled engine so they never wait behind (or
+# take a slot from) request traffic when the main pool is saturated.
+probe_engine: AsyncEngine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+
+register_callback_gauge("db_pool_size", "Configured persistent connections in the pool.", lambda: engine.pool.size())
+register_callback_gauge("db_pool_checked_out", "Connections currently checked out of the pool.", lambda: engine.pool.checkedout())
+register_callback_gauge("db_pool_overflow", "Overflow connections currently open beyond pool_size.", lambda: max(0, engine.pool.overflow()))
+if replica_engine is not None:
+  register_callback_gauge(
+    "db_replica_pool_checked_out", "Replica connections currently checked out of the pool.", lambda: replica_engine.pool.checkedout()
+  )
+
+
+def pool_saturation() -> float:
+  """Share of this worker's connection capacity (pool_size + max_overflow) checked out."""
+  return engine.pool.checkedout() / max(1, POOL_SIZE + MAX_OVERFLOW)
 
 
 async def init_db() -> None:
-  """Verify database connectivity during application startup."""
+  """Verify database connectivity (primary and, when configured, replica) during application startup."""
   async with engine.connect() as conn:
     await conn.execute(text("SELECT 1"))
+  if replica_engine is not None:
+    async with replica_engine.connect() as conn:
+      await conn.execute(text("SELECT 1"))
+
+
+async def ping_database(timeout: float) -> None:
+  """Run ``SELECT 1`` over a fresh, unpooled connection."""
+
+  async def _ping() -> None:
+    async with probe_engine.connect() as conn:
+      await conn.execute(text("SELECT 1"))
+
+  await asyncio.wait_for(_ping(), timeout=timeout)
+
+
+@asynccontextmanager
+async def advisory_lock(lock_id: int) -> AsyncIterator[bool]:
+  """Hold a session-level ``pg_try_advisory_lock`` for the block; yields False if another process has it.
+
+  The lock lives on an unpooled connection, so long-running holders (background jobs doing
+  upstream I/O) never occupy a request pool slot or sit idle in a transaction.
+  """
+  async with probe_engine.connect() as conn:
+    acquired = bool(await conn.scalar(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": lock_id}))
+    await conn.commit()
+    try:
+      yield acquired
+    finally:
+      if acquired:
+        # Closing the connection releases the lock too, so a failed unlock is harmless.
+        with suppress(Exception):
+          await conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": lock_id})
+          await conn.commit()
 
 
 async def dispose_db() -> None:
   """Close the connection pool gracefully on shutdown."""
   await engine.dispose()
+  if replica_engine is not None:
+    await replica_engine.dispose()
+  await probe_engine.dispose()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
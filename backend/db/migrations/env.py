@@ -1,22 +1,19 @@
 from __future__ import annotations
 
 import asyncio
-import os
 from logging.config import fileConfig
 
 from alembic import context
-from dotenv import load_dotenv
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
+from config import env_str
 from db.base import Base
 from db import models  # noqa: F401
 
-load_dotenv()
-
 config = context.config
-database_url = os.getenv("DATABASE_URL")
+database_url = env_str("DATABASE_URL")
 if not database_url:
   raise RuntimeError("DATABASE_URL environment variable is required for migrations.")
 config.set_main_option("sqlalchemy.url", database_url)
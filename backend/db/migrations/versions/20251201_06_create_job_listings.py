@@ -0,0 +1,42 @@
+"""create job_listings table
+
+Revision ID: 20251201_06
+Revises: 20251123_05
+Create Date: 2025-12-01 10:15:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20251201_06"
+down_revision = "20251123_05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "job_listings",
+    sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+    sa.Column("job_id", sa.String(length=512), nullable=False),
+    sa.Column("htidocid", sa.String(length=255), nullable=True),
+    sa.Column("job_data", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    sa.Column(
+      "updated_at",
+      sa.DateTime(timezone=True),
+      nullable=False,
+      server_default=sa.func.now(),
+      server_onupdate=sa.func.now(),
+    ),
+  )
+  op.create_index("ix_job_listings_job_id", "job_listings", ["job_id"], unique=True)
+  op.create_index("ix_job_listings_htidocid", "job_listings", ["htidocid"])
+
+
+def downgrade() -> None:
+  op.drop_index("ix_job_listings_htidocid", table_name="job_listings")
+  op.drop_index("ix_job_listings_job_id", table_name="job_listings")
+  op.drop_table("job_listings")
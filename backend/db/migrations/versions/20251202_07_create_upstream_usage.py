@@ -0,0 +1,36 @@
+"""create upstream_usage table
+
+Revision ID: 20251202_07
+Revises: 20251201_06
+Create Date: 2025-12-02 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251202_07"
+down_revision = "20251201_06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "upstream_usage",
+    sa.Column("provider", sa.String(length=32), nullable=False),
+    sa.Column("usage_date", sa.Date(), nullable=False),
+    sa.Column("request_count", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column(
+      "updated_at",
+      sa.DateTime(timezone=True),
+      nullable=False,
+      server_default=sa.func.now(),
+      server_onupdate=sa.func.now(),
+    ),
+    sa.PrimaryKeyConstraint("provider", "usage_date", name="pk_upstream_usage"),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("upstream_usage")
@@ -0,0 +1,42 @@
+"""create stripe_webhook_events table and track the last applied event time
+
+Revision ID: 20251203_08
+Revises: 20251202_07
+Create Date: 2025-12-03 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20251203_08"
+down_revision = "20251202_07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "stripe_webhook_events",
+    sa.Column("event_id", sa.String(length=255), primary_key=True, nullable=False),
+    sa.Column("event_type", sa.String(length=64), nullable=False),
+    sa.Column("ordering_key", sa.String(length=191), nullable=True),
+    sa.Column("stripe_created_at", sa.DateTime(timezone=True), nullable=False),
+    sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+    sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("last_error", sa.Text(), nullable=True),
+    sa.Column("received_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+  )
+  op.create_index("ix_stripe_webhook_events_pending", "stripe_webhook_events", ["status", "stripe_created_at"])
+  op.create_index("ix_stripe_webhook_events_ordering_key", "stripe_webhook_events", ["ordering_key"])
+  op.add_column("user_subscriptions", sa.Column("last_event_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+  op.drop_column("user_subscriptions", "last_event_at")
+  op.drop_index("ix_stripe_webhook_events_ordering_key", table_name="stripe_webhook_events")
+  op.drop_index("ix_stripe_webhook_events_pending", table_name="stripe_webhook_events")
+  op.drop_table("stripe_webhook_events")
@@ -0,0 +1,36 @@
+"""create search_popularity table
+
+Revision ID: 20251204_09
+Revises: 20251203_08
+Create Date: 2025-12-04 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20251204_09"
+down_revision = "20251203_08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "search_popularity",
+    sa.Column("key_hash", sa.String(length=64), primary_key=True, nullable=False),
+    sa.Column("query", sa.String(length=255), nullable=False),
+    sa.Column("location", sa.String(length=255), nullable=False),
+    sa.Column("page", sa.Integer(), nullable=False, server_default="1"),
+    sa.Column("employment_type", sa.String(length=64), nullable=True),
+    sa.Column("role_filters", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'[]'::jsonb")),
+    sa.Column("seniority_filters", postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default=sa.text("'[]'::jsonb")),
+    sa.Column("score", sa.Float(), nullable=False, server_default="0"),
+    sa.Column("scored_at", sa.DateTime(timezone=True), nullable=False),
+    sa.Column("last_warmed_at", sa.DateTime(timezone=True), nullable=True),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("search_popularity")
@@ -0,0 +1,45 @@
+"""create generation_jobs table
+
+Revision ID: 20251205_10
+Revises: 20251204_09
+Create Date: 2025-12-05 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20251205_10"
+down_revision = "20251204_09"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "generation_jobs",
+    sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+    sa.Column("kind", sa.String(length=32), nullable=False),
+    sa.Column("user_id", sa.String(length=191), nullable=True),
+    sa.Column("idempotency_key", sa.String(length=255), nullable=True),
+    sa.Column("status", sa.String(length=16), nullable=False, server_default="queued"),
+    sa.Column("request", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column("result", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column("last_error", sa.Text(), nullable=True),
+    sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+    sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    sa.UniqueConstraint("idempotency_key", name="uq_generation_jobs_idempotency_key"),
+  )
+  op.create_index("ix_generation_jobs_claimable", "generation_jobs", ["status", "available_at"])
+  op.create_index("ix_generation_jobs_user_id", "generation_jobs", ["user_id"])
+
+
+def downgrade() -> None:
+  op.drop_index("ix_generation_jobs_user_id", table_name="generation_jobs")
+  op.drop_index("ix_generation_jobs_claimable", table_name="generation_jobs")
+  op.drop_table("generation_jobs")
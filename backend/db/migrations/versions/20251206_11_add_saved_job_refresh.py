@@ -0,0 +1,29 @@
+"""track background refreshes and expiry of saved jobs
+
+Revision ID: 20251206_11
+Revises: 20251205_10
+Create Date: 2025-12-06 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251206_11"
+down_revision = "20251205_10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.add_column("saved_jobs", sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=True))
+  op.add_column("saved_jobs", sa.Column("expired", sa.Boolean(), nullable=False, server_default=sa.false()))
+  op.create_index("ix_saved_jobs_refresh", "saved_jobs", ["expired", "refreshed_at"])
+  op.create_index("ix_saved_jobs_htidocid", "saved_jobs", [sa.text("(job_data ->> 'htidocid')")])
+
+
+def downgrade() -> None:
+  op.drop_index("ix_saved_jobs_htidocid", table_name="saved_jobs")
+  op.drop_index("ix_saved_jobs_refresh", table_name="saved_jobs")
+  op.drop_column("saved_jobs", "expired")
+  op.drop_column("saved_jobs", "refreshed_at")
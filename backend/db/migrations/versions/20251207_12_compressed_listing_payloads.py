@@ -0,0 +1,195 @@
+"""summary projections and optional zstd storage for listing payloads
+
+Revision ID: 20251207_12
+Revises: 20251206_11
+Create Date: 2025-12-07 10:00:00.000000
+
+Adds ``summary_payload`` / ``job_summary`` (summary view fields only) and the nullable
+``payload_zstd`` / ``job_data_zstd`` blobs, and replaces the ``job_data ->> 'htidocid'``
+expression index with a real ``saved_jobs.htidocid`` column. Projections are backfilled in
+SQL. When ``PAYLOAD_COMPRESSION`` is on and ``zstandard`` is installed, a dictionary is
+trained on the stored listings and existing payloads are converted in batches; run
+``VACUUM FULL`` (or pg_repack) on both tables afterwards to hand the freed TOAST space back.
+Downgrade converts compressed rows back to JSONB.
+"""
+
+import json
+import os
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+
+revision = "20251207_12"
+down_revision = "20251206_11"
+branch_labels = None
+depends_on = None
+
+# Snapshot of services.listing_views.SUMMARY_FIELDS when this revision was written.
+SUMMARY_FIELDS = ("job_id", "title", "company", "location", "posted_at", "salary")
+BATCH_SIZE = 500
+TRAINING_SAMPLES = 5000
+MIN_TRAINING_SAMPLES = 100
+
+# (table, JSONB column, zstd column)
+PAYLOAD_COLUMNS = (("saved_jobs", "job_data", "job_data_zstd"), ("job_searches", "response_payload", "payload_zstd"))
+
+
+def _summary_sql(listing: str, job_id: str) -> str:
+  pairs = ", ".join(f"'{field}', {listing} -> '{field}'" for field in SUMMARY_FIELDS if field != "job_id")
+  return f"jsonb_build_object('job_id', {job_id}, {pairs})"
+
+
+def _compression_enabled() -> bool:
+  value = os.getenv("PAYLOAD_COMPRESSION", "")
+  return zstandard is not None and value.strip().lower() not in {"0", "false", "no", "off", ""}
+
+
+def _encode(payload) -> bytes:
+  return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _training_samples(bind) -> list[bytes]:
+  saved = sa.text("SELECT job_data FROM saved_jobs ORDER BY updated_at DESC LIMIT :limit").columns(
+    job_data=postgresql.JSONB
+  )
+  samples = [_encode(job_data) for job_data in bind.execute(saved, {"limit": TRAINING_SAMPLES // 2}).scalars()]
+  listings = sa.text(
+    "SELECT listing FROM (SELECT response_payload FROM job_searches ORDER BY created_at DESC LIMIT :limit) AS recent, "
+    "jsonb_array_elements(CASE WHEN jsonb_typeof(response_payload -> 'jobs') = 'array' "
+    "THEN response_payload -> 'jobs' ELSE '[]'::jsonb END) AS listing LIMIT :limit"
+  ).columns(listing=postgresql.JSONB)
+  samples.extend(_encode(listing) for listing in bind.execute(listings, {"limit": TRAINING_SAMPLES - len(samples)}).scalars())
+  return samples
+
+
+def _compressor(bind):
+  samples = _training_samples(bind)
+  if len(samples) >= MIN_TRAINING_SAMPLES:
+    try:
+      dictionary = zstandard.train_dictionary(64 * 1024, samples, level=6)
+    except zstandard.ZstdError:
+      dictionary = None
+    if dictionary is not None:
+      bind.execute(
+        sa.text("INSERT INTO payload_dictionaries (dict_id, data, sample_count) VALUES (:dict_id, :data, :samples)"),
+        {"dict_id": dictionary.dict_id(), "data": dictionary.as_bytes(), "samples": len(samples)},
+      )
+      return zstandard.ZstdCompressor(level=6, dict_data=dictionary)
+  return zstandard.ZstdCompressor(level=6)
+
+
+def _compress_rows(bind, table: str, json_column: str, blob_column: str, compressor) -> None:
+  select = sa.text(
+    f"SELECT id, {json_column} FROM {table} WHERE {json_column} IS NOT NULL AND id > :after ORDER BY id LIMIT :batch"
+  ).columns(**{json_column: postgresql.JSONB})
+  update = sa.text(f"UPDATE {table} SET {blob_column} = :blob, {json_column} = NULL WHERE id = :id")
+  after = uuid.UUID(int=0)
+  while True:
+    rows = bind.execute(select, {"after": after, "batch": BATCH_SIZE}).all()
+    if not rows:
+      return
+    bind.execute(update, [{"id": row_id, "blob": compressor.compress(_encode(payload))} for row_id, payload in rows])
+    after = rows[-1][0]
+
+
+def _decompress_rows(bind, table: str, json_column: str, blob_column: str) -> None:
+  if bind.execute(sa.text(f"SELECT 1 FROM {table} WHERE {blob_column} IS NOT NULL LIMIT 1")).first() is None:
+    return
+  if zstandard is None:
+    raise RuntimeError(f"zstandard is required to convert compressed {table} rows back to JSONB.")
+  decompressors = {
+    dict_id: zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(data))
+    for dict_id, data in bind.execute(sa.text("SELECT dict_id, data FROM payload_dictionaries"))
+  }
+  decompressors[0] = zstandard.ZstdDecompressor()
+  # Refreshed saved jobs share one frame per posting; the row's own job_id goes back into the payload.
+  job_id = "job_id" if table == "saved_jobs" else "NULL"
+  select = sa.text(
+    f"SELECT id, {job_id} AS job_id, {blob_column} FROM {table} WHERE {blob_column} IS NOT NULL ORDER BY id LIMIT :batch"
+  )
+  update = sa.text(f"UPDATE {table} SET {json_column} = :payload, {blob_column} = NULL WHERE id = :id").bindparams(
+    sa.bindparam("payload", type_=postgresql.JSONB)
+  )
+  while True:
+    rows = bind.execute(select, {"batch": BATCH_SIZE}).all()
+    if not rows:
+      return
+    params = []
+    for row_id, row_job_id, blob in rows:
+      payload = json.loads(decompressors[zstandard.get_frame_parameters(blob).dict_id].decompress(blob))
+      if row_job_id is not None:
+        payload["job_id"] = row_job_id
+      params.append({"id": row_id, "payload": payload})
+    bind.execute(update, params)
+
+
+def upgrade() -> None:
+  op.create_table(
+    "payload_dictionaries",
+    sa.Column("dict_id", sa.BigInteger(), primary_key=True, autoincrement=False, nullable=False),
+    sa.Column("data", sa.LargeBinary(), nullable=False),
+    sa.Column("sample_count", sa.Integer(), nullable=False),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+  )
+
+  op.alter_column("job_searches", "response_payload", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=True)
+  op.add_column("job_searches", sa.Column("payload_zstd", sa.LargeBinary(), nullable=True))
+  op.add_column("job_searches", sa.Column("summary_payload", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+  listing_summary = _summary_sql("listing", "listing -> 'job_id'")
+  op.execute(
+    "UPDATE job_searches SET summary_payload = (response_payload - 'jobs') || jsonb_build_object('jobs', COALESCE(("
+    f"SELECT jsonb_agg({listing_summary} ORDER BY position) "
+    "FROM jsonb_array_elements(CASE WHEN jsonb_typeof(response_payload -> 'jobs') = 'array' "
+    "THEN response_payload -> 'jobs' ELSE '[]'::jsonb END) WITH ORDINALITY AS listings(listing, position)"
+    "), '[]'::jsonb))"
+  )
+  op.alter_column("job_searches", "summary_payload", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+  op.create_check_constraint(
+    "ck_job_searches_payload", "job_searches", "response_payload IS NOT NULL OR payload_zstd IS NOT NULL"
+  )
+
+  op.alter_column("saved_jobs", "job_data", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=True)
+  op.add_column("saved_jobs", sa.Column("job_data_zstd", sa.LargeBinary(), nullable=True))
+  op.add_column("saved_jobs", sa.Column("job_summary", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+  op.add_column("saved_jobs", sa.Column("htidocid", sa.String(length=255), nullable=True))
+  job_summary = _summary_sql("job_data", "COALESCE(job_data -> 'job_id', to_jsonb(job_id))")
+  op.execute(f"UPDATE saved_jobs SET job_summary = {job_summary}, htidocid = job_data ->> 'htidocid'")
+  op.alter_column("saved_jobs", "job_summary", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+  op.drop_index("ix_saved_jobs_htidocid", table_name="saved_jobs")
+  op.create_index("ix_saved_jobs_htidocid", "saved_jobs", ["htidocid"])
+  op.create_check_constraint("ck_saved_jobs_job_data", "saved_jobs", "job_data IS NOT NULL OR job_data_zstd IS NOT NULL")
+
+  if _compression_enabled():
+    bind = op.get_bind()
+    compressor = _compressor(bind)
+    for table, json_column, blob_column in PAYLOAD_COLUMNS:
+      _compress_rows(bind, table, json_column, blob_column, compressor)
+
+
+def downgrade() -> None:
+  bind = op.get_bind()
+  for table, json_column, blob_column in PAYLOAD_COLUMNS:
+    _decompress_rows(bind, table, json_column, blob_column)
+
+  op.drop_constraint("ck_saved_jobs_job_data", "saved_jobs", type_="check")
+  op.drop_index("ix_saved_jobs_htidocid", table_name="saved_jobs")
+  op.create_index("ix_saved_jobs_htidocid", "saved_jobs", [sa.text("(job_data ->> 'htidocid')")])
+  op.drop_column("saved_jobs", "htidocid")
+  op.drop_column("saved_jobs", "job_summary")
+  op.drop_column("saved_jobs", "job_data_zstd")
+  op.alter_column("saved_jobs", "job_data", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+
+  op.drop_constraint("ck_job_searches_payload", "job_searches", type_="check")
+  op.drop_column("job_searches", "summary_payload")
+  op.drop_column("job_searches", "payload_zstd")
+  op.alter_column("job_searches", "response_payload", existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+
+  op.drop_table("payload_dictionaries")
@@ -0,0 +1,26 @@
+"""back off between retries of failed Stripe webhook events
+
+Revision ID: 20251208_13
+Revises: 20251207_12
+Create Date: 2025-12-08 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251208_13"
+down_revision = "20251207_12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+  op.add_column(
+    "stripe_webhook_events",
+    sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+  )
+
+
+def downgrade() -> None:
+  op.drop_column("stripe_webhook_events", "next_attempt_at")
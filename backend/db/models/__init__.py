@@ -1,5 +1,21 @@
+from .generation_job import GenerationJob
+from .job_listing import CachedJobListing
 from .job_search import JobSearch
+from .payload_dictionary import PayloadDictionary
 from .saved_job import SavedJob
+from .search_popularity import SearchPopularity
+from .stripe_webhook_event import StripeWebhookEvent
+from .upstream_usage import UpstreamUsage
 from .user_subscription import UserSubscription
 
-__all__ = ["JobSearch", "SavedJob", "UserSubscription"]
+__all__ = [
+  "CachedJobListing",
+  "GenerationJob",
+  "JobSearch",
+  "PayloadDictionary",
+  "SavedJob",
+  "SearchPopularity",
+  "StripeWebhookEvent",
+  "UpstreamUsage",
+  "UserSubscription",
+]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class GenerationJob(Base):
+  """Queued LLM generation; the worker stores the result on the row so it can be fetched again."""
+
+  __tablename__ = "generation_jobs"
+  __table_args__ = (
+    Index("ix_generation_jobs_claimable", "status", "available_at"),
+    UniqueConstraint("idempotency_key", name="uq_generation_jobs_idempotency_key"),
+  )
+
+  id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+  kind: Mapped[str] = mapped_column(String(32), nullable=False)
+  user_id: Mapped[Optional[str]] = mapped_column(String(191), nullable=True, index=True)
+  # "<user or anon>:<Idempotency-Key>", so a resubmitted request returns the original job.
+  idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+  status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+  request: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+  result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+  last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+  attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+  available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  # A running job whose lease has passed belonged to a worker that died; it is claimed again.
+  lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+  finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
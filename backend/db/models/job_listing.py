@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class CachedJobListing(Base):
+  """Resolved job listing keyed by job_id; rows without job_data record a failed lookup."""
+
+  __tablename__ = "job_listings"
+
+  id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+  job_id: Mapped[str] = mapped_column(String(512), unique=True, index=True)
+  htidocid: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+  job_data: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  updated_at: Mapped[datetime] = mapped_column(
+    DateTime(timezone=True),
+    server_default=func.now(),
+    onupdate=func.now(),
+    nullable=False,
+  )
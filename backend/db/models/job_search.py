@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Any, List, Optional
 
-from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy import CheckConstraint, DateTime, Integer, LargeBinary, String, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -13,6 +13,9 @@ from db.base import Base
 
 class JobSearch(Base):
   __tablename__ = "job_searches"
+  __table_args__ = (
+    CheckConstraint("response_payload IS NOT NULL OR payload_zstd IS NOT NULL", name="ck_job_searches_payload"),
+  )
 
   id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
   query: Mapped[str] = mapped_column(String(255), index=True)
@@ -21,5 +24,9 @@ class JobSearch(Base):
   employment_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
   role_filters: Mapped[List[str]] = mapped_column(JSONB, default=list)
   seniority_filters: Mapped[List[str]] = mapped_column(JSONB, default=list)
-  response_payload: Mapped[dict[str, Any]] = mapped_column(JSONB)
+  # The payload is stored either as JSONB or, with PAYLOAD_COMPRESSION on, as a zstd frame.
+  response_payload: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB(none_as_null=True), nullable=True)
+  payload_zstd: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+  # The payload with listings cut down to the summary view fields; list reads never touch the full payload.
+  summary_payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
   created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, LargeBinary, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class PayloadDictionary(Base):
+  """Trained zstd dictionary for compressed listing payloads, keyed by the id zstd writes into each frame.
+
+  Rows are never deleted: every stored frame names the dictionary it needs.
+  """
+
+  __tablename__ = "payload_dictionaries"
+
+  dict_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+  data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+  sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import DateTime, String, UniqueConstraint, func
+from sqlalchemy import Boolean, CheckConstraint, DateTime, Index, LargeBinary, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,12 +15,20 @@ class SavedJob(Base):
   __tablename__ = "saved_jobs"
   __table_args__ = (
     UniqueConstraint("user_id", "job_id", name="uq_saved_jobs_user_job"),
+    Index("ix_saved_jobs_refresh", "expired", "refreshed_at"),
+    CheckConstraint("job_data IS NOT NULL OR job_data_zstd IS NOT NULL", name="ck_saved_jobs_job_data"),
   )
 
   id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
   user_id: Mapped[str] = mapped_column(String(191), index=True)
   job_id: Mapped[str] = mapped_column(String(512), index=True)
-  job_data: Mapped[dict] = mapped_column(JSONB)
+  # The listing is stored either as JSONB or, with PAYLOAD_COMPRESSION on, as a zstd frame.
+  job_data: Mapped[Optional[dict]] = mapped_column(JSONB(none_as_null=True), nullable=True)
+  job_data_zstd: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+  # Summary view fields of the listing, so saved-job lists skip the full payload.
+  job_summary: Mapped[dict] = mapped_column(JSONB, nullable=False)
+  # The refresher updates every saved copy of a posting by htidocid, whatever its job_id.
+  htidocid: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
   created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
   updated_at: Mapped[datetime] = mapped_column(
     DateTime(timezone=True),
@@ -27,3 +36,6 @@ class SavedJob(Base):
     onupdate=func.now(),
     nullable=False,
   )
+  # Last time the background refresher checked the listing upstream; None until the first check.
+  refreshed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+  expired: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class SearchPopularity(Base):
+  """Exponentially decayed request count per canonical search cache key."""
+
+  __tablename__ = "search_popularity"
+
+  # sha256 of the canonical cache key; the key fields are kept so the warmer can replay it.
+  key_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+  query: Mapped[str] = mapped_column(String(255), nullable=False)
+  location: Mapped[str] = mapped_column(String(255), nullable=False)
+  page: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+  employment_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+  role_filters: Mapped[List[str]] = mapped_column(JSONB, nullable=False, default=list)
+  seniority_filters: Mapped[List[str]] = mapped_column(JSONB, nullable=False, default=list)
+  # Decayed count as of scored_at; the current value is score * 0.5 ** (age / half-life).
+  score: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+  scored_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+  last_warmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
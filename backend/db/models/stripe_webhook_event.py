@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class StripeWebhookEvent(Base):
+  """Received Stripe webhook event, stored once per event id and applied by a background worker."""
+
+  __tablename__ = "stripe_webhook_events"
+  __table_args__ = (Index("ix_stripe_webhook_events_pending", "status", "stripe_created_at"),)
+
+  event_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+  event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+  # Subscription id (or checkout session id) the event changes; events are applied in order per key.
+  ordering_key: Mapped[Optional[str]] = mapped_column(String(191), nullable=True, index=True)
+  stripe_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+  payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+  status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+  attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+  # A failed event is retried with exponential backoff; it is not claimed before this time.
+  next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+  received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
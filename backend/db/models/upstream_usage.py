@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class UpstreamUsage(Base):
+  """Number of billable upstream requests spent per provider and UTC day."""
+
+  __tablename__ = "upstream_usage"
+
+  provider: Mapped[str] = mapped_column(String(32), primary_key=True)
+  usage_date: Mapped[date] = mapped_column(Date, primary_key=True)
+  request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+  updated_at: Mapped[datetime] = mapped_column(
+    DateTime(timezone=True),
+    server_default=func.now(),
+    onupdate=func.now(),
+    nullable=False,
+  )
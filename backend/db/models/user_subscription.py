@@ -24,6 +24,8 @@ class UserSubscription(Base):
   stripe_payment_intent_id: Mapped[str | None] = mapped_column(String(191), nullable=True, index=True)
   entitlement_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
   last_event_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+  # Stripe ``created`` time of the newest applied webhook event; older deliveries are ignored.
+  last_event_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
   created_at: Mapped[datetime] = mapped_column(
     DateTime(timezone=True),
     server_default=func.now(),
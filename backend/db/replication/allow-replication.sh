@@ -0,0 +1,4 @@
+#!/bin/sh
+# Runs once at initdb on the "replica" compose profile's primary: let the standby stream WAL.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.generation_job import GenerationJob
+from services.metrics import instrument_db
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+@instrument_db("create_generation_job")
+async def create_generation_job(
+  session: AsyncSession,
+  *,
+  kind: str,
+  user_id: Optional[str],
+  idempotency_key: Optional[str],
+  request: dict[str, Any],
+) -> tuple[GenerationJob, bool]:
+  """Queue a job; with an idempotency key already in use, return that job and False instead."""
+  stmt = (
+    insert(GenerationJob)
+    .values(
+      id=uuid.uuid4(),
+      kind=kind,
+      user_id=user_id,
+      idempotency_key=idempotency_key,
+      status="queued",
+      request=request,
+      attempts=0,
+    )
+    .on_conflict_do_nothing(index_elements=[GenerationJob.idempotency_key])
+    .returning(GenerationJob)
+  )
+  job = (await session.execute(stmt)).scalar_one_or_none()
+  created = job is not None
+  if job is None:
+    job = (
+      await session.execute(select(GenerationJob).where(GenerationJob.idempotency_key == idempotency_key))
+    ).scalar_one()
+  await session.commit()
+  return job, created
+
+
+@instrument_db("get_generation_job")
+async def get_generation_job(session: AsyncSession, job_id: uuid.UUID) -> Optional[GenerationJob]:
+  return await session.get(GenerationJob, job_id)
+
+
+@instrument_db("count_queued_generation_jobs")
+async def count_queued_generation_jobs(session: AsyncSession) -> int:
+  result = await session.execute(select(func.count()).select_from(GenerationJob).where(GenerationJob.status == "queued"))
+  return int(result.scalar_one())
+
+
+@instrument_db("claim_generation_jobs")
+async def claim_generation_jobs(session: AsyncSession, limit: int, lease_seconds: float) -> list[GenerationJob]:
+  """Mark up to ``limit`` due jobs running and commit; other workers skip the locked rows.
+
+  Jobs still marked running after their lease expired are claimed again. The claim commits
+  straight away, so no transaction stays open while the generation runs.
+  """
+  now = func.now()
+  claimable = (
+    select(GenerationJob.id)
+    .where(
+      or_(
+        and_(GenerationJob.status == "queued", GenerationJob.available_at <= now),
+        and_(GenerationJob.status == "running", GenerationJob.lease_expires_at < now),
+      )
+    )
+    .order_by(GenerationJob.available_at)
+    .limit(limit)
+    .with_for_update(skip_locked=True)
+  )
+  stmt = (
+    update(GenerationJob)
+    .where(GenerationJob.id.in_(claimable.scalar_subquery()))
+    .values(
+      status="running",
+      attempts=GenerationJob.attempts + 1,
+      started_at=now,
+      lease_expires_at=now + timedelta(seconds=lease_seconds),
+    )
+    .returning(GenerationJob)
+    .execution_options(synchronize_session=False)
+  )
+  jobs = list((await session.execute(stmt)).scalars())
+  await session.commit()
+  return jobs
+
+
+async def _finish(session: AsyncSession, job_id: uuid.UUID, attempts: int, **values: Any) -> bool:
+  # Matching the attempt number keeps a worker whose lease was taken over from
+  # overwriting the newer attempt's outcome.
+  stmt = (
+    update(GenerationJob)
+    .where(GenerationJob.id == job_id, GenerationJob.attempts == attempts, GenerationJob.status == "running")
+    .values(lease_expires_at=None, **values)
+  )
+  result = await session.execute(stmt)
+  await session.commit()
+  return result.rowcount > 0
+
+
+@instrument_db("complete_generation_job")
+async def complete_generation_job(session: AsyncSession, job_id: uuid.UUID, attempts: int, result: dict[str, Any]) -> bool:
+  return await _finish(
+    session, job_id, attempts, status="succeeded", result=result, last_error=None, finished_at=func.now()
+  )
+
+
+@instrument_db("fail_generation_job")
+async def fail_generation_job(session: AsyncSession, job_id: uuid.UUID, attempts: int, error: str) -> bool:
+  return await _finish(session, job_id, attempts, status="failed", last_error=error, finished_at=func.now())
+
+
+@instrument_db("retry_generation_job")
+async def retry_generation_job(
+  session: AsyncSession, job_id: uuid.UUID, attempts: int, error: str, delay_seconds: float
+) -> bool:
+  return await _finish(
+    session,
+    job_id,
+    attempts,
+    status="queued",
+    last_error=error,
+    available_at=func.now() + timedelta(seconds=delay_seconds),
+  )
+
+
+@instrument_db("release_generation_jobs")
+async def release_generation_jobs(session: AsyncSession, claims: list[tuple[uuid.UUID, int]]) -> int:
+  """Put interrupted jobs back in the queue without counting the attempt against them."""
+  released = 0
+  for job_id, attempts in claims:
+    stmt = (
+      update(GenerationJob)
+      .where(GenerationJob.id == job_id, GenerationJob.attempts == attempts, GenerationJob.status == "running")
+      .values(status="queued", attempts=attempts - 1, lease_expires_at=None, available_at=func.now())
+    )
+    released += (await session.execute(stmt)).rowcount
+  await session.commit()
+  return released
+
+
+@instrument_db("prune_generation_jobs")
+async def prune_generation_jobs(session: AsyncSession, finished_before: datetime) -> int:
+  stmt = delete(GenerationJob).where(
+    GenerationJob.status.in_(FINISHED_STATUSES), GenerationJob.finished_at < finished_before
+  )
+  result = await session.execute(stmt)
+  await session.commit()
+  return result.rowcount
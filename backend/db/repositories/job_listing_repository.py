@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.job_listing import CachedJobListing
+from db.routing import replica_read
+from services.metrics import instrument_db
+
+DEFAULT_MISS_TTL_SECONDS = 900
+
+
+def is_fresh_miss(record: CachedJobListing, miss_ttl_seconds: int = DEFAULT_MISS_TTL_SECONDS) -> bool:
+  """Return True when the record is a negative lookup result that has not expired yet."""
+  if record.job_data is not None:
+    return False
+  cutoff = datetime.now(timezone.utc) - timedelta(seconds=miss_ttl_seconds)
+  return record.updated_at >= cutoff
+
+
+@instrument_db("get_cached_listing")
+@replica_read
+async def get_cached_listing(
+  session: AsyncSession,
+  *,
+  job_id: str,
+  htidocid: Optional[str],
+) -> Optional[CachedJobListing]:
+  """Return the stored listing for a job_id or htidocid, preferring resolved rows over misses."""
+  conditions = [CachedJobListing.job_id == job_id, CachedJobListing.htidocid == job_id]
+  if htidocid:
+    conditions.append(CachedJobListing.htidocid == htidocid)
+
+  stmt: Select[CachedJobListing] = (
+    select(CachedJobListing)
+    .where(or_(*conditions))
+    .order_by(CachedJobListing.job_data.is_(None), CachedJobListing.updated_at.desc())
+    .limit(1)
+  )
+  result = await session.execute(stmt)
+  return result.scalar_one_or_none()
+
+
+@instrument_db("store_job_listings")
+async def store_job_listings(session: AsyncSession, listings: list[dict[str, Any]]) -> None:
+  """Upsert resolved listings keyed by job_id, replacing any recorded miss."""
+  rows: dict[str, dict[str, Any]] = {}
+  for listing in listings:
+    job_id = listing.get("job_id")
+    if not job_id:
+      continue
+    rows[job_id] = {"job_id": job_id, "htidocid": listing.get("htidocid"), "job_data": listing}
+  if not rows:
+    return
+
+  stmt = insert(CachedJobListing).values(list(rows.values()))
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[CachedJobListing.job_id],
+    set_={
+      "htidocid": stmt.excluded.htidocid,
+      "job_data": stmt.excluded.job_data,
+      "updated_at": func.now(),
+    },
+  )
+  await session.execute(stmt)
+  await session.commit()
+
+
+@instrument_db("record_listing_miss")
+async def record_listing_miss(session: AsyncSession, *, job_id: str, htidocid: Optional[str]) -> None:
+  """Remember that a job_id could not be resolved upstream so repeat lookups skip SerpAPI."""
+  stmt = insert(CachedJobListing).values(job_id=job_id, htidocid=htidocid, job_data=None)
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[CachedJobListing.job_id],
+    set_={"updated_at": func.now()},
+    where=CachedJobListing.job_data.is_(None),
+  )
+  await session.execute(stmt)
+  await session.commit()
@@ -1,20 +1,97 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional
 
-from sqlalchemy import Select, select
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db.core import fetch_one
 from db.models.job_search import JobSearch
+from db.routing import replica_read
+from services.metrics import instrument_db
+from services.payload_codec import decode_payload, payload_codec, summarize_search_payload
 
 DEFAULT_CACHE_TTL_SECONDS = 3600
 
+_searches = JobSearch.__table__
+
+
+class CachedSearch(NamedTuple):
+  id: uuid.UUID
+  response_payload: dict[str, Any]
+  created_at: datetime
+
+
+def _cached_search(*columns):
+  # Built once per column set; callers only read the row id, payload and age.
+  return (
+    select(_searches.c.id, *columns, _searches.c.created_at)
+    .where(
+      _searches.c.query == bindparam("query"),
+      _searches.c.location == bindparam("location"),
+      _searches.c.page == bindparam("page"),
+      _searches.c.employment_type.is_not_distinct_from(bindparam("employment_type")),
+      _searches.c.role_filters == bindparam("role_filters", type_=JSONB),
+      _searches.c.seniority_filters == bindparam("seniority_filters", type_=JSONB),
+      _searches.c.created_at >= bindparam("cutoff"),
+    )
+    .order_by(_searches.c.created_at.desc())
+    .limit(1)
+  )
+
+
+_CACHED_SEARCH = _cached_search(_searches.c.response_payload, _searches.c.payload_zstd)
+_CACHED_SEARCH_SUMMARY = _cached_search(_searches.c.summary_payload)
+
 
 def _normalize_list(values: Optional[list[str]]) -> list[str]:
   return sorted({value.strip() for value in (values or []) if value and value.strip()})
 
 
+@instrument_db("get_cached_search_entry")
+@replica_read
+async def get_cached_search_entry(
+  session: AsyncSession,
+  *,
+  query: str,
+  location: str,
+  page: int,
+  employment_type: Optional[str],
+  roles: Optional[list[str]],
+  seniority_filters: Optional[list[str]],
+  cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+  summary: bool = False,
+) -> Optional[CachedSearch]:
+  """Return the newest cache entry if not older than cache_ttl_seconds.
+
+  With ``summary`` the payload is the stored summary projection (listings cut down to
+  ``SUMMARY_FIELDS``), read without touching the full payload.
+  """
+  row = await fetch_one(
+    session,
+    _CACHED_SEARCH_SUMMARY if summary else _CACHED_SEARCH,
+    {
+      "query": query,
+      "location": location,
+      "page": page,
+      "employment_type": employment_type,
+      "role_filters": _normalize_list(roles),
+      "seniority_filters": _normalize_list(seniority_filters),
+      "cutoff": datetime.now(timezone.utc) - timedelta(seconds=cache_ttl_seconds),
+    },
+  )
+  if row is None:
+    return None
+  if summary:
+    return CachedSearch(row.id, row.summary_payload, row.created_at)
+  if row.payload_zstd is not None:
+    return CachedSearch(row.id, await decode_payload(session, row.payload_zstd), row.created_at)
+  return CachedSearch(row.id, row.response_payload, row.created_at)
+
+
 async def get_cached_search(
   session: AsyncSession,
   *,
@@ -27,29 +104,20 @@ async def get_cached_search(
   cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
 ) -> Optional[dict[str, Any]]:
   """Return cached payload if not older than cache_ttl_seconds."""
-  normalized_roles = _normalize_list(roles)
-  normalized_seniority = _normalize_list(seniority_filters)
-  cutoff = datetime.now(timezone.utc) - timedelta(seconds=cache_ttl_seconds)
-
-  stmt: Select[JobSearch] = (
-    select(JobSearch)
-    .where(
-      JobSearch.query == query,
-      JobSearch.location == location,
-      JobSearch.page == page,
-      JobSearch.employment_type == employment_type,
-      JobSearch.role_filters == normalized_roles,
-      JobSearch.seniority_filters == normalized_seniority,
-      JobSearch.created_at >= cutoff,
-    )
-    .order_by(JobSearch.created_at.desc())
-    .limit(1)
+  record = await get_cached_search_entry(
+    session,
+    query=query,
+    location=location,
+    page=page,
+    employment_type=employment_type,
+    roles=roles,
+    seniority_filters=seniority_filters,
+    cache_ttl_seconds=cache_ttl_seconds,
   )
-  result = await session.execute(stmt)
-  record = result.scalar_one_or_none()
   return None if record is None else record.response_payload
 
 
+@instrument_db("cache_job_search_result")
 async def cache_job_search_result(
   session: AsyncSession,
   *,
@@ -60,18 +128,24 @@ async def cache_job_search_result(
   roles: Optional[list[str]],
   seniority_filters: Optional[list[str]],
   payload: dict[str, Any],
-) -> None:
-  """Persist a job search payload for future reuse."""
+) -> uuid.UUID:
+  """Persist a job search payload for future reuse and return the cache row id."""
   normalized_roles = _normalize_list(roles)
   normalized_seniority = _normalize_list(seniority_filters)
   record = JobSearch(
+    id=uuid.uuid4(),
     query=query,
     location=location,
     page=page,
     employment_type=employment_type,
     role_filters=normalized_roles,
     seniority_filters=normalized_seniority,
-    response_payload=payload,
+    summary_payload=summarize_search_payload(payload),
   )
+  if payload_codec.enabled:
+    record.payload_zstd = payload_codec.encode(payload)
+  else:
+    record.response_payload = payload
   session.add(record)
   await session.commit()
+  return record.id
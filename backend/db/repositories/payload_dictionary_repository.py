@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.job_search import JobSearch
+from db.models.payload_dictionary import PayloadDictionary
+from db.models.saved_job import SavedJob
+from services.metrics import instrument_db
+
+
+@instrument_db("list_payload_dictionaries")
+async def list_payload_dictionaries(session: AsyncSession) -> list[tuple[int, bytes]]:
+  """Every stored dictionary as (dict_id, data), oldest first."""
+  stmt = select(PayloadDictionary.dict_id, PayloadDictionary.data).order_by(PayloadDictionary.created_at)
+  result = await session.execute(stmt)
+  return [(dict_id, data) for dict_id, data in result.all()]
+
+
+@instrument_db("store_payload_dictionary")
+async def store_payload_dictionary(session: AsyncSession, *, dict_id: int, data: bytes, sample_count: int) -> None:
+  stmt = (
+    insert(PayloadDictionary)
+    .values(dict_id=dict_id, data=data, sample_count=sample_count)
+    .on_conflict_do_nothing(index_elements=[PayloadDictionary.dict_id])
+  )
+  await session.execute(stmt)
+  await session.commit()
+
+
+async def recent_saved_payloads(session: AsyncSession, limit: int) -> list[tuple[Optional[dict[str, Any]], Optional[bytes]]]:
+  """(job_data, job_data_zstd) of the most recently updated saved jobs, for dictionary training."""
+  stmt = select(SavedJob.job_data, SavedJob.job_data_zstd).order_by(SavedJob.updated_at.desc()).limit(limit)
+  result = await session.execute(stmt)
+  return [(job_data, blob) for job_data, blob in result.all()]
+
+
+async def recent_search_payloads(session: AsyncSession, limit: int) -> list[tuple[Optional[dict[str, Any]], Optional[bytes]]]:
+  """(response_payload, payload_zstd) of the newest search cache rows, for dictionary training."""
+  stmt = select(JobSearch.response_payload, JobSearch.payload_zstd).order_by(JobSearch.created_at.desc()).limit(limit)
+  result = await session.execute(stmt)
+  return [(payload, blob) for payload, blob in result.all()]
@@ -1,49 +1,225 @@
 from __future__ import annotations
 
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
 
-from sqlalchemy import Select, select
+from sqlalchemy import LargeBinary, Row, String, bindparam, case, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db.core import fetch_all, fetch_one
 from db.models.saved_job import SavedJob
+from services.metrics import instrument_db
+from services.payload_codec import decode_payload, payload_codec, summarize_listing
 
 
-async def list_saved_jobs_for_user(session: AsyncSession, user_id: str) -> list[SavedJob]:
-  stmt: Select[SavedJob] = (
-    select(SavedJob)
-    .where(SavedJob.user_id == user_id)
-    .order_by(SavedJob.created_at.desc())
+_saved = SavedJob.__table__
+
+
+class SavedJobRecord(NamedTuple):
+  job_id: str
+  job_data: dict[str, Any]
+  created_at: datetime
+  updated_at: datetime
+  expired: bool
+  refreshed_at: Optional[datetime]
+
+
+# Everything the saved-jobs routes read besides the listing; statements are built once so
+# every call reuses the compiled statement.
+_SAVED_META = (
+  _saved.c.job_id,
+  _saved.c.created_at,
+  _saved.c.updated_at,
+  _saved.c.expired,
+  _saved.c.refreshed_at,
+)
+_SAVED_LISTING = (_saved.c.job_data, _saved.c.job_data_zstd)
+_LIST_SAVED = (
+  select(*_SAVED_META, *_SAVED_LISTING)
+  .where(_saved.c.user_id == bindparam("user_id"))
+  .order_by(_saved.c.created_at.desc())
+)
+_LIST_SAVED_SUMMARY = (
+  select(*_SAVED_META, _saved.c.job_summary)
+  .where(_saved.c.user_id == bindparam("user_id"))
+  .order_by(_saved.c.created_at.desc())
+)
+_GET_SAVED = (
+  select(*_SAVED_META, *_SAVED_LISTING)
+  .where(_saved.c.user_id == bindparam("user_id"), _saved.c.job_id == bindparam("job_id"))
+  .limit(1)
+)
+_upsert = insert(_saved).values(
+  id=bindparam("id"),
+  user_id=bindparam("user_id"),
+  job_id=bindparam("job_id"),
+  job_data=bindparam("job_data", type_=JSONB(none_as_null=True)),
+  job_data_zstd=bindparam("job_data_zstd", type_=LargeBinary),
+  job_summary=bindparam("job_summary", type_=JSONB),
+  htidocid=bindparam("htidocid", type_=String),
+)
+_UPSERT_SAVED = _upsert.on_conflict_do_update(
+  constraint="uq_saved_jobs_user_job",
+  set_={
+    "job_data": _upsert.excluded.job_data,
+    "job_data_zstd": _upsert.excluded.job_data_zstd,
+    "job_summary": _upsert.excluded.job_summary,
+    "htidocid": _upsert.excluded.htidocid,
+    "expired": False,
+    "updated_at": func.now(),
+  },
+).returning(*_SAVED_META)
+_DELETE_SAVED = (
+  delete(_saved)
+  .where(_saved.c.user_id == bindparam("user_id"), _saved.c.job_id == bindparam("job_id"))
+  .returning(_saved.c.id)
+)
+
+
+async def _record(session: AsyncSession, row: Row) -> SavedJobRecord:
+  job_data = row.job_data
+  if row.job_data_zstd is not None:
+    # Refreshed copies share one frame per posting; each row's own job_id is the column.
+    job_data = {**await decode_payload(session, row.job_data_zstd), "job_id": row.job_id}
+  return SavedJobRecord(row.job_id, job_data, row.created_at, row.updated_at, row.expired, row.refreshed_at)
+
+
+@instrument_db("list_saved_jobs_for_user")
+async def list_saved_jobs_for_user(session: AsyncSession, user_id: str, summary: bool = False) -> list[SavedJobRecord]:
+  """Newest first; with ``summary`` each ``job_data`` is the stored summary projection of the listing."""
+  if summary:
+    rows = await fetch_all(session, _LIST_SAVED_SUMMARY, {"user_id": user_id})
+    return [
+      SavedJobRecord(row.job_id, row.job_summary, row.created_at, row.updated_at, row.expired, row.refreshed_at)
+      for row in rows
+    ]
+  return [await _record(session, row) for row in await fetch_all(session, _LIST_SAVED, {"user_id": user_id})]
+
+
+@instrument_db("get_saved_job")
+async def get_saved_job(session: AsyncSession, user_id: str, job_id: str) -> Optional[SavedJobRecord]:
+  row = await fetch_one(session, _GET_SAVED, {"user_id": user_id, "job_id": job_id})
+  return None if row is None else await _record(session, row)
+
+
+@instrument_db("upsert_saved_job")
+async def upsert_saved_job(session: AsyncSession, user_id: str, job_id: str, payload: dict) -> SavedJobRecord:
+  """Insert or replace the snapshot in one statement; re-saving clears the expired flag."""
+  compressed = payload_codec.encode(payload) if payload_codec.enabled else None
+  row = await fetch_one(
+    session,
+    _UPSERT_SAVED,
+    {
+      "id": uuid.uuid4(),
+      "user_id": user_id,
+      "job_id": job_id,
+      "job_data": None if compressed is not None else payload,
+      "job_data_zstd": compressed,
+      "job_summary": summarize_listing(payload),
+      "htidocid": payload.get("htidocid"),
+    },
   )
-  result = await session.execute(stmt)
-  return list(result.scalars().all())
+  await session.commit()
+  return SavedJobRecord(row.job_id, payload, row.created_at, row.updated_at, row.expired, row.refreshed_at)
 
 
-async def get_saved_job(session: AsyncSession, user_id: str, job_id: str) -> Optional[SavedJob]:
-  stmt: Select[SavedJob] = (
-    select(SavedJob)
-    .where(SavedJob.user_id == user_id, SavedJob.job_id == job_id)
-    .limit(1)
+@instrument_db("delete_saved_job")
+async def delete_saved_job(session: AsyncSession, user_id: str, job_id: str) -> bool:
+  deleted = await fetch_one(session, _DELETE_SAVED, {"user_id": user_id, "job_id": job_id})
+  await session.commit()
+  return deleted is not None
+
+
+_LAST_CHECKED = func.coalesce(SavedJob.refreshed_at, SavedJob.created_at)
+
+
+@instrument_db("saved_jobs_due_for_refresh")
+async def saved_jobs_due_for_refresh(
+  session: AsyncSession,
+  *,
+  checked_before: datetime,
+  limit: int,
+) -> list[tuple[str, Optional[str]]]:
+  """Distinct (job_id, htidocid) pairs of live saved jobs not checked since ``checked_before``, stalest first."""
+  stmt = (
+    select(SavedJob.job_id, SavedJob.htidocid)
+    .where(SavedJob.expired.is_(False))
+    .group_by(SavedJob.job_id, SavedJob.htidocid)
+    .having(func.min(_LAST_CHECKED) < checked_before)
+    .order_by(func.min(_LAST_CHECKED))
+    .limit(limit)
   )
   result = await session.execute(stmt)
-  return result.scalar_one_or_none()
+  return [(job_id, htidocid) for job_id, htidocid in result.all()]
 
 
-async def upsert_saved_job(session: AsyncSession, user_id: str, job_id: str, payload: dict) -> SavedJob:
-  record = await get_saved_job(session, user_id, job_id)
-  if record:
-    record.job_data = payload
+def _group_params(group: dict[str, Any]) -> dict[str, Any]:
+  return {"job_ids": group["job_ids"], "htidocid": group["htidocid"]}
+
+
+def _group_condition():
+  # Every saved copy of the posting: the looked-up job_ids plus any other job_id with the same htidocid.
+  return or_(
+    _saved.c.job_id == func.any(bindparam("job_ids", type_=ARRAY(String))),
+    _saved.c.htidocid == bindparam("htidocid", type_=String),
+  )
+
+
+@instrument_db("refresh_saved_jobs")
+async def refresh_saved_jobs(session: AsyncSession, groups: list[dict[str, Any]]) -> None:
+  """Bulk-apply fresh listings; each group is ``{"job_ids": [...], "htidocid": ..., "job_data": {...}}``.
+
+  Each row keeps its own job_id inside job_data (compressed rows take it from the column on
+  read). ``updated_at`` only moves when the stored listing actually changed, so saved-list
+  ETags stay valid across no-op refreshes.
+  """
+  if not groups:
+    return
+  own_job_id = func.jsonb_build_object("job_id", _saved.c.job_id)
+  if payload_codec.enabled:
+    blob = bindparam("listing_zstd", type_=LargeBinary)
+    listing = {"job_data": None, "job_data_zstd": blob}
+    unchanged = _saved.c.job_data_zstd == blob
+    params = [{"listing_zstd": payload_codec.encode(group["job_data"])} for group in groups]
   else:
-    record = SavedJob(user_id=user_id, job_id=job_id, job_data=payload)
-  session.add(record)
+    fresh = bindparam("listing", type_=JSONB).op("||")(own_job_id)
+    listing = {"job_data": fresh, "job_data_zstd": None}
+    unchanged = _saved.c.job_data == fresh
+    params = [{"listing": group["job_data"]} for group in groups]
+  stmt = (
+    update(_saved)
+    .where(_group_condition())
+    .values(
+      **listing,
+      job_summary=bindparam("summary", type_=JSONB).op("||")(own_job_id),
+      expired=False,
+      refreshed_at=func.now(),
+      updated_at=case((unchanged, _saved.c.updated_at), else_=func.now()),
+    )
+  )
+  for group, group_params in zip(groups, params):
+    group_params.update(_group_params(group), summary=summarize_listing(group["job_data"]))
+  await session.execute(stmt, params)
   await session.commit()
-  await session.refresh(record)
-  return record
 
 
-async def delete_saved_job(session: AsyncSession, user_id: str, job_id: str) -> bool:
-  record = await get_saved_job(session, user_id, job_id)
-  if not record:
-    return False
-  await session.delete(record)
+@instrument_db("expire_saved_jobs")
+async def expire_saved_jobs(session: AsyncSession, groups: list[dict[str, Any]]) -> None:
+  """Mark every saved copy of postings that are no longer listed upstream as expired."""
+  if not groups:
+    return
+  stmt = update(_saved).where(_group_condition()).values(expired=True, refreshed_at=func.now(), updated_at=func.now())
+  await session.execute(stmt, [_group_params(group) for group in groups])
+  await session.commit()
+
+
+@instrument_db("mark_saved_jobs_checked")
+async def mark_saved_jobs_checked(session: AsyncSession, groups: list[dict[str, Any]]) -> None:
+  """Record an inconclusive check so the postings wait a full refresh interval before the next one."""
+  if not groups:
+    return
+  stmt = update(_saved).where(_group_condition()).values(refreshed_at=func.now(), updated_at=_saved.c.updated_at)
+  await session.execute(stmt, [_group_params(group) for group in groups])
   await session.commit()
-  return True
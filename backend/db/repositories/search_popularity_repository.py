@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Float, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.search_popularity import SearchPopularity
+from services.metrics import instrument_db
+
+
+def _decayed_score(at: Any, half_life_seconds: float) -> Any:
+  """SQL expression for a row's score decayed from ``scored_at`` to ``at``."""
+  age = cast(func.greatest(func.extract("epoch", at - SearchPopularity.scored_at), 0), Float)
+  return SearchPopularity.score * func.power(literal(0.5, Float), age / half_life_seconds)
+
+
+@instrument_db("record_search_popularity")
+async def record_search_popularity(
+  session: AsyncSession,
+  rows: list[dict[str, Any]],
+  *,
+  scored_at: datetime,
+  half_life_seconds: float,
+) -> None:
+  """Decay each key's stored score to ``scored_at`` and add the new hits, in one statement.
+
+  Each row carries ``key_hash``, the cache key fields and ``score`` (hits since the last flush).
+  """
+  if not rows:
+    return
+  stmt = insert(SearchPopularity).values([{**row, "scored_at": scored_at} for row in rows])
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[SearchPopularity.key_hash],
+    set_={
+      "score": stmt.excluded.score + _decayed_score(stmt.excluded.scored_at, half_life_seconds),
+      "scored_at": func.greatest(SearchPopularity.scored_at, stmt.excluded.scored_at),
+    },
+  )
+  await session.execute(stmt)
+  await session.commit()
+
+
+@instrument_db("top_search_keys")
+async def top_search_keys(
+  session: AsyncSession,
+  *,
+  limit: int,
+  at: datetime,
+  half_life_seconds: float,
+  min_score: float,
+) -> list[tuple[SearchPopularity, float]]:
+  """The ``limit`` most popular keys by decayed score, skipping those below ``min_score``."""
+  score = _decayed_score(at, half_life_seconds).label("current_score")
+  stmt = select(SearchPopularity, score).where(score >= min_score).order_by(score.desc()).limit(limit)
+  result = await session.execute(stmt)
+  return [(row, float(current)) for row, current in result.all()]
+
+
+@instrument_db("mark_searches_warmed")
+async def mark_searches_warmed(session: AsyncSession, key_hashes: list[str], at: datetime) -> None:
+  if not key_hashes:
+    return
+  await session.execute(
+    update(SearchPopularity).where(SearchPopularity.key_hash.in_(key_hashes)).values(last_warmed_at=at)
+  )
+  await session.commit()
+
+
+@instrument_db("prune_search_popularity")
+async def prune_search_popularity(session: AsyncSession, *, at: datetime, half_life_seconds: float, min_score: float) -> int:
+  """Drop keys whose decayed score has fallen below ``min_score``."""
+  result = await session.execute(
+    delete(SearchPopularity).where(_decayed_score(at, half_life_seconds) < min_score)
+  )
+  await session.commit()
+  return result.rowcount or 0
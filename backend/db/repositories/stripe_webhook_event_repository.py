@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from db.models.stripe_webhook_event import StripeWebhookEvent
+from services.metrics import instrument_db
+
+
+@instrument_db("insert_webhook_event")
+async def insert_webhook_event(
+  session: AsyncSession,
+  *,
+  event_id: str,
+  event_type: str,
+  ordering_key: Optional[str],
+  stripe_created_at: datetime,
+  payload: dict[str, Any],
+) -> bool:
+  """Store an event once; returns False when the id was already received (a Stripe retry)."""
+  stmt = (
+    insert(StripeWebhookEvent)
+    .values(
+      event_id=event_id,
+      event_type=event_type,
+      ordering_key=ordering_key,
+      stripe_created_at=stripe_created_at,
+      payload=payload,
+      status="pending",
+      attempts=0,
+    )
+    .on_conflict_do_nothing(index_elements=[StripeWebhookEvent.event_id])
+    .returning(StripeWebhookEvent.event_id)
+  )
+  result = await session.execute(stmt)
+  inserted = result.scalar_one_or_none() is not None
+  await session.commit()
+  return inserted
+
+
+@instrument_db("claim_pending_webhook_events")
+async def claim_pending_webhook_events(session: AsyncSession, limit: int) -> list[StripeWebhookEvent]:
+  """Lock the oldest due pending events for this transaction; other workers skip them.
+
+  Only the oldest pending event per ``ordering_key`` is claimable: a later event for the same
+  key waits while an earlier one is pending, whether it is locked by another worker or waiting
+  out a retry backoff (``next_attempt_at`` in the future). Events for other keys are not held up.
+  """
+  earlier = aliased(StripeWebhookEvent)
+  stmt = (
+    select(StripeWebhookEvent)
+    .where(
+      StripeWebhookEvent.status == "pending",
+      StripeWebhookEvent.next_attempt_at <= func.now(),
+      ~exists().where(
+        earlier.ordering_key == StripeWebhookEvent.ordering_key,
+        earlier.status == "pending",
+        tuple_(earlier.stripe_created_at, earlier.received_at, earlier.event_id)
+        < tuple_(StripeWebhookEvent.stripe_created_at, StripeWebhookEvent.received_at, StripeWebhookEvent.event_id),
+      ),
+    )
+    .order_by(StripeWebhookEvent.stripe_created_at, StripeWebhookEvent.received_at)
+    .limit(limit)
+    .with_for_update(skip_locked=True)
+  )
+  result = await session.execute(stmt)
+  return list(result.scalars())
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.upstream_usage import UpstreamUsage
+
+
+async def get_upstream_usage(session: AsyncSession, provider: str, usage_date: date) -> int:
+  stmt = select(UpstreamUsage.request_count).where(
+    UpstreamUsage.provider == provider,
+    UpstreamUsage.usage_date == usage_date,
+  )
+  result = await session.execute(stmt)
+  return result.scalar_one_or_none() or 0
+
+
+async def increment_upstream_usage(session: AsyncSession, provider: str, usage_date: date, amount: int) -> int:
+  """Atomically add to the day's counter and return the total across all workers."""
+  stmt = insert(UpstreamUsage).values(provider=provider, usage_date=usage_date, request_count=amount)
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[UpstreamUsage.provider, UpstreamUsage.usage_date],
+    set_={
+      "request_count": UpstreamUsage.request_count + stmt.excluded.request_count,
+      "updated_at": func.now(),
+    },
+  ).returning(UpstreamUsage.request_count)
+  result = await session.execute(stmt)
+  total = result.scalar_one()
+  await session.commit()
+  return total
@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from sqlalchemy import Select, select
+from sqlalchemy import Row, Select, bindparam, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db.core import fetch_one
 from db.models.user_subscription import UserSubscription
+from services.metrics import instrument_db
 
+# Passed as ``entitlement_expires_at`` when an event says nothing about expiry.
+KEEP = object()
+
+_subscriptions = UserSubscription.__table__
+# What entitlement checks and billing responses read.
+_ENTITLEMENT_COLUMNS = (
+  _subscriptions.c.user_id,
+  _subscriptions.c.plan,
+  _subscriptions.c.status,
+  _subscriptions.c.entitlement_expires_at,
+  _subscriptions.c.last_event_id,
+)
+_SUBSCRIPTION_FOR_USER = select(*_ENTITLEMENT_COLUMNS).where(_subscriptions.c.user_id == bindparam("user_id")).limit(1)
 
-async def get_subscription_for_user(session: AsyncSession, user_id: str) -> Optional[UserSubscription]:
-  stmt: Select[UserSubscription] = select(UserSubscription).where(UserSubscription.user_id == user_id).limit(1)
-  result = await session.execute(stmt)
-  return result.scalar_one_or_none()
+
+@instrument_db("get_subscription_for_user")
+async def get_subscription_for_user(session: AsyncSession, user_id: str) -> Optional[Row]:
+  return await fetch_one(session, _SUBSCRIPTION_FOR_USER, {"user_id": user_id})
 
 
 async def get_subscription_by_stripe_id(
@@ -30,6 +47,7 @@ async def get_subscription_by_stripe_id(
   return result.scalar_one_or_none()
 
 
+@instrument_db("upsert_user_subscription")
 async def upsert_user_subscription(
   session: AsyncSession,
   *,
@@ -42,26 +60,69 @@ async def upsert_user_subscription(
   stripe_payment_intent_id: str | None = None,
   entitlement_expires_at: datetime | None = None,
   last_event_id: str | None = None,
-) -> UserSubscription:
-  record = await get_subscription_for_user(session, user_id)
-  if not record:
-    record = UserSubscription(user_id=user_id)
-
-  def _set(attr: str, value, *, allow_none: bool = False) -> None:
-    if value is None and not allow_none:
-      return
-    setattr(record, attr, value)
-
-  _set("plan", plan)
-  _set("status", status)
-  _set("stripe_customer_id", stripe_customer_id)
-  _set("stripe_subscription_id", stripe_subscription_id)
-  _set("stripe_checkout_session_id", stripe_checkout_session_id)
-  _set("stripe_payment_intent_id", stripe_payment_intent_id)
-  _set("entitlement_expires_at", entitlement_expires_at, allow_none=True)
-  _set("last_event_id", last_event_id)
-
-  session.add(record)
+) -> Row:
+  """Insert or update in one statement; ``None`` fields keep their value except the expiry, which is always set."""
+  changes: dict[str, Any] = {
+    "plan": plan,
+    "status": status,
+    "stripe_customer_id": stripe_customer_id,
+    "stripe_subscription_id": stripe_subscription_id,
+    "stripe_checkout_session_id": stripe_checkout_session_id,
+    "stripe_payment_intent_id": stripe_payment_intent_id,
+    "last_event_id": last_event_id,
+  }
+  changes = {key: value for key, value in changes.items() if value is not None}
+  changes["entitlement_expires_at"] = entitlement_expires_at
+
+  stmt = insert(_subscriptions).values(id=uuid.uuid4(), user_id=user_id, **changes)
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[_subscriptions.c.user_id],
+    set_={**{key: stmt.excluded[key] for key in changes}, "updated_at": func.now()},
+  ).returning(*_ENTITLEMENT_COLUMNS)
+  record = await fetch_one(session, stmt, {})
   await session.commit()
-  await session.refresh(record)
   return record
+
+
+@instrument_db("apply_subscription_event")
+async def apply_subscription_event(
+  session: AsyncSession,
+  *,
+  user_id: str,
+  event_id: str,
+  event_at: datetime,
+  plan: str | None = None,
+  status: str | None = None,
+  stripe_customer_id: str | None = None,
+  stripe_subscription_id: str | None = None,
+  stripe_checkout_session_id: str | None = None,
+  stripe_payment_intent_id: str | None = None,
+  entitlement_expires_at: Any = KEEP,
+) -> bool:
+  """Upsert one webhook event's changes in a single statement, without committing.
+
+  ``None`` fields leave the stored value alone. The row is only touched when ``event_at``
+  is not older than the last applied event, so late or replayed deliveries cannot roll
+  state back. Returns False when the event was stale.
+  """
+  changes: dict[str, Any] = {
+    "plan": plan,
+    "status": status,
+    "stripe_customer_id": stripe_customer_id,
+    "stripe_subscription_id": stripe_subscription_id,
+    "stripe_checkout_session_id": stripe_checkout_session_id,
+    "stripe_payment_intent_id": stripe_payment_intent_id,
+  }
+  changes = {key: value for key, value in changes.items() if value is not None}
+  if entitlement_expires_at is not KEEP:
+    changes["entitlement_expires_at"] = entitlement_expires_at
+  changes.update(last_event_id=event_id, last_event_at=event_at)
+
+  stmt = insert(UserSubscription).values(id=uuid.uuid4(), user_id=user_id, **changes)
+  stmt = stmt.on_conflict_do_update(
+    index_elements=[UserSubscription.user_id],
+    set_={**changes, "updated_at": func.now()},
+    where=or_(UserSubscription.last_event_at.is_(None), UserSubscription.last_event_at <= event_at),
+  ).returning(UserSubscription.id)
+  result = await session.execute(stmt)
+  return result.scalar_one_or_none() is not None
@@ -0,0 +1,41 @@
+"""Which engine a session statement runs on when a read replica is configured.
+
+Repository functions whose callers tolerate a stale read are wrapped in ``@replica_read``:
+the search cache and job-listing cache lookups, where a row the replica has not replayed yet
+is just a cache miss. While one runs, ``SessionLocal`` sessions bind its statements to the
+replica engine; everything else, including flushes, goes to the primary. Once a session has
+touched the primary it stays there, so a request never reads around its own open transaction.
+
+Replication is asynchronous and requests from one user land on any worker, so reads that
+must see the user's own writes (saved jobs, subscription and entitlement checks) are never
+marked: they always run on the primary.
+"""
+
+from __future__ import annotations
+
+import functools
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+
+def replica_read(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+  """Mark an async repository read that tolerates replica lag so it may run on the replica."""
+
+  @functools.wraps(fn)
+  async def wrapper(*args, **kwargs) -> T:
+    token = _read_only.set(True)
+    try:
+      return await fn(*args, **kwargs)
+    finally:
+      _read_only.reset(token)
+
+  return wrapper
+
+
+def replica_eligible() -> bool:
+  """True inside a ``@replica_read`` call."""
+  return _read_only.get()
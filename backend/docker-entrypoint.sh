@@ -1,25 +1,31 @@
 #!/bin/bash
 set -euo pipefail
 
-echo "Waiting for database..."
-until python - <<'PY'
-import asyncio
-from sqlalchemy import text
-from db.database import engine
+# Waits for Postgres and runs `alembic upgrade head` in one interpreter.
+python -m prestart
 
-async def check():
-    async with engine.connect() as conn:
-        await conn.execute(text("SELECT 1"))
+SERVER_MODE="${SERVER_MODE:-development}"
+PORT="${PORT:-8000}"
 
-asyncio.run(check())
-PY
-do
-  echo "Database not ready, retrying in 3 seconds..."
-  sleep 3
-done
-
-echo "Running migrations..."
-alembic -c /app/alembic.ini upgrade head
+if [ "$SERVER_MODE" = "production" ]; then
+  # One worker per CPU unless overridden; db/database.py reads the same value to split
+  # DB_MAX_CONNECTIONS_BUDGET across workers.
+  export WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(nproc)}"
+  echo "Starting uvicorn in production mode with ${WEB_CONCURRENCY} workers..."
+  # --loop/--http auto pick uvloop and httptools when installed. On SIGTERM, workers stop
+  # accepting connections and get GRACEFUL_TIMEOUT seconds to finish in-flight requests
+  # and run lifespan shutdown (usage flush, pool dispose).
+  exec uvicorn main:app \
+    --host 0.0.0.0 \
+    --port "$PORT" \
+    --workers "$WEB_CONCURRENCY" \
+    --loop auto \
+    --http auto \
+    --proxy-headers \
+    --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}" \
+    --timeout-keep-alive "${KEEP_ALIVE_TIMEOUT:-5}" \
+    --timeout-graceful-shutdown "${GRACEFUL_TIMEOUT:-30}"
+fi
 
 echo "Starting uvicorn..."
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+exec uvicorn main:app --host 0.0.0.0 --port "$PORT"
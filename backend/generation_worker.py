@@ -0,0 +1,46 @@
+"""Standalone generation worker: drains the LLM job queue without serving HTTP.
+
+Run from backend/ (as many processes as needed; they share the queue through SKIP LOCKED):
+
+  GENERATION_WORKERS=8 python -m generation_worker
+
+Set ``GENERATION_WORKERS=0`` on the API processes to keep generation off the web tier
+entirely. With ``DB_MAX_CONNECTIONS_BUDGET`` set, give every process (API and worker) the
+number of standalone workers in ``DB_WORKER_PROCESSES`` so the budget is split across all of
+them. On SIGINT or SIGTERM in-flight jobs are handed back to the queue before exit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from db.database import SessionLocal, dispose_db, init_db
+from services.generation_queue import generation_pool
+
+
+async def serve() -> None:
+  await init_db()
+  worker = asyncio.create_task(generation_pool.run(SessionLocal))
+  loop = asyncio.get_running_loop()
+  for sig in (signal.SIGINT, signal.SIGTERM):
+    loop.add_signal_handler(sig, worker.cancel)
+  try:
+    await worker
+  except asyncio.CancelledError:
+    pass
+  finally:
+    await dispose_db()
+
+
+def main() -> None:
+  logging.basicConfig(level=logging.INFO)
+  if generation_pool.workers == 0:
+    raise SystemExit("GENERATION_WORKERS is 0; nothing to run.")
+  print(f"Starting {generation_pool.workers} generation workers...", flush=True)
+  asyncio.run(serve())
+
+
+if __name__ == "__main__":
+  main()
@@ -1,16 +1,55 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from db.database import dispose_db, init_db
-from routes import behavioral, billing, health, jobs, project_helper, saved_jobs, pro
+from db.database import SessionLocal, dispose_db, init_db
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.tracing import TracingMiddleware
+from routes import admin, behavioral, billing, generation_jobs, health, jobs, metrics, project_helper, saved_jobs, pro
+from services.cache_warmer import run_cache_warmer
+from services.gazetteer import get_gazetteer
+from services.generation_queue import run_generation_workers
+from services.health import health_monitor
+from services.metrics import event_loop_monitor
+from services.payload_codec import load_payload_dictionaries
+from services.saved_job_refresher import run_saved_job_refresher
+from services.search_popularity import run_popularity_flusher
+from services.serpapi_budget import run_usage_flusher
+from services.serpapi_client import close_http_client
+from services.stripe_client import close_stripe_client
+from services.stripe_webhooks import run_webhook_worker
+from services.tracing import run_trace_flusher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    get_gazetteer()
     await init_db()
+    await load_payload_dictionaries(SessionLocal)
+    health_monitor.mark_database_ok()
+    background_tasks = [
+        asyncio.create_task(run_usage_flusher(SessionLocal)),
+        asyncio.create_task(event_loop_monitor.run()),
+        asyncio.create_task(health_monitor.run()),
+        asyncio.create_task(run_webhook_worker(SessionLocal)),
+        asyncio.create_task(run_popularity_flusher(SessionLocal)),
+        asyncio.create_task(run_cache_warmer(SessionLocal)),
+        asyncio.create_task(run_saved_job_refresher(SessionLocal)),
+        asyncio.create_task(run_generation_workers(SessionLocal)),
+        asyncio.create_task(run_trace_flusher()),
+    ]
     yield
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_http_client()
+    await close_stripe_client()
     await dispose_db()
 
 
@@ -22,7 +61,15 @@ app.include_router(behavioral.router)
 app.include_router(saved_jobs.router)
 app.include_router(billing.router)
 app.include_router(pro.router)
+app.include_router(generation_jobs.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Wraps compression so request timings include encoding time.
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -32,4 +79,3 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
@@ -0,0 +1 @@
+"""ASGI middleware used by the FastAPI application."""
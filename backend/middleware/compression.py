@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.transfer_stats import endpoint_name, transfer_stats
+
+try:  # Brotli is optional; gzip is always available.
+  import brotli
+except ImportError:  # pragma: no cover - depends on the deployment image
+  brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+  """Pick the best supported coding from Accept-Encoding, honouring q=0 exclusions."""
+  offered: dict[str, float] = {}
+  for part in accept_encoding.split(","):
+    token, _, params = part.strip().partition(";")
+    quality = 1.0
+    params = params.strip()
+    if params.startswith("q="):
+      try:
+        quality = float(params[2:])
+      except ValueError:
+        quality = 0.0
+    if token:
+      offered[token.strip().lower()] = quality
+
+  candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+  wildcard = offered.get("*", 0.0)
+  best: Optional[str] = None
+  best_quality = 0.0
+  for coding in candidates:
+    quality = offered.get(coding, wildcard)
+    if quality > best_quality:
+      best, best_quality = coding, quality
+  return best
+
+
+def _compress(body: bytes, coding: str, gzip_level: int, brotli_quality: int) -> bytes:
+  if coding == "br":
+    return brotli.compress(body, quality=brotli_quality)
+  return gzip.compress(body, compresslevel=gzip_level)
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+  # Each content-coding is its own representation, so it cannot share a strong validator
+  # with the identity body (RFC 9110 8.8.3). If-None-Match compares weakly, so 304s still work.
+  etag = headers.get("etag")
+  if etag and not etag.startswith("W/"):
+    headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+  """Negotiate br/gzip for buffered responses and record bytes saved per endpoint.
+
+  Streaming responses (more than one body chunk) are passed through untouched. Compressed
+  responses, and 304s to clients that accept a coding, carry a weak ``ETag``.
+  """
+
+  def __init__(
+    self,
+    app: ASGIApp,
+    *,
+    minimum_size: int = 1024,
+    gzip_level: int = 5,
+    brotli_quality: int = 4,
+  ) -> None:
+    self.app = app
+    self.minimum_size = minimum_size
+    self.gzip_level = gzip_level
+    self.brotli_quality = brotli_quality
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    coding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+    start_message: Optional[Message] = None
+    passthrough = False
+
+    async def send_wrapper(message: Message) -> None:
+      nonlocal start_message, passthrough
+      if message["type"] == "http.response.start":
+        start_message = message
+        return
+      if message["type"] != "http.response.body" or passthrough:
+        await send(message)
+        return
+
+      assert start_message is not None
+      body = message.get("body", b"")
+      if message.get("more_body", False):
+        passthrough = True
+        await send(start_message)
+        await send(message)
+        return
+
+      headers = MutableHeaders(raw=start_message["headers"])
+      content_type = headers.get("content-type", "")
+      compressible = (
+        coding is not None
+        and start_message["status"] not in (204, 304)
+        and scope.get("method") != "HEAD"
+        and "content-encoding" not in headers
+        and len(body) >= self.minimum_size
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+      )
+      sent = body
+      if compressible:
+        sent = _compress(body, coding, self.gzip_level, self.brotli_quality)
+        headers["Content-Encoding"] = coding
+        headers["Content-Length"] = str(len(sent))
+        headers.add_vary_header("Accept-Encoding")
+        _weaken_etag(headers)
+      elif content_type.startswith(COMPRESSIBLE_TYPES):
+        headers.add_vary_header("Accept-Encoding")
+      if start_message["status"] == 304 and coding is not None:
+        # Match the validator the client holds from the compressed 200.
+        _weaken_etag(headers)
+
+      if start_message["status"] != 304:
+        transfer_stats.record_response(endpoint_name(scope), len(body), len(sent))
+      await send(start_message)
+      await send({"type": "http.response.body", "body": sent})
+
+    await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+  """Record request latency per method, route template and status code.
+
+  Routes are labelled by their template (``/jobs/detail/{job_id}``) rather than the raw path
+  so label cardinality stays bounded; requests that match no route share one label.
+  """
+
+  def __init__(self, app: ASGIApp) -> None:
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    status = 500
+    started = time.perf_counter()
+
+    async def send_wrapper(message: Message) -> None:
+      nonlocal status
+      if message["type"] == "http.response.start":
+        status = message["status"]
+      await send(message)
+
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      HTTP_REQUESTS_IN_FLIGHT.dec()
+      route = scope.get("route")
+      template = getattr(route, "path", None) or UNMATCHED_ROUTE
+      HTTP_REQUEST_DURATION.observe(
+        time.perf_counter() - started,
+        (scope.get("method", ""), template, str(status)),
+      )
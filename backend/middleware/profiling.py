@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.admin_auth import admin_token_matches
+from services.profiler import SamplingProfiler, profile_store, profiler_lock
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfilingMiddleware:
+  """Profile a single request when it carries ``X-Profile: 1`` and a valid ``X-Admin-Token``.
+
+  The profile is kept in memory and its id returned in ``X-Profile-Id``; fetch it from
+  ``/admin/profile/{id}``. The sampler sees the whole event loop thread, so requests running
+  concurrently on this worker show up in the same profile. Requests without the header only
+  pay for a scan of the raw header list.
+  """
+
+  def __init__(self, app: ASGIApp) -> None:
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http" or not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+      await self.app(scope, receive, send)
+      return
+
+    headers = Headers(scope=scope)
+    if headers.get("x-profile") != "1" or not admin_token_matches(headers.get("x-admin-token")) or profiler_lock.locked():
+      await self.app(scope, receive, send)
+      return
+
+    async with profiler_lock:
+      profiler = SamplingProfiler(interval=0.001)
+      profile_id = profiler.profile.id
+
+      async def send_wrapper(message: Message) -> None:
+        if message["type"] == "http.response.start":
+          MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+        await send(message)
+
+      with profiler:
+        await self.app(scope, receive, send_wrapper)
+      profile_store.add(profiler.profile)
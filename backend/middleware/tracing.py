@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.tracing import start_trace
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+class TracingMiddleware:
+  """Open a root span per request and return its trace id in ``X-Trace-Id``.
+
+  An incoming W3C ``traceparent`` header is honoured so the request joins the caller's trace.
+  """
+
+  def __init__(self, app: ASGIApp) -> None:
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    method = scope.get("method", "")
+    traceparent = Headers(scope=scope).get("traceparent")
+    with start_trace(f"{method} {scope.get('path', '')}", traceparent=traceparent) as (trace_id, root):
+
+      async def send_wrapper(message: Message) -> None:
+        if message["type"] == "http.response.start":
+          MutableHeaders(scope=message)[TRACE_ID_HEADER] = trace_id
+          root.set_attribute("http.status_code", message["status"])
+        await send(message)
+
+      root.set_attribute("http.method", method)
+      try:
+        await self.app(scope, receive, send_wrapper)
+      finally:
+        route = getattr(scope.get("route"), "path", None)
+        if route:
+          root.set_attribute("http.route", route)
+          root.update_name(f"{method} {route}")
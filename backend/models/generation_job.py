@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class GenerationJobStatus(BaseModel):
+  job_id: uuid.UUID
+  kind: str
+  status: Literal["queued", "running", "succeeded", "failed"]
+  attempts: int
+  error: Optional[str] = None
+  created_at: datetime
+  started_at: Optional[datetime] = None
+  finished_at: Optional[datetime] = None
+  status_url: str
+  result_url: str
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -16,6 +16,8 @@ class SavedJobItem(BaseModel):
   job_id: str
   saved_at: datetime
   job: JobListing
+  expired: bool = False
+  refreshed_at: Optional[datetime] = None
 
 
 class SavedJobsResponse(BaseModel):
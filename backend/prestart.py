@@ -0,0 +1,63 @@
+"""Container prestart: wait for Postgres, then apply migrations, in a single interpreter.
+
+Run from backend/ (the Docker entrypoint does this before starting uvicorn):
+
+  python -m prestart
+
+The DB probe and ``alembic upgrade head`` share one process, so SQLAlchemy, asyncpg and the
+models are imported once instead of once per probe attempt plus once more for the alembic CLI.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from alembic import command
+from alembic.config import Config
+
+from config import env_float
+from db.database import dispose_db, ping_database
+
+DB_WAIT_TIMEOUT_SECONDS = env_float("DB_WAIT_TIMEOUT_SECONDS", 0.0)  # 0 waits indefinitely
+DB_WAIT_INTERVAL_SECONDS = env_float("DB_WAIT_INTERVAL_SECONDS", 1.0)
+DB_PING_TIMEOUT_SECONDS = 5.0
+
+
+async def wait_for_database(timeout: float = DB_WAIT_TIMEOUT_SECONDS, interval: float = DB_WAIT_INTERVAL_SECONDS) -> None:
+  """Ping until Postgres answers; with a positive ``timeout``, re-raise the last error once it passes."""
+  deadline = time.monotonic() + timeout if timeout > 0 else None
+  try:
+    while True:
+      try:
+        await ping_database(DB_PING_TIMEOUT_SECONDS)
+        return
+      except Exception as exc:
+        if deadline is not None and time.monotonic() >= deadline:
+          raise
+        print(f"Database not ready ({type(exc).__name__}), retrying in {interval:g}s...", flush=True)
+        await asyncio.sleep(interval)
+  finally:
+    await dispose_db()
+
+
+def main() -> int:
+  started = time.perf_counter()
+  print("Waiting for database...", flush=True)
+  try:
+    asyncio.run(wait_for_database())
+  except Exception as exc:
+    print(f"Database did not become ready within {DB_WAIT_TIMEOUT_SECONDS:g}s: {exc}", file=sys.stderr)
+    return 1
+  waited = time.perf_counter() - started
+
+  print("Running migrations...", flush=True)
+  command.upgrade(Config("alembic.ini"), "head")
+  migrated = time.perf_counter() - started - waited
+  print(f"Prestart finished: database wait {waited:.2f}s, migrations {migrated:.2f}s", flush=True)
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
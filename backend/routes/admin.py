@@ -0,0 +1,56 @@
+from enum import Enum
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from routes.dependencies import require_admin
+from services.profiler import MAX_PROFILE_SECONDS, profile_for, profile_store, profiler_lock, render_profile
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+class ProfileFormat(str, Enum):
+  speedscope = "speedscope"
+  collapsed = "collapsed"
+  summary = "summary"
+
+
+def _profile_response(profile, fmt: ProfileFormat):
+  if fmt == ProfileFormat.summary:
+    return {
+      "id": profile.id,
+      "samples": profile.samples,
+      "duration_seconds": round(profile.duration, 3),
+      "interval_seconds": profile.interval,
+      "top_frames": profile.top(),
+    }
+  body, media_type = render_profile(profile, fmt.value)
+  return Response(
+    content=body,
+    media_type=media_type,
+    headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.{fmt.value}"'},
+  )
+
+
+@router.get("/profile")
+async def profile_worker(
+  seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS, description="How long to sample this worker"),
+  interval_ms: float = Query(5.0, ge=1, le=100, description="Sampling interval in milliseconds"),
+  all_threads: bool = Query(False, description="Also sample threads other than the event loop (asyncio.to_thread work such as trace file writes)"),
+  format: ProfileFormat = Query(ProfileFormat.speedscope),
+):
+  """Run a time-boxed sampling profile of the worker that serves this request."""
+  if profiler_lock.locked():
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker.")
+  async with profiler_lock:
+    profile = await profile_for(seconds, interval=interval_ms / 1000, all_threads=all_threads)
+  profile_store.add(profile)
+  return _profile_response(profile, format)
+
+
+@router.get("/profile/{profile_id}")
+async def stored_profile(profile_id: str, format: ProfileFormat = Query(ProfileFormat.speedscope)):
+  """Fetch a per-request profile captured with the X-Profile header."""
+  profile = profile_store.get(profile_id)
+  if profile is None:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+  return _profile_response(profile, format)
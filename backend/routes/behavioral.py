@@ -7,16 +7,17 @@ from models.behavioral_interview import (
   BehavioralInterviewResponse,
   TranscriptionResponse,
 )
-from routes.dependencies import require_entitlement
+from routes.dependencies import admit_llm, require_entitlement
 from services.openai_client import generate_behavioral_questions, generate_behavioral_turn, transcribe_audio
+from services.resilience import CircuitOpenError
 
-router = APIRouter(prefix="/behavioral", tags=["behavioral"])
+router = APIRouter(prefix="/behavioral", tags=["behavioral"], dependencies=[Depends(admit_llm)])
 
 
 @router.post("/generate", response_model=BehavioralInterviewResponse)
 async def generate_behavioral_interview_content(payload: BehavioralInterviewRequest):
   try:
-    return generate_behavioral_questions(
+    return await generate_behavioral_questions(
       job_description=payload.job_description,
       role=payload.role,
       seniority=payload.seniority,
@@ -25,6 +26,8 @@ async def generate_behavioral_interview_content(payload: BehavioralInterviewRequ
     )
   except ValueError as exc:
     raise HTTPException(status_code=400, detail=str(exc)) from exc
+  except CircuitOpenError as exc:
+    raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(max(1, int(exc.retry_after)))}) from exc
   except Exception as exc:
     raise HTTPException(status_code=500, detail="Unable to generate behavioral questions") from exc
 
@@ -35,9 +38,15 @@ async def run_behavioral_assistant_turn(
   _entitlement=Depends(require_entitlement),
 ):
   try:
-    return generate_behavioral_turn(payload)
+    return await generate_behavioral_turn(payload)
   except ValueError as exc:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+  except CircuitOpenError as exc:
+    raise HTTPException(
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+      detail=str(exc),
+      headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    ) from exc
   except Exception as exc:
     raise HTTPException(
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -52,10 +61,16 @@ async def transcribe_behavioral_audio(
 ):
   try:
     file_bytes = await file.read()
-    text = transcribe_audio(file_bytes, filename=file.filename)
+    text = await transcribe_audio(file_bytes, filename=file.filename)
     return TranscriptionResponse(text=text)
   except ValueError as exc:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+  except CircuitOpenError as exc:
+    raise HTTPException(
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+      detail=str(exc),
+      headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    ) from exc
   except Exception as exc:
     raise HTTPException(
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,7 +1,11 @@
+from typing import AsyncIterator, Callable
+
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.database import get_db
+from services.admin_auth import admin_enabled, admin_token_matches
+from services.admission import AdmissionController, AdmissionRejected, llm_admission
 from services.entitlements import UserEntitlement, fetch_user_entitlement
 
 
@@ -19,3 +23,36 @@ async def require_entitlement(
   if not entitlement.entitled:
     raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Pro subscription required.")
   return entitlement
+
+
+def require_admin(x_admin_token: str | None = Header(None, alias="X-Admin-Token")) -> None:
+  """Guard operational endpoints; they 404 entirely when ADMIN_TOKEN is not configured."""
+  if not admin_enabled():
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+  if not admin_token_matches(x_admin_token):
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required.")
+
+
+def admission_error(exc: AdmissionRejected) -> HTTPException:
+  return HTTPException(status_code=exc.status_code, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+def admit(controller: AdmissionController) -> Callable[[], AsyncIterator[None]]:
+  """Build a dependency that holds an admission slot for the rest of the request."""
+
+  async def dependency() -> AsyncIterator[None]:
+    try:
+      granted_at = await controller.acquire()
+    except AdmissionRejected as exc:
+      raise admission_error(exc) from exc
+    try:
+      yield
+    finally:
+      controller.release(granted_at)
+
+  return dependency
+
+
+# Router- or path-level dependencies run before parameter dependencies, so queued requests
+# do not hold a DB session from ``require_entitlement`` while they wait.
+admit_llm = admit(llm_admission)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_db
+from db.models.generation_job import GenerationJob
+from db.repositories.generation_job_repository import get_generation_job
+from models.behavioral_interview import BehavioralInterviewRequest
+from models.generation_job import GenerationJobStatus
+from models.project_coach import ProjectCoachRequest
+from models.project_helper import ProjectHelperRequest
+from routes.dependencies import require_entitlement, require_user_id
+from services.generation_queue import GenerationQueueFull, submit_generation_job
+from services.http_cache import etag_matches, json_response, make_etag, not_modified
+
+router = APIRouter(prefix="/generation-jobs", tags=["generation-jobs"])
+
+# A finished result never changes, so the job id is a strong validator.
+RESULT_CACHE_CONTROL = "private, max-age=86400"
+PENDING_RETRY_AFTER = "2"
+
+
+def _status(job: GenerationJob) -> GenerationJobStatus:
+  return GenerationJobStatus(
+    job_id=job.id,
+    kind=job.kind,
+    status=job.status,
+    attempts=job.attempts,
+    error=job.last_error if job.status == "failed" else None,
+    created_at=job.created_at,
+    started_at=job.started_at,
+    finished_at=job.finished_at,
+    status_url=f"{router.prefix}/{job.id}",
+    result_url=f"{router.prefix}/{job.id}/result",
+  )
+
+
+async def _submit(
+  db: AsyncSession,
+  kind: str,
+  payload: BaseModel,
+  user_id: Optional[str],
+  idempotency_key: Optional[str],
+) -> JSONResponse:
+  try:
+    job, _created = await submit_generation_job(
+      db, kind, payload, user_id=user_id, idempotency_key=idempotency_key
+    )
+  except GenerationQueueFull as exc:
+    raise HTTPException(
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+      detail=str(exc),
+      headers={"Retry-After": str(exc.retry_after)},
+    ) from exc
+  body = _status(job)
+  return JSONResponse(
+    status_code=status.HTTP_202_ACCEPTED,
+    content=body.model_dump(mode="json"),
+    headers={"Location": body.status_url},
+  )
+
+
+async def _load(db: AsyncSession, job_id: uuid.UUID, user_id: Optional[str]) -> GenerationJob:
+  job = await get_generation_job(db, job_id)
+  # Jobs submitted with X-User-Id are only visible to that user; the rest are reachable by id alone.
+  if job is None or (job.user_id is not None and job.user_id != user_id):
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Generation job not found.")
+  return job
+
+
+@router.post("/project-helper", status_code=status.HTTP_202_ACCEPTED, response_model=GenerationJobStatus)
+async def submit_project_helper(
+  payload: ProjectHelperRequest,
+  user_id: Optional[str] = Header(None, alias="X-User-Id"),
+  idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+  db: AsyncSession = Depends(get_db),
+):
+  return await _submit(db, "project_helper", payload, user_id, idempotency_key)
+
+
+@router.post("/behavioral-questions", status_code=status.HTTP_202_ACCEPTED, response_model=GenerationJobStatus)
+async def submit_behavioral_questions(
+  payload: BehavioralInterviewRequest,
+  user_id: Optional[str] = Header(None, alias="X-User-Id"),
+  idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+  db: AsyncSession = Depends(get_db),
+):
+  return await _submit(db, "behavioral_questions", payload, user_id, idempotency_key)
+
+
+@router.post("/project-coach", status_code=status.HTTP_202_ACCEPTED, response_model=GenerationJobStatus)
+async def submit_project_coach(
+  payload: ProjectCoachRequest,
+  user_id: str = Depends(require_user_id),
+  _entitlement=Depends(require_entitlement),
+  idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+  db: AsyncSession = Depends(get_db),
+):
+  return await _submit(db, "project_coach", payload, user_id, idempotency_key)
+
+
+@router.get("/{job_id}", response_model=GenerationJobStatus)
+async def generation_job_status(
+  job_id: uuid.UUID,
+  user_id: Optional[str] = Header(None, alias="X-User-Id"),
+  db: AsyncSession = Depends(get_db),
+):
+  return _status(await _load(db, job_id, user_id))
+
+
+@router.get("/{job_id}/result")
+async def generation_job_result(
+  request: Request,
+  job_id: uuid.UUID,
+  user_id: Optional[str] = Header(None, alias="X-User-Id"),
+  db: AsyncSession = Depends(get_db),
+) -> Response:
+  """The stored generation once it has succeeded; 202 with the job status while it is pending."""
+  job = await _load(db, job_id, user_id)
+  if job.status == "failed":
+    raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Generation failed: {job.last_error}")
+  if job.status != "succeeded":
+    return JSONResponse(
+      status_code=status.HTTP_202_ACCEPTED,
+      content=_status(job).model_dump(mode="json"),
+      headers={"Retry-After": PENDING_RETRY_AFTER},
+    )
+  etag = make_etag("generation-jobs.result", job.id)
+  if etag_matches(request, etag):
+    return not_modified(request, etag, RESULT_CACHE_CONTROL)
+  body = json.dumps(job.result, separators=(",", ":")).encode()
+  return json_response(request, body, etag=etag, cache_control=RESULT_CACHE_CONTROL)
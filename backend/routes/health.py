@@ -1,13 +1,44 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
-from db.database import get_db
+from services.health import CHECK_INTERVAL_SECONDS, health_monitor
 
 router = APIRouter(tags=["health"])
 
+NOT_READY_RETRY_AFTER = str(max(1, int(CHECK_INTERVAL_SECONDS)))
 
-@router.get("/healthz")
-async def health_check(db: AsyncSession = Depends(get_db)):
-  await db.execute(text("SELECT 1"))
+
+def _readiness_response() -> JSONResponse:
+  ready, body = health_monitor.readiness()
+  if ready:
+    return JSONResponse(body)
+  return JSONResponse(body, status_code=503, headers={"Retry-After": NOT_READY_RETRY_AFTER})
+
+
+@router.get("/livez")
+async def liveness():
+  """Process is up and the event loop is serving requests; performs no I/O."""
   return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readiness():
+  """Whether this worker should receive traffic, from state cached by the background checker.
+
+  503 means "route elsewhere for now" (pool saturated, loop lagging, DB unreachable), not
+  "restart me"; point liveness probes at /livez.
+  """
+  return _readiness_response()
+
+
+@router.get("/healthz")
+async def health_check():
+  """Backwards-compatible alias of /readyz; no longer checks out a pooled connection."""
+  return _readiness_response()
+
+
+@router.get("/healthz/deep")
+async def deep_health_check():
+  """Run a live DB round trip on the unpooled probe engine, then report full readiness."""
+  await health_monitor.check_database()
+  return _readiness_response()
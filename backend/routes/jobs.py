@@ -1,17 +1,38 @@
+import uuid
 from enum import Enum
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 
-from db.database import get_db
-from db.repositories.job_search_repository import cache_job_search_result, get_cached_search
+from db.database import SessionLocal
+from db.repositories.job_search_repository import get_cached_search_entry
 from models.jobs import JobDetailResponse, JobSearchResponse
+from routes.dependencies import admission_error
+from services.admission import AdmissionRejected, search_admission
+from services.http_cache import etag_matches, json_response, make_etag, not_modified
+from services.job_detail_resolver import resolve_job_detail
+from services.job_search import fetch_search_payload, store_search_payload
+from services.listing_views import (
+  ListingView,
+  cached_view_body,
+  project_listings,
+  resolve_fields,
+  view_etag_parts,
+  within_summary,
+)
+from services.metrics import record_cache
+from services.search_normalization import canonical_location, canonical_query, canonical_terms
+from services.search_popularity import search_popularity
+from services.serpapi_budget import STALE_CACHE_TTL_SECONDS, serpapi_budget
 from services.serpapi_client import (
+  SerpAPIBudgetExceeded,
   SerpAPIError,
-  fetch_job_detail_from_serpapi,
-  fetch_jobs_from_serpapi,
+  SerpAPIRateLimited,
+  SerpAPITransientError,
+  SerpAPIUnavailable,
 )
+from services.tracing import span
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -28,21 +49,73 @@ class SeniorityFilter(str, Enum):
   lead = "lead"
 
 
-EMPLOYMENT_TYPE_TO_SERP = {
-  EmploymentFilter.full_time: "FULLTIME",
-  EmploymentFilter.internship: "INTERN",
-}
+_PAYLOAD_ADAPTER = TypeAdapter(dict[str, Any])
+
+
+SEARCH_CACHE_CONTROL = "public, max-age=300"
+STALE_SEARCH_CACHE_CONTROL = "public, max-age=60"
+DETAIL_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _search_response(
+  request: Request,
+  payload: dict[str, Any],
+  cache_row_id: uuid.UUID,
+  cache_control: str = SEARCH_CACHE_CONTROL,
+  fields: Optional[tuple[str, ...]] = None,
+) -> Response:
+  """Serialize an already-validated search payload, skipping FastAPI's response_model re-validation.
+
+  Cache rows are immutable, so the row id (plus the projected field set) is a strong
+  validator and a matching If-None-Match is answered with 304 before the payload is encoded.
+  """
+  etag = make_etag("jobs.search", cache_row_id, *view_etag_parts(fields))
+  if etag_matches(request, etag):
+    return not_modified(request, etag, cache_control)
+  if fields is None:
+    with span("jobs.search.serialize"):
+      body = _PAYLOAD_ADAPTER.dump_json(payload)
+  else:
+
+    def build() -> bytes:
+      with span("jobs.search.serialize"):
+        return _PAYLOAD_ADAPTER.dump_json({**payload, "jobs": project_listings(payload.get("jobs") or [], fields)})
+
+    body = cached_view_body(etag, build)
+  return json_response(request, body, etag=etag, cache_control=cache_control)
+
+
+async def _stale_search_response(
+  request: Request,
+  cache_key: dict[str, Any],
+  fields: Optional[tuple[str, ...]] = None,
+) -> Optional[Response]:
+  """Serve an expired cache entry when SerpAPI is over budget, rate limited or unavailable."""
+  async with SessionLocal() as db:
+    stale_entry = await get_cached_search_entry(
+      db, **cache_key, cache_ttl_seconds=STALE_CACHE_TTL_SECONDS, summary=within_summary(fields)
+    )
+  if not stale_entry:
+    return None
+  record_cache("job_search", "stale")
+  serpapi_budget.record_degraded()
+  response = _search_response(
+    request, stale_entry.response_payload, stale_entry.id, STALE_SEARCH_CACHE_CONTROL, fields
+  )
+  response.headers["Warning"] = '110 - "Response is Stale"'
+  return response
 
-SENIORITY_TO_KEYWORD = {
-  SeniorityFilter.entry: "entry level",
-  SeniorityFilter.mid: "mid level",
-  SeniorityFilter.senior: "senior level",
-  SeniorityFilter.lead: "lead engineer",
-}
+
+def _client_ip(request: Request) -> Optional[str]:
+  forwarded = request.headers.get("x-forwarded-for")
+  if forwarded:
+    return forwarded.split(",")[0].strip() or None
+  return request.client.host if request.client else None
 
 
 @router.get("/search", response_model=JobSearchResponse)
 async def search_jobs(
+  request: Request,
   q: str = Query("", description="Job keywords to search"),
   location: str = Query("", description="Location to anchor the search"),
   page: int = Query(1, ge=1, description="Pagination index (1-based)"),
@@ -57,59 +130,80 @@ async def search_jobs(
     None,
     description="Optional seniority filters such as entry, mid, senior, lead.",
   ),
-  db: AsyncSession = Depends(get_db),
+  view: ListingView = Query(
+    ListingView.full,
+    description="summary returns only the listing fields list views render; full returns every field.",
+  ),
+  fields: Optional[str] = Query(
+    None,
+    description="Comma-separated listing fields to return (e.g. title,company,salary); overrides view.",
+  ),
+  user_id: Optional[str] = Header(None, alias="X-User-Id"),
 ):
+  # No request-scoped session here: the cache read and the cache write each check out a
+  # connection briefly, so none is held (idle in transaction) while SerpAPI pages load.
   try:
-    normalized_roles = [role.strip() for role in (roles or []) if role and role.strip()]
-    normalized_seniority = [choice.value for choice in (seniority or [])]
-    serp_employment = EMPLOYMENT_TYPE_TO_SERP.get(employment_type) if employment_type else None
-    seniority_keywords = [SENIORITY_TO_KEYWORD[choice] for choice in (seniority or []) if choice in SENIORITY_TO_KEYWORD]
-
-    if not q.strip():
+    listing_fields = resolve_fields(view, fields)
+    # One canonical form feeds both the cache key and the SerpAPI call, so spellings of
+    # the same search share a cache row.
+    query = canonical_query(q)
+    normalized_roles = canonical_terms(roles)
+    normalized_seniority = sorted({choice.value for choice in (seniority or [])})
+
+    if not query:
       raise HTTPException(status_code=400, detail="Query must be provided to search jobs.")
 
-    location_value = location.strip() or "United States"
-
-    cached_payload = await get_cached_search(
-      db,
-      query=q,
-      location=location_value,
-      page=page,
-      employment_type=employment_type.value if employment_type else None,
-      roles=normalized_roles or None,
-      seniority_filters=normalized_seniority or None,
-    )
-    if cached_payload:
-      return JobSearchResponse(**cached_payload)
-
-    jobs = await fetch_jobs_from_serpapi(
-      q,
-      location_value,
-      page,
-      employment_type=serp_employment,
-      role_keywords=normalized_roles or None,
-      seniority_keywords=seniority_keywords or None,
-    )
-    response = JobSearchResponse(
-      query=q,
-      location=location_value,
-      page=page,
-      employment_type=employment_type.value if employment_type else None,
-      role_filters=normalized_roles,
-      seniority_filters=normalized_seniority,
-      jobs=jobs,
-    )
-    await cache_job_search_result(
-      db,
-      query=q,
-      location=location_value,
-      page=page,
-      employment_type=employment_type.value if employment_type else None,
-      roles=normalized_roles or None,
-      seniority_filters=normalized_seniority or None,
-      payload=response.model_dump(),
-    )
-    return response
+    location_value = canonical_location(location)
+
+    cache_key = {
+      "query": query,
+      "location": location_value,
+      "page": page,
+      "employment_type": employment_type.value if employment_type else None,
+      "roles": normalized_roles or None,
+      "seniority_filters": normalized_seniority or None,
+    }
+    search_popularity.record(cache_key)
+    async with SessionLocal() as db:
+      cached_entry = await get_cached_search_entry(db, **cache_key, summary=within_summary(listing_fields))
+    if cached_entry:
+      record_cache("job_search", "hit")
+      return _search_response(request, cached_entry.response_payload, cached_entry.id, fields=listing_fields)
+    record_cache("job_search", "miss")
+
+    client_ip = _client_ip(request)
+    degraded = serpapi_budget.near_exhausted()
+    admitted = not degraded and serpapi_budget.admit(user_id=user_id, client_ip=client_ip, cost=page)
+    if not admitted:
+      stale_response = await _stale_search_response(request, cache_key, listing_fields)
+      if stale_response:
+        return stale_response
+      if degraded:
+        # Budget is low but there is nothing stale to serve; spend upstream calls sparingly.
+        admitted = serpapi_budget.admit(user_id=user_id, client_ip=client_ip, cost=page)
+      if not admitted:
+        retry_after = serpapi_budget.retry_after(user_id=user_id, client_ip=client_ip, cost=page)
+        raise SerpAPIRateLimited("Too many job searches; slow down.", retry_after=retry_after)
+
+    try:
+      async with search_admission.slot():
+        payload = await fetch_search_payload(cache_key)
+    except (SerpAPIUnavailable, SerpAPITransientError, AdmissionRejected):
+      stale_response = await _stale_search_response(request, cache_key, listing_fields)
+      if stale_response:
+        return stale_response
+      raise
+
+    cache_row_id = await store_search_payload(SessionLocal, cache_key, payload)
+    return _search_response(request, payload, cache_row_id, fields=listing_fields)
+  except AdmissionRejected as exc:
+    raise admission_error(exc) from exc
+  except SerpAPIRateLimited as exc:
+    raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
+  except SerpAPIBudgetExceeded as exc:
+    raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "3600"}) from exc
+  except SerpAPIUnavailable as exc:
+    raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
   except SerpAPIError as exc:
     raise HTTPException(status_code=502, detail=f"SerpAPI error: {exc}") from exc
   except ValueError as exc:
@@ -119,9 +213,17 @@ async def search_jobs(
 
 
 @router.get("/detail/{job_id}", response_model=JobDetailResponse)
-async def job_detail(job_id: str):
+async def job_detail(request: Request, job_id: str):
   try:
-    job = await fetch_job_detail_from_serpapi(job_id)
+    job = await resolve_job_detail(SessionLocal, job_id)
+  except AdmissionRejected as exc:
+    raise admission_error(exc) from exc
+  except SerpAPIRateLimited as exc:
+    raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
+  except SerpAPIBudgetExceeded as exc:
+    raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "3600"}) from exc
+  except SerpAPIUnavailable as exc:
+    raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
   except SerpAPIError as exc:
     raise HTTPException(status_code=502, detail=f"SerpAPI error: {exc}") from exc
   except ValueError as exc:
@@ -132,4 +234,9 @@ async def job_detail(job_id: str):
   if not job:
     raise HTTPException(status_code=404, detail="Job not found")
 
-  return JobDetailResponse(job=job)
+  with span("jobs.detail.serialize"):
+    body = JobDetailResponse(job=job).model_dump_json().encode()
+  etag = make_etag(body)
+  if etag_matches(request, etag):
+    return not_modified(request, etag, DETAIL_CACHE_CONTROL)
+  return json_response(request, body, etag=etag, cache_control=DETAIL_CACHE_CONTROL)
@@ -0,0 +1,88 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.admission import CONTROLLERS
+from services.cache_warmer import cache_warmer
+from services.generation_queue import generation_pool
+from services.metrics import REGISTRY, register_callback_gauge
+from services.openai_client import openai_upstream
+from services.saved_job_refresher import saved_job_refresher
+from services.search_popularity import search_popularity
+from services.serpapi_budget import serpapi_budget
+from services.serpapi_client import serpapi_upstream
+from services.stripe_client import stripe_upstream
+from services.transfer_stats import transfer_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UPSTREAMS = (serpapi_upstream, openai_upstream, stripe_upstream)
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+register_callback_gauge(
+  "serpapi_searches_today",
+  "SerpAPI searches counted against today's budget.",
+  lambda: serpapi_budget.used_today,
+)
+register_callback_gauge(
+  "serpapi_daily_budget",
+  "Configured daily SerpAPI search budget (0 means unlimited).",
+  lambda: serpapi_budget.daily_budget,
+)
+register_callback_gauge(
+  "upstream_circuit_state",
+  "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open).",
+  lambda: [((upstream.policy.name,), CIRCUIT_STATES[upstream.breaker.state]) for upstream in UPSTREAMS],
+  ("provider",),
+)
+register_callback_gauge(
+  "generation_workers_busy",
+  "Generation jobs this process is running right now.",
+  lambda: generation_pool.busy,
+)
+
+
+@router.get("", response_class=PlainTextResponse)
+async def prometheus_metrics():
+  """Prometheus text exposition of this worker's metrics."""
+  return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/serpapi-quota")
+async def serpapi_quota():
+  """Live SerpAPI usage and rate-limiter state for dashboards."""
+  return serpapi_budget.snapshot()
+
+
+@router.get("/upstreams")
+async def upstream_resilience():
+  """Circuit breaker, retry and hedging state for each upstream client."""
+  return {"upstreams": [upstream.snapshot() for upstream in UPSTREAMS]}
+
+
+@router.get("/admission")
+async def admission():
+  """Slots, queue depth and limits for each admission-controlled route class."""
+  return {controller.name: controller.snapshot() for controller in CONTROLLERS}
+
+
+@router.get("/cache-warmer")
+async def cache_warming():
+  """Cache warmer settings, its last cycle on this worker and pending popularity counts."""
+  return {
+    **cache_warmer.snapshot(),
+    "popularity_pending_keys": search_popularity.pending_keys,
+    "popularity_dropped_records": search_popularity.dropped_count,
+  }
+
+
+@router.get("/saved-job-refresh")
+async def saved_job_refresh():
+  """Saved job refresher settings and its last cycle on this worker."""
+  return saved_job_refresher.snapshot()
+
+
+@router.get("/transfer")
+async def transfer():
+  """Bytes saved per endpoint by response compression and 304 Not Modified answers."""
+  return {"endpoints": transfer_stats.snapshot()}
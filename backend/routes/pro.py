@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from models.project_coach import ProjectCoachRequest, ProjectCoachResponse
-from routes.dependencies import require_entitlement, require_user_id
+from routes.dependencies import admit_llm, require_entitlement, require_user_id
 from services.openai_client import generate_project_coach_response
+from services.resilience import CircuitOpenError
 
-router = APIRouter(prefix="/pro", tags=["pro"])
+router = APIRouter(prefix="/pro", tags=["pro"], dependencies=[Depends(admit_llm)])
 
 
 @router.post("/project-coach", response_model=ProjectCoachResponse)
@@ -14,9 +15,15 @@ async def project_coach(
   _entitlement=Depends(require_entitlement),
 ):
   try:
-    return generate_project_coach_response(payload, user_id=user_id)
+    return await generate_project_coach_response(payload, user_id=user_id)
   except ValueError as exc:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+  except CircuitOpenError as exc:
+    raise HTTPException(
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+      detail=str(exc),
+      headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    ) from exc
   except Exception as exc:
     raise HTTPException(
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
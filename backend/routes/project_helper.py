@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from models.project_helper import ProjectHelperRequest, ProjectHelperResponse
+from routes.dependencies import admit_llm
 from services.openai_client import generate_project_helper
+from services.resilience import CircuitOpenError
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(admit_llm)])
 
 @router.post("/generate/project-helper", response_model=ProjectHelperResponse)
 async def project_helper(request: ProjectHelperRequest):
     try:
-        result = generate_project_helper(request.job_description, request.role)
+        result = await generate_project_helper(request.job_description, request.role)
         return result
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, int(e.retry_after)))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
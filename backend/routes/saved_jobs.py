@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.database import get_db
@@ -13,9 +16,23 @@ from db.repositories.saved_job_repository import (
 from models.jobs import JobListing
 from models.saved_job import SaveJobRequest, SavedJobItem, SavedJobsResponse
 from routes.dependencies import require_user_id
+from services.http_cache import etag_matches, json_response, make_etag, not_modified
+from services.listing_views import (
+  ListingView,
+  cached_view_body,
+  project_listing,
+  resolve_fields,
+  view_etag_parts,
+  within_summary,
+)
 
 router = APIRouter(prefix="/jobs/saved", tags=["jobs", "saved"])
 
+# Saved jobs are per-user and change on save/delete: keep them out of shared caches and always revalidate.
+SAVED_CACHE_CONTROL = "private, no-cache"
+
+_PAYLOAD_ADAPTER = TypeAdapter(dict[str, Any])
+
 
 def _to_item(record) -> SavedJobItem:
   job_payload = record.job_data or {}
@@ -25,20 +42,66 @@ def _to_item(record) -> SavedJobItem:
     job_id=record.job_id,
     saved_at=record.created_at,
     job=JobListing(**job_payload),
+    expired=record.expired,
+    refreshed_at=record.refreshed_at,
   )
 
 
+def _to_sparse_item(record, fields: tuple[str, ...]) -> dict[str, Any]:
+  """Projected item built from the stored dict, skipping JobListing validation."""
+  job_payload = record.job_data or {}
+  if "job_id" not in job_payload and record.job_id:
+    job_payload = {**job_payload, "job_id": record.job_id}
+  return {
+    "job_id": record.job_id,
+    "saved_at": record.created_at,
+    "job": project_listing(job_payload, fields),
+    "expired": record.expired,
+    "refreshed_at": record.refreshed_at,
+  }
+
+
 @router.get("", response_model=SavedJobsResponse)
 async def list_saved_jobs(
+  request: Request,
+  view: ListingView = Query(
+    ListingView.full,
+    description="summary returns only the listing fields list views render; full returns every field.",
+  ),
+  fields: Optional[str] = Query(
+    None,
+    description="Comma-separated listing fields to return (e.g. title,company,salary); overrides view.",
+  ),
   user_id: str = Depends(require_user_id),
   db: AsyncSession = Depends(get_db),
 ):
-  records = await list_saved_jobs_for_user(db, user_id)
-  return SavedJobsResponse(jobs=[_to_item(record) for record in records])
+  try:
+    listing_fields = resolve_fields(view, fields)
+  except ValueError as exc:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+  records = await list_saved_jobs_for_user(db, user_id, summary=within_summary(listing_fields))
+  # Validator from row versions only, so a revalidation hit skips building and encoding the items.
+  etag = make_etag(
+    "jobs.saved",
+    user_id,
+    *view_etag_parts(listing_fields),
+    *(f"{record.job_id}@{record.updated_at.isoformat()}" for record in records),
+  )
+  if etag_matches(request, etag):
+    return not_modified(request, etag, SAVED_CACHE_CONTROL)
+  if listing_fields is None:
+    body = SavedJobsResponse(jobs=[_to_item(record) for record in records]).model_dump_json().encode()
+  else:
+    body = cached_view_body(
+      etag,
+      lambda: _PAYLOAD_ADAPTER.dump_json({"jobs": [_to_sparse_item(record, listing_fields) for record in records]}),
+    )
+  return json_response(request, body, etag=etag, cache_control=SAVED_CACHE_CONTROL)
 
 
 @router.get("/{job_id}", response_model=SavedJobItem)
 async def retrieve_saved_job(
+  request: Request,
   job_id: str,
   user_id: str = Depends(require_user_id),
   db: AsyncSession = Depends(get_db),
@@ -46,7 +109,11 @@ async def retrieve_saved_job(
   record = await get_saved_job(db, user_id, job_id)
   if not record:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved job not found")
-  return _to_item(record)
+  etag = make_etag("jobs.saved.item", user_id, record.job_id, record.updated_at.isoformat())
+  if etag_matches(request, etag):
+    return not_modified(request, etag, SAVED_CACHE_CONTROL)
+  body = _to_item(record).model_dump_json().encode()
+  return json_response(request, body, etag=etag, cache_control=SAVED_CACHE_CONTROL)
 
 
 @router.post("", response_model=SavedJobItem, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import secrets
+from typing import Optional
+
+from config import get_settings
+
+
+def admin_enabled() -> bool:
+  """Admin endpoints stay disabled unless ADMIN_TOKEN is configured."""
+  return bool(get_settings().admin_token)
+
+
+def admin_token_matches(candidate: Optional[str]) -> bool:
+  expected = get_settings().admin_token
+  if not expected or not candidate:
+    return False
+  return secrets.compare_digest(candidate.encode(), expected.encode())
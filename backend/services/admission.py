@@ -0,0 +1,205 @@
+"""Admission control for expensive routes.
+
+LLM calls and cold job searches hold a worker slot and often a pooled DB connection for
+seconds. Each route class gets an ``AdmissionController``: a concurrency limit, a bounded
+FIFO queue and a queue deadline. Requests beyond the queue are rejected immediately with
+429, requests that wait past the deadline get 503, and both carry ``Retry-After``.
+
+Cheap routes (``/billing/status``, ``/jobs/saved``, probes) are never admitted through a
+controller. They get priority in two ways. The default limits keep the expensive classes
+together below the worker's DB pool capacity minus ``ADMISSION_RESERVED_CONNECTIONS``.
+Expensive requests are also shed before queueing while the pool or event loop is already
+under pressure.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from config import env_bool, env_float, env_int
+from db.database import MAX_OVERFLOW, POOL_SIZE, pool_saturation
+from services.metrics import REGISTRY, Counter, Histogram, event_loop_monitor, register_callback_gauge
+
+ADMISSION_ENABLED = env_bool("ADMISSION_ENABLED", True)
+RESERVED_CONNECTIONS = max(0, env_int("ADMISSION_RESERVED_CONNECTIONS", 2))
+SHED_POOL_SATURATION = env_float("ADMISSION_SHED_POOL_SATURATION", 0.85)
+SHED_LOOP_LAG_SECONDS = env_float("ADMISSION_SHED_LOOP_LAG_SECONDS", 0.25)
+MAX_RETRY_AFTER_SECONDS = 60
+QUEUE_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Expensive classes share whatever pool capacity is not reserved for cheap routes.
+_EXPENSIVE_CAPACITY = max(2, POOL_SIZE + MAX_OVERFLOW - RESERVED_CONNECTIONS)
+
+ADMISSION_REJECTED = REGISTRY.register(
+  Counter(
+    "admission_rejected_total",
+    "Requests turned away by admission control (queue_full, deadline, overloaded).",
+    ("route_class", "reason"),
+  )
+)
+ADMISSION_QUEUE_WAIT = REGISTRY.register(
+  Histogram("admission_queue_wait_seconds", "Time admitted requests spent queued.", ("route_class",), QUEUE_WAIT_BUCKETS)
+)
+
+
+class AdmissionRejected(Exception):
+  """Raised instead of queueing when a route class is saturated."""
+
+  def __init__(self, route_class: str, reason: str, status_code: int, retry_after: int) -> None:
+    super().__init__(f"{route_class} capacity exhausted ({reason}); retry shortly")
+    self.route_class = route_class
+    self.reason = reason
+    self.status_code = status_code
+    self.retry_after = retry_after
+
+
+def under_pressure() -> bool:
+  """True when the worker is already struggling; new expensive work would only make it worse."""
+  return pool_saturation() >= SHED_POOL_SATURATION or event_loop_monitor.lag >= SHED_LOOP_LAG_SECONDS
+
+
+class AdmissionController:
+  """Concurrency limit with a bounded FIFO queue and a queueing deadline."""
+
+  def __init__(
+    self,
+    name: str,
+    *,
+    max_concurrent: int,
+    max_queue: int,
+    queue_timeout: float,
+    enabled: bool = True,
+    pressure: Optional[Callable[[], bool]] = under_pressure,
+  ) -> None:
+    self.name = name
+    self.max_concurrent = max(1, max_concurrent)
+    self.max_queue = max(0, max_queue)
+    self.queue_timeout = queue_timeout
+    self.enabled = enabled
+    self.pressure = pressure
+    self.active = 0
+    self._waiters: deque[asyncio.Future] = deque()
+    # Smoothed time a request holds a slot; drives the Retry-After estimate.
+    self.hold_seconds = 1.0
+
+  @property
+  def queued(self) -> int:
+    return len(self._waiters)
+
+  def retry_after(self) -> int:
+    """Seconds until the current queue should have drained."""
+    estimate = self.hold_seconds * (self.queued + 1) / self.max_concurrent
+    return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(estimate)))
+
+  def _reject(self, reason: str, status_code: int) -> AdmissionRejected:
+    ADMISSION_REJECTED.inc((self.name, reason))
+    return AdmissionRejected(self.name, reason, status_code, self.retry_after())
+
+  async def acquire(self) -> float:
+    """Wait for a slot and return the time it was granted; raises ``AdmissionRejected``."""
+    if not self.enabled:
+      return time.perf_counter()
+    if self.active < self.max_concurrent and not self._waiters:
+      self.active += 1
+      return time.perf_counter()
+    if self.pressure is not None and self.pressure():
+      raise self._reject("overloaded", 503)
+    if len(self._waiters) >= self.max_queue:
+      raise self._reject("queue_full", 429)
+
+    queued_at = time.perf_counter()
+    waiter = asyncio.get_running_loop().create_future()
+    self._waiters.append(waiter)
+    try:
+      await asyncio.wait((waiter,), timeout=self.queue_timeout)
+    except asyncio.CancelledError:
+      # Client went away while queued; hand a slot we were just given to the next waiter.
+      if waiter.done() and not waiter.cancelled():
+        self._release_slot()
+      else:
+        waiter.cancel()
+        self._discard(waiter)
+      raise
+    if not waiter.done():
+      waiter.cancel()
+      self._discard(waiter)
+      raise self._reject("deadline", 503)
+    granted_at = time.perf_counter()
+    ADMISSION_QUEUE_WAIT.observe(granted_at - queued_at, (self.name,))
+    return granted_at
+
+  def release(self, granted_at: float) -> None:
+    if not self.enabled:
+      return
+    self.hold_seconds = 0.8 * self.hold_seconds + 0.2 * (time.perf_counter() - granted_at)
+    self._release_slot()
+
+  def _discard(self, waiter: asyncio.Future) -> None:
+    try:
+      self._waiters.remove(waiter)
+    except ValueError:
+      pass
+
+  def _release_slot(self) -> None:
+    # Hand the slot straight to the oldest live waiter so late arrivals cannot overtake it.
+    while self._waiters:
+      waiter = self._waiters.popleft()
+      if not waiter.done():
+        waiter.set_result(None)
+        return
+    self.active -= 1
+
+  @asynccontextmanager
+  async def slot(self) -> AsyncIterator[None]:
+    granted_at = await self.acquire()
+    try:
+      yield
+    finally:
+      self.release(granted_at)
+
+  def snapshot(self) -> dict[str, float | int | bool]:
+    return {
+      "enabled": self.enabled,
+      "active": self.active,
+      "queued": self.queued,
+      "max_concurrent": self.max_concurrent,
+      "max_queue": self.max_queue,
+      "queue_timeout_seconds": self.queue_timeout,
+      "hold_seconds": round(self.hold_seconds, 3),
+    }
+
+
+def _controller(name: str, prefix: str, max_concurrent: int, max_queue: int, queue_timeout: float) -> AdmissionController:
+  return AdmissionController(
+    name,
+    max_concurrent=env_int(f"{prefix}_MAX_CONCURRENT", max_concurrent),
+    max_queue=env_int(f"{prefix}_MAX_QUEUE", max_queue),
+    queue_timeout=env_float(f"{prefix}_QUEUE_TIMEOUT_SECONDS", queue_timeout),
+    enabled=ADMISSION_ENABLED,
+  )
+
+
+_LLM_SHARE = max(1, _EXPENSIVE_CAPACITY // 2)
+llm_admission = _controller("llm", "LLM_ADMISSION", _LLM_SHARE, _LLM_SHARE * 2, 10.0)
+search_admission = _controller(
+  "upstream_search", "SEARCH_ADMISSION", max(1, _EXPENSIVE_CAPACITY - _LLM_SHARE), _EXPENSIVE_CAPACITY * 2, 5.0
+)
+CONTROLLERS = (llm_admission, search_admission)
+
+register_callback_gauge(
+  "admission_active",
+  "Requests holding an admission slot.",
+  lambda: [((controller.name,), controller.active) for controller in CONTROLLERS],
+  ("route_class",),
+)
+register_callback_gauge(
+  "admission_queued",
+  "Requests waiting for an admission slot.",
+  lambda: [((controller.name,), controller.queued) for controller in CONTROLLERS],
+  ("route_class",),
+)
@@ -0,0 +1,162 @@
+"""Refresh the most popular search cache entries before they expire.
+
+Every ``CACHE_WARM_INTERVAL_SECONDS`` one worker across the deployment (whichever takes the
+Postgres advisory lock) reads the top ``CACHE_WARM_TOP_N`` keys from ``search_popularity``.
+It re-fetches those whose cache row is missing or within ``CACHE_WARM_LEAD_SECONDS`` of the
+search TTL, spending at most ``CACHE_WARM_MAX_CALLS_PER_CYCLE`` SerpAPI page requests per
+cycle. Refreshes go through the same fetch and store path as ``/jobs/search`` and the same
+admission controller and daily budget. The warmer stops early when the budget nears
+exhaustion or the search route class is shedding load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_bool, env_float, env_int
+from db.database import advisory_lock
+from db.repositories.job_search_repository import DEFAULT_CACHE_TTL_SECONDS, get_cached_search_entry
+from db.repositories.search_popularity_repository import mark_searches_warmed, top_search_keys
+from services.admission import AdmissionRejected, search_admission
+from services.job_search import fetch_search_payload, store_search_payload
+from services.metrics import REGISTRY, Counter
+from services.search_popularity import HALF_LIFE_SECONDS, cache_key_from_row
+from services.serpapi_budget import serpapi_budget
+from services.serpapi_client import SerpAPIBudgetExceeded, SerpAPIError, SerpAPIRateLimited, SerpAPIUnavailable
+
+logger = logging.getLogger(__name__)
+
+ENABLED = env_bool("CACHE_WARM_ENABLED", True)
+INTERVAL_SECONDS = env_float("CACHE_WARM_INTERVAL_SECONDS", 300.0)
+TOP_N = env_int("CACHE_WARM_TOP_N", 50)
+MAX_CALLS_PER_CYCLE = env_int("CACHE_WARM_MAX_CALLS_PER_CYCLE", 20)
+LEAD_SECONDS = env_float("CACHE_WARM_LEAD_SECONDS", 900.0)
+MIN_SCORE = env_float("CACHE_WARM_MIN_SCORE", 2.0)
+# Arbitrary application-wide id for pg_try_advisory_lock.
+WARMER_LOCK_ID = 7_301_044
+
+CACHE_WARM = REGISTRY.register(
+  Counter(
+    "cache_warm_searches_total",
+    "Popular searches considered by the cache warmer (warmed, fresh, over_budget, error).",
+    ("outcome",),
+  )
+)
+
+
+class CacheWarmer:
+  def __init__(
+    self,
+    *,
+    enabled: bool = ENABLED,
+    interval_seconds: float = INTERVAL_SECONDS,
+    top_n: int = TOP_N,
+    max_calls_per_cycle: int = MAX_CALLS_PER_CYCLE,
+    lead_seconds: float = LEAD_SECONDS,
+    min_score: float = MIN_SCORE,
+  ) -> None:
+    self.enabled = enabled
+    self.interval_seconds = interval_seconds
+    self.top_n = top_n
+    self.max_calls_per_cycle = max_calls_per_cycle
+    self.lead_seconds = lead_seconds
+    self.min_score = min_score
+    self.last_cycle: Optional[dict[str, Any]] = None
+
+  def _due(self, created_at: Optional[datetime], now: datetime) -> bool:
+    if created_at is None:
+      return True
+    return (now - created_at).total_seconds() >= DEFAULT_CACHE_TTL_SECONDS - self.lead_seconds
+
+  async def _due_keys(
+    self,
+    session_factory: async_sessionmaker[AsyncSession],
+    now: datetime,
+  ) -> tuple[list[tuple[str, dict[str, Any]]], int]:
+    due: list[tuple[str, dict[str, Any]]] = []
+    async with session_factory() as session:
+      candidates = await top_search_keys(
+        session, limit=self.top_n, at=now, half_life_seconds=HALF_LIFE_SECONDS, min_score=self.min_score
+      )
+      for row, _score in candidates:
+        cache_key = cache_key_from_row(row)
+        # Only the age matters here, so read the small summary projection.
+        entry = await get_cached_search_entry(session, **cache_key, summary=True)
+        if self._due(entry.created_at if entry else None, now):
+          due.append((row.key_hash, cache_key))
+    return due, len(candidates)
+
+  async def warm_once(self, session_factory: async_sessionmaker[AsyncSession]) -> dict[str, Any]:
+    """Run one warming cycle if no other worker is; returns counts for the cycle."""
+    async with advisory_lock(WARMER_LOCK_ID) as acquired:
+      if not acquired:
+        return {"skipped": "locked"}
+      now = datetime.now(timezone.utc)
+      due, candidates = await self._due_keys(session_factory, now)
+      stats = {"candidates": candidates, "fresh": candidates - len(due), "warmed": 0, "over_budget": 0, "errors": 0}
+      CACHE_WARM.inc(("fresh",), stats["fresh"])
+
+      calls_left = self.max_calls_per_cycle
+      warmed: list[str] = []
+      for index, (key_hash, cache_key) in enumerate(due):
+        cost = cache_key["page"]
+        if cost > calls_left or serpapi_budget.near_exhausted():
+          stats["over_budget"] = len(due) - index
+          CACHE_WARM.inc(("over_budget",), stats["over_budget"])
+          break
+        try:
+          async with search_admission.slot():
+            payload = await fetch_search_payload(cache_key)
+          await store_search_payload(session_factory, cache_key, payload)
+        except (AdmissionRejected, SerpAPIBudgetExceeded, SerpAPIRateLimited, SerpAPIUnavailable) as exc:
+          # Searches are being shed or SerpAPI is down; user traffic comes first.
+          logger.info("Cache warming stopped early: %s", exc)
+          stats["errors"] += 1
+          CACHE_WARM.inc(("error",))
+          break
+        except SerpAPIError:
+          logger.warning("Unable to warm search %r", cache_key, exc_info=True)
+          stats["errors"] += 1
+          CACHE_WARM.inc(("error",))
+          continue
+        calls_left -= cost
+        warmed.append(key_hash)
+        CACHE_WARM.inc(("warmed",))
+
+      stats["warmed"] = len(warmed)
+      async with session_factory() as session:
+        await mark_searches_warmed(session, warmed, now)
+      return stats
+
+  async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    if not self.enabled:
+      return
+    while True:
+      await asyncio.sleep(self.interval_seconds)
+      try:
+        self.last_cycle = {"at": datetime.now(timezone.utc).isoformat(), **await self.warm_once(session_factory)}
+        logger.debug("Cache warming cycle: %s", self.last_cycle)
+      except Exception:
+        logger.exception("Cache warming cycle failed")
+
+  def snapshot(self) -> dict[str, Any]:
+    return {
+      "enabled": self.enabled,
+      "interval_seconds": self.interval_seconds,
+      "top_n": self.top_n,
+      "max_calls_per_cycle": self.max_calls_per_cycle,
+      "lead_seconds": self.lead_seconds,
+      "last_cycle": self.last_cycle,
+    }
+
+
+cache_warmer = CacheWarmer()
+
+
+async def run_cache_warmer(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  await cache_warmer.run(session_factory)
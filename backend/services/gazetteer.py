@@ -0,0 +1,155 @@
+"""Offline gazetteer: resolve free-text locations to a known place and its ``uule``.
+
+``data/gazetteer.tsv`` lists countries, US and Canadian states, and cities with the Google
+canonical location name SerpAPI expects. Metro areas and nicknames ("bay area", "dfw",
+"twin cities") are aliases of their principal city. The file is loaded once into a flat
+key -> place index that holds display names, canonical names, aliases and generated
+"city state" / "city country" forms. Lookups fold case, accents and punctuation, ignore a
+trailing country name, and fall back to a close fuzzy match on the key. Each place carries
+its precomputed ``uule``, so searches for a known place are sent upstream as the same
+encoded location instead of free text that SerpAPI may not recognise.
+"""
+
+from __future__ import annotations
+
+import base64
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.tsv"
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LENGTH = 5
+
+UULE_PREFIX = "w+CAIQICI"
+_UULE_LENGTH_KEY = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def encode_uule(canonical_name: str) -> str:
+  """Google's ``uule`` v2 encoding of a canonical location name."""
+  raw = canonical_name.encode()
+  return UULE_PREFIX + _UULE_LENGTH_KEY[len(raw) % len(_UULE_LENGTH_KEY)] + base64.b64encode(raw).decode()
+
+
+def normalize_key(text: Optional[str]) -> str:
+  """Lookup key: accents stripped, case folded, punctuation collapsed to single spaces."""
+  decomposed = unicodedata.normalize("NFKD", text or "")
+  stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+  return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+@dataclass(frozen=True)
+class Place:
+  name: str
+  canonical_name: str
+  kind: str
+  country: str
+  uule: str
+  code: Optional[str] = None
+
+
+class Gazetteer:
+  def __init__(self, places: list[Place], aliases: list[list[str]]) -> None:
+    self.places = tuple(places)
+    self._index: dict[str, Place] = {}
+    self._country_keys: set[str] = set()
+    self._state_codes: dict[str, str] = {}
+
+    # Explicit names and aliases first, so generated forms never shadow them ("la" is Los
+    # Angeles, not Louisiana); among generated forms the earlier (larger) place wins.
+    for place, place_aliases in zip(self.places, aliases):
+      for key in (place.name, place.canonical_name, *place_aliases):
+        self._add(key, place)
+      if place.kind == "country":
+        self._country_keys.update(normalize_key(key) for key in (place.name, *place_aliases))
+      if place.kind == "state" and place.code and place.country == "United States":
+        self._state_codes[normalize_key(place.name)] = place.code
+        self._state_codes[normalize_key(place.code)] = place.code
+    country_aliases = {
+      place.name: [place.name, *place_aliases]
+      for place, place_aliases in zip(self.places, aliases)
+      if place.kind == "country"
+    }
+    for place in self.places:
+      if place.kind != "city":
+        continue
+      city, *regions = place.canonical_name.split(",")
+      self._add(city, place)
+      if regions:
+        self._add(f"{city} {regions[0]}", place)
+      for country in country_aliases.get(place.country, ()):
+        self._add(f"{city} {country}", place)
+
+    self._by_initial: dict[str, list[str]] = defaultdict(list)
+    for key in self._index:
+      if len(key) >= FUZZY_MIN_LENGTH:
+        self._by_initial[key[0]].append(key)
+
+  def _add(self, text: str, place: Place) -> None:
+    key = normalize_key(text)
+    if key:
+      self._index.setdefault(key, place)
+
+  @classmethod
+  def from_file(cls, path: Path = DATA_PATH) -> "Gazetteer":
+    places: list[Place] = []
+    aliases: list[list[str]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+      if not line.strip() or line.startswith("#"):
+        continue
+      name, canonical_name, kind, country, alias_field = (line.split("\t") + [""] * 5)[:5]
+      place_aliases = [alias for alias in alias_field.split("|") if alias]
+      # State rows list their postal code as the first alias.
+      code = place_aliases[0].upper() if kind == "state" and place_aliases else None
+      places.append(Place(name, canonical_name, kind, country, encode_uule(canonical_name), code))
+      aliases.append(place_aliases)
+    return cls(places, aliases)
+
+  def _exact(self, key: str) -> Optional[Place]:
+    place = self._index.get(key)
+    if place is not None:
+      return place
+    # "austin tx united states" / "london uk": drop the trailing country and retry.
+    for country in self._country_keys:
+      if key.endswith(f" {country}"):
+        place = self._index.get(key[: -len(country) - 1])
+        if place is not None:
+          return place
+    return None
+
+  def resolve(self, text: Optional[str]) -> Optional[Place]:
+    key = normalize_key(text)
+    if not key:
+      return None
+    place = self._exact(key)
+    if place is not None or len(key) < FUZZY_MIN_LENGTH:
+      return place
+    matches = difflib.get_close_matches(key, self._by_initial.get(key[0], ()), n=1, cutoff=FUZZY_CUTOFF)
+    return self._index[matches[0]] if matches else None
+
+  def us_state_code(self, text: Optional[str]) -> Optional[str]:
+    """Postal code for a US state given its name or code ("texas", "TX")."""
+    return self._state_codes.get(normalize_key(text))
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+  return Gazetteer.from_file()
+
+
+@lru_cache(maxsize=4096)
+def resolve_place(text: Optional[str]) -> Optional[Place]:
+  return get_gazetteer().resolve(text)
+
+
+def us_state_code(text: Optional[str]) -> Optional[str]:
+  return get_gazetteer().us_state_code(text)
@@ -0,0 +1,304 @@
+"""Postgres-backed queue for LLM generations.
+
+Submitting a job only inserts a ``generation_jobs`` row, so the HTTP request returns at once
+and a client disconnect or proxy timeout no longer throws a paid generation away. Each app
+process (or a standalone ``python -m generation_worker``) runs a pool of
+``GENERATION_WORKERS`` concurrent generations. The pool claims due jobs with
+``FOR UPDATE SKIP LOCKED``, marks them running under a lease and commits before calling
+OpenAI, so no connection is held during generation. Results are stored on the row and can be
+fetched until ``GENERATION_RESULT_TTL_DAYS`` after completion. Failed attempts are retried
+with backoff up to ``GENERATION_MAX_ATTEMPTS``. A job whose worker died is claimed again
+once its lease expires, and jobs interrupted by a clean shutdown are put back straight away.
+Throughput is set by the number of workers, not by HTTP concurrency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_float, env_int
+from db.models.generation_job import GenerationJob
+from db.repositories.generation_job_repository import (
+  claim_generation_jobs,
+  complete_generation_job,
+  count_queued_generation_jobs,
+  create_generation_job,
+  fail_generation_job,
+  prune_generation_jobs,
+  release_generation_jobs,
+  retry_generation_job,
+)
+from models.behavioral_interview import BehavioralInterviewRequest, BehavioralInterviewResponse
+from models.project_coach import ProjectCoachRequest, ProjectCoachResponse
+from models.project_helper import ProjectHelperRequest, ProjectHelperResponse
+from services.metrics import REGISTRY, UPSTREAM_BUCKETS, Counter, Histogram
+from services.openai_client import (
+  generate_behavioral_questions,
+  generate_project_coach_response,
+  generate_project_helper,
+)
+from services.resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+WORKERS = env_int("GENERATION_WORKERS", 4)
+POLL_SECONDS = env_float("GENERATION_POLL_SECONDS", 1.0)
+LEASE_SECONDS = env_float("GENERATION_LEASE_SECONDS", 300.0)
+MAX_ATTEMPTS = env_int("GENERATION_MAX_ATTEMPTS", 3)
+RETRY_BASE_SECONDS = env_float("GENERATION_RETRY_BASE_SECONDS", 5.0)
+MAX_QUEUED = env_int("GENERATION_MAX_QUEUED", 1000)
+RESULT_TTL_DAYS = env_int("GENERATION_RESULT_TTL_DAYS", 7)
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+GENERATION_JOBS = REGISTRY.register(
+  Counter(
+    "generation_jobs_total",
+    "Queued LLM generations by kind and outcome (submitted, succeeded, retry, failed, released).",
+    ("kind", "outcome"),
+  )
+)
+GENERATION_QUEUE_WAIT = REGISTRY.register(
+  Histogram(
+    "generation_job_queue_wait_seconds",
+    "Time from submission (or retry) to a worker claiming the job.",
+    ("kind",),
+    buckets=UPSTREAM_BUCKETS,
+  )
+)
+GENERATION_RUN = REGISTRY.register(
+  Histogram(
+    "generation_job_run_seconds",
+    "Time a worker spent on one generation attempt.",
+    ("kind",),
+    buckets=UPSTREAM_BUCKETS,
+  )
+)
+
+
+@dataclass(frozen=True)
+class GenerationKind:
+  name: str
+  request_model: type[BaseModel]
+  response_model: type[BaseModel]
+  generate: Callable[[BaseModel, Optional[str]], Awaitable[BaseModel]]
+
+
+KINDS = {
+  kind.name: kind
+  for kind in (
+    GenerationKind(
+      "project_helper",
+      ProjectHelperRequest,
+      ProjectHelperResponse,
+      lambda request, user_id: generate_project_helper(request.job_description, request.role),
+    ),
+    GenerationKind(
+      "behavioral_questions",
+      BehavioralInterviewRequest,
+      BehavioralInterviewResponse,
+      lambda request, user_id: generate_behavioral_questions(
+        job_description=request.job_description,
+        role=request.role,
+        seniority=request.seniority,
+        focus_areas=request.focus_areas,
+        num_questions=request.num_questions,
+      ),
+    ),
+    GenerationKind(
+      "project_coach",
+      ProjectCoachRequest,
+      ProjectCoachResponse,
+      lambda request, user_id: generate_project_coach_response(request, user_id=user_id),
+    ),
+  )
+}
+
+
+class GenerationQueueFull(Exception):
+  def __init__(self, retry_after: int = 30) -> None:
+    super().__init__("Too many generations are queued; try again shortly.")
+    self.retry_after = retry_after
+
+
+async def submit_generation_job(
+  session: AsyncSession,
+  kind: str,
+  request: BaseModel,
+  *,
+  user_id: Optional[str],
+  idempotency_key: Optional[str] = None,
+) -> tuple[GenerationJob, bool]:
+  """Queue a generation and wake this process's workers; returns the job and whether it is new."""
+  if kind not in KINDS:
+    raise ValueError(f"Unknown generation kind {kind!r}.")
+  if MAX_QUEUED > 0 and await count_queued_generation_jobs(session) >= MAX_QUEUED:
+    raise GenerationQueueFull()
+  job, created = await create_generation_job(
+    session,
+    kind=kind,
+    user_id=user_id,
+    # Scoped per user so one client's keys never return another user's job.
+    idempotency_key=f"{user_id or 'anon'}:{idempotency_key}"[:255] if idempotency_key else None,
+    request=request.model_dump(mode="json"),
+  )
+  if created:
+    GENERATION_JOBS.inc((kind, "submitted"))
+    generation_pool.wake()
+  return job, created
+
+
+class GenerationWorkerPool:
+  """Runs up to ``workers`` generations at once, claiming a job whenever a slot frees up."""
+
+  def __init__(
+    self,
+    *,
+    workers: int = WORKERS,
+    poll_seconds: float = POLL_SECONDS,
+    lease_seconds: float = LEASE_SECONDS,
+    max_attempts: int = MAX_ATTEMPTS,
+    retry_base_seconds: float = RETRY_BASE_SECONDS,
+  ) -> None:
+    self.workers = max(0, workers)
+    self.poll_seconds = poll_seconds
+    self.lease_seconds = lease_seconds
+    self.max_attempts = max(1, max_attempts)
+    self.retry_base_seconds = retry_base_seconds
+    self._wake = asyncio.Event()
+    self._running: dict[asyncio.Task, GenerationJob] = {}
+
+  @property
+  def busy(self) -> int:
+    return len(self._running)
+
+  def wake(self) -> None:
+    """Claim now instead of at the next poll; called after a submit in this process."""
+    self._wake.set()
+
+  def _retry_delay(self, exc: Exception, attempts: int) -> float:
+    delay = self.retry_base_seconds * 2 ** (attempts - 1)
+    if isinstance(exc, CircuitOpenError):
+      delay = max(delay, exc.retry_after)
+    return delay
+
+  async def _execute(self, session_factory: async_sessionmaker[AsyncSession], job: GenerationJob) -> None:
+    kind = KINDS.get(job.kind)
+    label = (job.kind,)
+    if job.started_at is not None:
+      GENERATION_QUEUE_WAIT.observe(max(0.0, (job.started_at - job.available_at).total_seconds()), label)
+    try:
+      if kind is None:
+        raise ValueError(f"Unknown generation kind {job.kind!r}.")
+      request = kind.request_model.model_validate(job.request)
+    except (ValueError, ValidationError) as exc:
+      async with session_factory() as session:
+        await fail_generation_job(session, job.id, job.attempts, str(exc)[:1000])
+      GENERATION_JOBS.inc((job.kind, "failed"))
+      return
+
+    started = time.perf_counter()
+    try:
+      response = await kind.generate(request, job.user_id)
+    except Exception as exc:
+      GENERATION_RUN.observe(time.perf_counter() - started, label)
+      error = f"{type(exc).__name__}: {exc}"[:1000]
+      async with session_factory() as session:
+        if job.attempts >= self.max_attempts:
+          logger.exception("Generation job %s (%s) failed after %d attempts", job.id, job.kind, job.attempts)
+          await fail_generation_job(session, job.id, job.attempts, error)
+          GENERATION_JOBS.inc((job.kind, "failed"))
+        else:
+          logger.warning("Generation job %s (%s) attempt %d failed: %s", job.id, job.kind, job.attempts, error)
+          await retry_generation_job(session, job.id, job.attempts, error, self._retry_delay(exc, job.attempts))
+          GENERATION_JOBS.inc((job.kind, "retry"))
+      return
+
+    GENERATION_RUN.observe(time.perf_counter() - started, label)
+    async with session_factory() as session:
+      await complete_generation_job(session, job.id, job.attempts, response.model_dump(mode="json"))
+    GENERATION_JOBS.inc((job.kind, "succeeded"))
+
+  def _task_done(self, task: asyncio.Task) -> None:
+    self._running.pop(task, None)
+    if not task.cancelled() and task.exception() is not None:
+      logger.error("Generation worker crashed", exc_info=task.exception())
+    self._wake.set()
+
+  async def _claim(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+    free = self.workers - len(self._running)
+    if free <= 0:
+      return 0
+    try:
+      async with session_factory() as session:
+        jobs = await claim_generation_jobs(session, free, self.lease_seconds)
+    except Exception:
+      logger.exception("Unable to claim generation jobs")
+      return 0
+    for job in jobs:
+      task = asyncio.create_task(self._execute(session_factory, job))
+      self._running[task] = job
+      task.add_done_callback(self._task_done)
+    return len(jobs)
+
+  async def _prune(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RESULT_TTL_DAYS)
+    try:
+      async with session_factory() as session:
+        await prune_generation_jobs(session, cutoff)
+    except Exception:
+      logger.exception("Unable to prune finished generation jobs")
+
+  async def _release(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """Cancel in-flight generations and hand their jobs back to the queue."""
+    tasks = list(self._running)
+    jobs = list(self._running.values())
+    claims = [(job.id, job.attempts) for job in jobs]
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if not claims:
+      return
+    try:
+      async with session_factory() as session:
+        await release_generation_jobs(session, claims)
+      for job in jobs:
+        GENERATION_JOBS.inc((job.kind, "released"))
+    except Exception:
+      logger.exception("Unable to release %d generation jobs; their leases will expire", len(claims))
+
+  async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    if self.workers == 0:
+      return
+    last_prune = 0.0
+    try:
+      while True:
+        started = time.perf_counter()
+        if started - last_prune >= PRUNE_INTERVAL_SECONDS:
+          last_prune = started
+          await self._prune(session_factory)
+        self._wake.clear()
+        claimed = await self._claim(session_factory)
+        if claimed and len(self._running) < self.workers:
+          continue  # Backlog and free slots: keep claiming.
+        try:
+          await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, self.poll_seconds - (time.perf_counter() - started)))
+        except asyncio.TimeoutError:
+          pass
+    finally:
+      await self._release(session_factory)
+
+
+generation_pool = GenerationWorkerPool()
+
+
+async def run_generation_workers(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  """Background task that runs this process's generation workers."""
+  await generation_pool.run(session_factory)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from config import env_float
+from db.database import MAX_OVERFLOW, POOL_SIZE, engine, ping_database, pool_saturation
+from services.metrics import event_loop_monitor
+from services.openai_client import openai_upstream
+from services.serpapi_budget import serpapi_budget
+from services.serpapi_client import serpapi_upstream
+from services.stripe_client import stripe_upstream
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL_SECONDS = env_float("HEALTH_CHECK_INTERVAL_SECONDS", 5.0)
+DB_PING_TIMEOUT_SECONDS = env_float("HEALTH_DB_TIMEOUT_SECONDS", 2.0)
+MAX_POOL_SATURATION = env_float("READINESS_MAX_POOL_SATURATION", 0.95)
+MAX_LOOP_LAG_SECONDS = env_float("READINESS_MAX_LOOP_LAG_SECONDS", 0.5)
+# A DB result older than this many intervals means the checker itself is stuck.
+STALE_AFTER_INTERVALS = 3
+
+UPSTREAMS = (serpapi_upstream, openai_upstream, stripe_upstream)
+
+
+@dataclass
+class DatabaseStatus:
+  ok: bool = False
+  latency_ms: Optional[float] = None
+  error: Optional[str] = None
+  checked_at: Optional[float] = None
+
+
+class HealthMonitor:
+  """Caches DB reachability from a background task so probes never touch the request pool."""
+
+  def __init__(self) -> None:
+    self.database = DatabaseStatus()
+
+  async def check_database(self) -> DatabaseStatus:
+    started = time.perf_counter()
+    try:
+      await ping_database(DB_PING_TIMEOUT_SECONDS)
+    except Exception as exc:
+      status = DatabaseStatus(ok=False, error=type(exc).__name__, checked_at=time.time())
+    else:
+      status = DatabaseStatus(
+        ok=True,
+        latency_ms=round((time.perf_counter() - started) * 1000, 2),
+        checked_at=time.time(),
+      )
+    self.database = status
+    return status
+
+  def mark_database_ok(self) -> None:
+    """Record a successful check performed elsewhere (e.g. ``init_db`` during startup)."""
+    self.database = DatabaseStatus(ok=True, checked_at=time.time())
+
+  async def run(self) -> None:
+    while True:
+      await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+      status = await self.check_database()
+      if not status.ok:
+        logger.warning("Database health check failed: %s", status.error)
+
+  def _database_fresh(self) -> bool:
+    checked_at = self.database.checked_at
+    return checked_at is not None and time.time() - checked_at <= CHECK_INTERVAL_SECONDS * STALE_AFTER_INTERVALS
+
+  def readiness(self) -> tuple[bool, dict[str, Any]]:
+    """Readiness from cached state only: DB reachable, pool not saturated, event loop responsive."""
+    saturation = pool_saturation()
+    loop_lag = event_loop_monitor.lag
+    reasons: list[str] = []
+    if not self.database.ok:
+      reasons.append("database_unreachable")
+    elif not self._database_fresh():
+      reasons.append("database_check_stale")
+    if saturation >= MAX_POOL_SATURATION:
+      reasons.append("pool_saturated")
+    if loop_lag >= MAX_LOOP_LAG_SECONDS:
+      reasons.append("event_loop_lagging")
+
+    upstreams = {upstream.policy.name: upstream.breaker.state for upstream in UPSTREAMS}
+    checked_at = self.database.checked_at
+    body = {
+      "status": "ready" if not reasons else "not_ready",
+      "reasons": reasons,
+      "degraded_upstreams": sorted(name for name, state in upstreams.items() if state != "closed"),
+      "database": {
+        "ok": self.database.ok,
+        "latency_ms": self.database.latency_ms,
+        "error": self.database.error,
+        "checked_at": datetime.fromtimestamp(checked_at, timezone.utc).isoformat() if checked_at else None,
+      },
+      "pool": {
+        "checked_out": engine.pool.checkedout(),
+        "capacity": POOL_SIZE + MAX_OVERFLOW,
+        "saturation": round(saturation, 3),
+      },
+      "event_loop_lag_seconds": round(loop_lag, 4),
+      "upstreams": upstreams,
+      "serpapi_budget_exhausted": serpapi_budget.exhausted(),
+    }
+    return not reasons, body
+
+
+health_monitor = HealthMonitor()
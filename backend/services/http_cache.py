@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from services.transfer_stats import endpoint_name, transfer_stats
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def make_etag(*parts: object) -> str:
+  """Strong ETag from stable identifiers (cache row ids, updated_at stamps) or content bytes."""
+  digest = hashlib.blake2b(digest_size=16)
+  for part in parts:
+    digest.update(part if isinstance(part, bytes) else str(part).encode())
+    digest.update(b"\x1f")
+  return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+  """Evaluate If-None-Match (weak comparison, as RFC 9110 requires for this header)."""
+  header = request.headers.get("if-none-match")
+  if not header:
+    return False
+  if header.strip() == "*":
+    return True
+  candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+  return etag in candidates
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Response:
+  transfer_stats.record_not_modified(endpoint_name(request.scope), etag)
+  return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def json_response(
+  request: Request,
+  body: bytes,
+  *,
+  cache_control: str,
+  etag: Optional[str] = None,
+) -> Response:
+  """Build a JSON response with validators; the ETag defaults to a hash of the body."""
+  etag = etag or make_etag(body)
+  transfer_stats.remember_etag(etag, len(body))
+  return Response(
+    content=body,
+    media_type=JSON_MEDIA_TYPE,
+    headers={"ETag": etag, "Cache-Control": cache_control},
+  )
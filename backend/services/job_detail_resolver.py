@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from db.repositories.job_listing_repository import (
+  get_cached_listing,
+  is_fresh_miss,
+  record_listing_miss,
+  store_job_listings,
+)
+from models.jobs import JobListing
+from services.admission import search_admission
+from services.metrics import record_cache
+from services.serpapi_budget import serpapi_budget
+from services.serpapi_client import (
+  SerpAPIBudgetExceeded,
+  decode_htidocid,
+  fetch_job_detail_from_serpapi,
+  get_cached_job,
+  remember_job,
+)
+from services.tracing import traced
+
+
+@traced("jobs.resolve_detail")
+async def resolve_job_detail(
+  session_factory: async_sessionmaker[AsyncSession],
+  job_id: str,
+) -> Optional[JobListing]:
+  """Resolve a job listing from the worker cache, then Postgres, then SerpAPI.
+
+  Listings found upstream are persisted so other workers and restarts reuse them, and
+  unresolvable ids are recorded as misses so repeat views do not search SerpAPI again.
+  The lookup and the write each use their own short session, so no pooled connection is
+  held while SerpAPI is called.
+  """
+  cached = get_cached_job(job_id)
+  if cached:
+    record_cache("job_detail", "memory_hit")
+    return cached
+
+  htidocid = decode_htidocid(job_id)
+  async with session_factory() as session:
+    record = await get_cached_listing(session, job_id=job_id, htidocid=htidocid)
+  if record is not None:
+    if record.job_data is not None:
+      job = JobListing(**record.job_data)
+      remember_job(job)
+      record_cache("job_detail", "hit")
+      return job
+    if is_fresh_miss(record):
+      record_cache("job_detail", "negative")
+      return None
+
+  record_cache("job_detail", "miss")
+  if serpapi_budget.near_exhausted():
+    serpapi_budget.record_degraded()
+    raise SerpAPIBudgetExceeded("SerpAPI budget nearly exhausted and this job is not cached yet")
+
+  async with search_admission.slot():
+    job = await fetch_job_detail_from_serpapi(job_id)
+  async with session_factory() as session:
+    if job is None:
+      await record_listing_miss(session, job_id=job_id, htidocid=htidocid)
+      return None
+    await store_job_listings(session, [job.model_dump()])
+  return job
@@ -0,0 +1,71 @@
+"""Upstream fetch and cache write for one canonical job search.
+
+Shared by ``/jobs/search`` and the cache warmer so a warmed entry is byte-for-byte what the
+route would have stored. ``cache_key`` is the dict the route builds from canonical inputs
+(``query``, ``location``, ``page``, ``employment_type``, ``roles``, ``seniority_filters``),
+which is also the keyword set ``get_cached_search_entry`` and ``cache_job_search_result``
+take.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from db.repositories.job_listing_repository import store_job_listings
+from db.repositories.job_search_repository import cache_job_search_result
+from models.jobs import JobSearchResponse
+from services.serpapi_client import fetch_jobs_from_serpapi
+from services.tracing import span
+
+EMPLOYMENT_TYPE_TO_SERP = {
+  "full_time": "FULLTIME",
+  "internship": "INTERN",
+}
+
+SENIORITY_TO_KEYWORD = {
+  "entry": "entry level",
+  "mid": "mid level",
+  "senior": "senior level",
+  "lead": "lead engineer",
+}
+
+
+async def fetch_search_payload(cache_key: dict[str, Any]) -> dict[str, Any]:
+  """Fetch one search from SerpAPI and return the response payload that gets cached."""
+  roles = cache_key.get("roles") or []
+  seniority = cache_key.get("seniority_filters") or []
+  employment_type = cache_key.get("employment_type")
+  seniority_keywords = [SENIORITY_TO_KEYWORD[level] for level in seniority if level in SENIORITY_TO_KEYWORD]
+  jobs = await fetch_jobs_from_serpapi(
+    cache_key["query"],
+    cache_key["location"],
+    cache_key["page"],
+    employment_type=EMPLOYMENT_TYPE_TO_SERP.get(employment_type) if employment_type else None,
+    role_keywords=roles or None,
+    seniority_keywords=seniority_keywords or None,
+  )
+  with span("jobs.search.build_response", jobs=len(jobs)):
+    response = JobSearchResponse(
+      query=cache_key["query"],
+      location=cache_key["location"],
+      page=cache_key["page"],
+      employment_type=employment_type,
+      role_filters=roles,
+      seniority_filters=seniority,
+      jobs=jobs,
+    )
+    return response.model_dump()
+
+
+async def store_search_payload(
+  session_factory: async_sessionmaker[AsyncSession],
+  cache_key: dict[str, Any],
+  payload: dict[str, Any],
+) -> uuid.UUID:
+  """Persist the listings and the cache row in one short session; returns the row id."""
+  async with session_factory() as session:
+    await store_job_listings(session, payload["jobs"])
+    return await cache_job_search_result(session, **cache_key, payload=payload)
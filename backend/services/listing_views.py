@@ -0,0 +1,107 @@
+"""Sparse fieldsets for job listing responses.
+
+``/jobs/search`` and ``/jobs/saved`` take ``view=summary|full`` or an explicit
+``fields=title,company,...`` list. Listings are projected down to those fields before
+serialization, so list views do not encode descriptions, highlights and apply options they
+never render. Projected bodies are keyed by their ETag (cache row id or saved-row versions
+plus the field set) in a small in-process LRU, so repeat summary requests skip the
+projection and the encoding entirely. Full views still go straight to the serializer.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Iterable, Optional
+
+from config import env_int
+from models.jobs import JobListing
+from services.metrics import record_cache
+
+LISTING_FIELDS = frozenset(JobListing.model_fields)
+# What list views render, plus the id needed to open or save a listing (it embeds the htidocid).
+SUMMARY_FIELDS = ("job_id", "title", "company", "location", "posted_at", "salary")
+_SUMMARY_FIELD_SET = frozenset(SUMMARY_FIELDS)
+VIEW_CACHE_MAX_BYTES = env_int("LISTING_VIEW_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+
+
+class ListingView(str, Enum):
+  summary = "summary"
+  full = "full"
+
+
+def resolve_fields(view: ListingView, fields: Optional[str]) -> Optional[tuple[str, ...]]:
+  """Field set to project to, or None for the full listing; ``fields`` wins over ``view``."""
+  if fields:
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - LISTING_FIELDS
+    if unknown:
+      raise ValueError(f"Unknown listing fields: {', '.join(sorted(unknown))}.")
+    # job_id is always kept so a projected listing can still be opened or saved.
+    return tuple(sorted(requested | {"job_id"}))
+  if view == ListingView.summary:
+    return SUMMARY_FIELDS
+  return None
+
+
+def within_summary(fields: Optional[tuple[str, ...]]) -> bool:
+  """True when a projection only needs summary fields, so the stored summary payload can serve it."""
+  return fields is not None and _SUMMARY_FIELD_SET.issuperset(fields)
+
+
+def project_listing(listing: dict[str, Any], fields: Iterable[str]) -> dict[str, Any]:
+  return {name: listing.get(name) for name in fields}
+
+
+def project_listings(listings: Iterable[dict[str, Any]], fields: Iterable[str]) -> list[dict[str, Any]]:
+  fields = tuple(fields)
+  return [project_listing(listing, fields) for listing in listings]
+
+
+class ViewBodyCache:
+  """Byte-bounded LRU of encoded projected bodies keyed by their strong ETag."""
+
+  def __init__(self, max_bytes: int = VIEW_CACHE_MAX_BYTES) -> None:
+    self.max_bytes = max(0, max_bytes)
+    self.size = 0
+    self._bodies: OrderedDict[str, bytes] = OrderedDict()
+
+  def get(self, etag: str) -> Optional[bytes]:
+    body = self._bodies.get(etag)
+    if body is not None:
+      self._bodies.move_to_end(etag)
+    return body
+
+  def put(self, etag: str, body: bytes) -> None:
+    if len(body) > self.max_bytes // 8:
+      return
+    previous = self._bodies.pop(etag, None)
+    if previous is not None:
+      self.size -= len(previous)
+    self._bodies[etag] = body
+    self.size += len(body)
+    while self.size > self.max_bytes:
+      _, evicted = self._bodies.popitem(last=False)
+      self.size -= len(evicted)
+
+  def __len__(self) -> int:
+    return len(self._bodies)
+
+
+view_body_cache = ViewBodyCache()
+
+
+def view_etag_parts(fields: Optional[tuple[str, ...]]) -> tuple[str, ...]:
+  """Extra ETag parts for a projected view; empty for the full listing so its ETag is unchanged."""
+  return ("fields", *fields) if fields is not None else ()
+
+
+def cached_view_body(etag: str, build: Callable[[], bytes]) -> bytes:
+  body = view_body_cache.get(etag)
+  if body is not None:
+    record_cache("listing_view", "hit")
+    return body
+  record_cache("listing_view", "miss")
+  body = build()
+  view_body_cache.put(etag, body)
+  return body
@@ -0,0 +1,281 @@
+"""Minimal in-process Prometheus registry and instrumentation helpers.
+
+Metrics are per worker process; scrape each worker (or aggregate in Prometheus) when running
+several. Recording is a dict lookup plus a few float additions so it is cheap enough for
+every request and upstream call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import functools
+import time
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence, TypeVar
+
+from services.tracing import span
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+  return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+  parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+  if extra:
+    parts.append(extra)
+  return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+  kind = ""
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+
+  def header(self) -> list[str]:
+    return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+  def samples(self) -> Iterable[str]:
+    raise NotImplementedError
+
+
+class Counter(_Metric):
+  kind = "counter"
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+    super().__init__(name, documentation, labelnames)
+    self._values: dict[tuple, float] = {}
+
+  def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+    self._values[labels] = self._values.get(labels, 0.0) + amount
+
+  def value(self, labels: tuple = ()) -> float:
+    return self._values.get(labels, 0.0)
+
+  def samples(self) -> Iterable[str]:
+    for labels, value in self._values.items():
+      yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(_Metric):
+  """Gauge set explicitly or computed at scrape time from a callback."""
+
+  kind = "gauge"
+
+  def __init__(
+    self,
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    callback: Optional[Callable[[], Iterable[tuple[tuple, float]] | float]] = None,
+  ) -> None:
+    super().__init__(name, documentation, labelnames)
+    self._values: dict[tuple, float] = {}
+    self.callback = callback
+
+  def set(self, value: float, labels: tuple = ()) -> None:
+    self._values[labels] = value
+
+  def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+    self._values[labels] = self._values.get(labels, 0.0) + amount
+
+  def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+    self._values[labels] = self._values.get(labels, 0.0) - amount
+
+  def value(self, labels: tuple = ()) -> float:
+    return self._values.get(labels, 0.0)
+
+  def samples(self) -> Iterable[str]:
+    values: Iterable[tuple[tuple, float]] = self._values.items()
+    if self.callback is not None:
+      try:
+        produced = self.callback()
+      except Exception:
+        produced = ()
+      values = [((), float(produced))] if isinstance(produced, (int, float)) else produced
+    for labels, value in values:
+      yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram(_Metric):
+  kind = "histogram"
+
+  def __init__(
+    self,
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+  ) -> None:
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+    # labels -> [per-bucket counts..., +Inf count, sum]
+    self._series: dict[tuple, list[float]] = {}
+
+  def observe(self, value: float, labels: tuple = ()) -> None:
+    series = self._series.get(labels)
+    if series is None:
+      series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+    series[bisect.bisect_left(self.buckets, value)] += 1
+    series[-1] += value
+
+  def count(self, labels: tuple = ()) -> int:
+    series = self._series.get(labels)
+    return int(sum(series[:-1])) if series else 0
+
+  def samples(self) -> Iterable[str]:
+    for labels, series in self._series.items():
+      cumulative = 0.0
+      for bound, bucket_count in zip((*self.buckets, float("inf")), series[:-1]):
+        cumulative += bucket_count
+        le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+        yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+      yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}"
+      yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+  def __init__(self) -> None:
+    self._metrics: dict[str, _Metric] = {}
+
+  def register(self, metric: _Metric) -> Any:
+    self._metrics[metric.name] = metric
+    return metric
+
+  def render(self) -> str:
+    lines: list[str] = []
+    for metric in self._metrics.values():
+      lines.extend(metric.header())
+      lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Route label for requests that matched no route, so random paths cannot grow label sets.
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+  Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+UPSTREAM_REQUEST_DURATION = REGISTRY.register(
+  Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream call latency by provider and operation.",
+    ("provider", "operation"),
+    UPSTREAM_BUCKETS,
+  )
+)
+UPSTREAM_ERRORS = REGISTRY.register(
+  Counter("upstream_errors_total", "Failed upstream calls by provider, operation and error type.", ("provider", "operation", "error"))
+)
+HTTP_RESPONSE_BYTES_SAVED = REGISTRY.register(
+  Counter("http_response_bytes_saved_total", "Bytes saved per endpoint by compression and 304 answers.", ("endpoint",))
+)
+CACHE_REQUESTS = REGISTRY.register(
+  Counter("cache_requests_total", "Cache lookups by cache and result (hit, miss, stale, negative).", ("cache", "result"))
+)
+DB_QUERY_DURATION = REGISTRY.register(
+  Histogram("db_query_duration_seconds", "Repository call latency.", ("operation",), FAST_BUCKETS)
+)
+DB_POOL_CHECKOUT_WAIT = REGISTRY.register(
+  Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.", (), FAST_BUCKETS)
+)
+DB_STATEMENT_ROUTES = REGISTRY.register(
+  Counter("db_statement_routes_total", "Session statements by the engine they were routed to (primary, replica).", ("target",))
+)
+EVENT_LOOP_LAG = REGISTRY.register(Gauge("event_loop_lag_seconds", "Most recent event loop scheduling delay."))
+EVENT_LOOP_LAG_HISTOGRAM = REGISTRY.register(
+  Histogram("event_loop_lag_distribution_seconds", "Event loop scheduling delay samples.", (), FAST_BUCKETS)
+)
+
+
+def register_callback_gauge(
+  name: str,
+  documentation: str,
+  callback: Callable[[], Iterable[tuple[tuple, float]] | float],
+  labelnames: Sequence[str] = (),
+) -> Gauge:
+  return REGISTRY.register(Gauge(name, documentation, labelnames, callback=callback))
+
+
+def instrument_upstream(provider: str, operation: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+  """Decorator recording latency and error type of an async upstream call (and a trace span)."""
+
+  def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    labels = (provider, operation)
+    span_name = f"{provider}.{operation}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+      started = time.perf_counter()
+      try:
+        with span(span_name, **{"peer.service": provider}):
+          return await fn(*args, **kwargs)
+      except Exception as exc:
+        UPSTREAM_ERRORS.inc((provider, operation, type(exc).__name__))
+        raise
+      finally:
+        UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - started, labels)
+
+    return wrapper
+
+  return decorator
+
+
+def instrument_db(operation: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+  """Decorator recording latency of an async repository call (and a trace span)."""
+
+  def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    labels = (operation,)
+    span_name = f"db.{operation}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+      started = time.perf_counter()
+      try:
+        with span(span_name, **{"db.system": "postgresql"}):
+          return await fn(*args, **kwargs)
+      finally:
+        DB_QUERY_DURATION.observe(time.perf_counter() - started, labels)
+
+    return wrapper
+
+  return decorator
+
+
+def record_cache(cache: str, result: str) -> None:
+  CACHE_REQUESTS.inc((cache, result))
+
+
+class EventLoopMonitor:
+  """Samples how late a periodic sleep wakes up; persistent lag means the loop is blocked."""
+
+  def __init__(self, interval: float = 0.5) -> None:
+    self.interval = interval
+    self.lag = 0.0
+    self.max_lag = 0.0
+
+  async def run(self) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      expected = loop.time() + self.interval
+      await asyncio.sleep(self.interval)
+      lag = max(0.0, loop.time() - expected)
+      self.lag = lag
+      self.max_lag = max(self.max_lag, lag)
+      EVENT_LOOP_LAG.set(lag)
+      EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+
+event_loop_monitor = EventLoopMonitor()
@@ -1,11 +1,10 @@
 import json
 import re
-import os
+from functools import lru_cache
 from io import BytesIO
+from typing import TYPE_CHECKING
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
+from config import get_settings
 from models.project_coach import ProjectCoachRequest, ProjectCoachResponse
 from models.project_helper import ProjectHelperResponse
 from models.behavioral_interview import (
@@ -14,9 +13,62 @@ from models.behavioral_interview import (
     BehavioralFeedback,
     BehavioralInterviewResponse,
 )
+from services.metrics import instrument_upstream
+from services.tracing import traced
+from services.resilience import ResiliencePolicy, Upstream
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+OPENAI_POLICY = ResiliencePolicy.from_env(
+    "openai",
+    "OPENAI",
+    timeout_seconds=60.0,
+    max_attempts=2,
+    backoff_base_seconds=0.5,
+    backoff_max_seconds=4.0,
+)
+
+
+@lru_cache
+def get_openai_client() -> "AsyncOpenAI":
+    """Build the shared client on first use; importing the SDK costs ~0.3s of startup."""
+    from openai import AsyncOpenAI
+
+    settings = get_settings()
+    # Retries are handled by the resilience layer, so the SDK's own retry loop is disabled.
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url,
+        max_retries=0,
+        timeout=OPENAI_POLICY.timeout_seconds,
+    )
+
+
+def _is_transient(exc: BaseException) -> bool:
+    # Only called after a failed call, by which point the SDK is imported.
+    import openai
+
+    return isinstance(
+        exc,
+        (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError, openai.InternalServerError),
+    )
+
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+openai_upstream = Upstream(OPENAI_POLICY, is_retryable=_is_transient)
+
+
+@instrument_upstream("openai", "chat_completion")
+async def _chat_completion(messages: list[dict], temperature: float) -> str:
+    """Run a chat completion under the OpenAI resilience policy and return the stripped text."""
+    response = await openai_upstream.call(
+        lambda: get_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=temperature,
+        )
+    )
+    return response.choices[0].message.content.strip()
 
 
 def extract_json(text: str) -> dict:
@@ -36,7 +88,8 @@ def extract_json(text: str) -> dict:
         raise ValueError("Model response could not be parsed as JSON.")
 
 
-def generate_project_helper(job_description: str, role: str) -> ProjectHelperResponse: # make prompt better down the line possibly try out dspy
+@traced("llm.generate_project_helper")
+async def generate_project_helper(job_description: str, role: str) -> ProjectHelperResponse: # make prompt better down the line possibly try out dspy
     prompt = f"""
 You are a senior software architect mentoring someone applying for the following role: {role}.
 
@@ -55,18 +108,13 @@ Return ONLY a valid JSON object with this structure:
 }}
     """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-
-    content = response.choices[0].message.content.strip()
+    content = await _chat_completion([{"role": "user", "content": prompt}], temperature=0.7)
     data = extract_json(content)
     return ProjectHelperResponse(**data)
 
 
-def generate_behavioral_questions(
+@traced("llm.generate_behavioral_questions")
+async def generate_behavioral_questions(
     job_description: str,
     role: str,
     seniority: str | None = None,
@@ -100,18 +148,13 @@ Return ONLY valid JSON with this shape:
 Ensure `questions` has exactly {num_questions} entries.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.65,
-    )
-
-    content = response.choices[0].message.content.strip()
+    content = await _chat_completion([{"role": "user", "content": prompt}], temperature=0.65)
     data = extract_json(content)
     return BehavioralInterviewResponse(**data)
 
 
-def generate_behavioral_turn(payload: BehavioralAssistantTurnRequest) -> BehavioralAssistantTurnResponse:
+@traced("llm.generate_behavioral_turn")
+async def generate_behavioral_turn(payload: BehavioralAssistantTurnRequest) -> BehavioralAssistantTurnResponse:
     if payload.target_questions < 1:
         raise ValueError("target_questions must be at least 1.")
 
@@ -171,13 +214,7 @@ Respond ONLY in valid JSON with this shape:
 If no answer was provided, set feedback to null and only return the next question and follow_up.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.55,
-    )
-
-    content = response.choices[0].message.content.strip()
+    content = await _chat_completion([{"role": "user", "content": prompt}], temperature=0.55)
     data = extract_json(content)
 
     question = (data.get("question") or "").strip()
@@ -243,27 +280,31 @@ Coaching intent: teach the user how to build this project without handing over f
     return messages
 
 
-def generate_project_coach_response(payload: ProjectCoachRequest, user_id: str) -> ProjectCoachResponse:
+@traced("llm.generate_project_coach_response")
+async def generate_project_coach_response(payload: ProjectCoachRequest, user_id: str) -> ProjectCoachResponse:
     messages = _build_project_coach_messages(payload, user_id)
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0.55,
-    )
-    content = response.choices[0].message.content.strip()
+    content = await _chat_completion(messages, temperature=0.55)
     data = extract_json(content)
     return ProjectCoachResponse(**data)
 
 
-def transcribe_audio(file_bytes: bytes, filename: str | None = None) -> str:
+@instrument_upstream("openai", "transcription")
+async def transcribe_audio(file_bytes: bytes, filename: str | None = None) -> str:
     """Transcribe short-form interview answers from audio."""
     if not file_bytes:
         raise ValueError("Audio file is empty.")
-    buffer = BytesIO(file_bytes)
-    buffer.name = filename or "audio.webm"
-    transcription = client.audio.transcriptions.create(
-        model="whisper-1",
-        file=buffer,
+
+    def _audio_file() -> BytesIO:
+        # Fresh buffer per attempt: a retried upload must not resume from a consumed stream.
+        buffer = BytesIO(file_bytes)
+        buffer.name = filename or "audio.webm"
+        return buffer
+
+    transcription = await openai_upstream.call(
+        lambda: get_openai_client().audio.transcriptions.create(
+            model="whisper-1",
+            file=_audio_file(),
+        )
     )
     text = getattr(transcription, "text", None)
     if not text or not text.strip():
@@ -0,0 +1,148 @@
+"""Opt-in zstd storage for the large listing JSON in ``job_searches`` and ``saved_jobs``.
+
+With ``PAYLOAD_COMPRESSION`` on (and ``zstandard`` installed), search payloads and saved
+listings are written as zstd frames to ``payload_zstd`` / ``job_data_zstd`` instead of
+JSONB. Listings are small and alike (the same keys, apply links and boilerplate), so frames
+are compressed against a dictionary trained on stored listings. Each frame records the id
+of its dictionary, and every dictionary ever trained stays in ``payload_dictionaries``, so
+rows stay readable after retraining; a worker that meets an id it has not loaded reloads
+the table once. Rows stored as JSONB (before the switch, or with it off) read as before,
+and both formats coexist.
+
+Both tables also keep a small JSONB projection with only the summary view fields
+(``summary_payload``, ``job_summary``), written in either mode, so list views never read
+or decompress the full payload.
+
+The ``20251207_12`` migration trains the first dictionary and converts existing rows when
+the flag is on at upgrade time; ``python -m train_payload_dictionary`` retrains later.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_bool, env_int
+from db.repositories.payload_dictionary_repository import (
+  list_payload_dictionaries,
+  recent_saved_payloads,
+  recent_search_payloads,
+)
+from services.listing_views import SUMMARY_FIELDS, project_listing, project_listings
+
+try:  # zstandard is optional; without it payloads are stored as JSONB.
+  import zstandard
+except ImportError:  # pragma: no cover - depends on the deployment image
+  zstandard = None
+
+PAYLOAD_COMPRESSION = env_bool("PAYLOAD_COMPRESSION", False)
+ZSTD_LEVEL = env_int("PAYLOAD_ZSTD_LEVEL", 6)
+DICTIONARY_BYTES = env_int("PAYLOAD_ZSTD_DICT_BYTES", 64 * 1024)
+# Fewer samples than this make a dictionary that barely beats plain zstd.
+MIN_TRAINING_SAMPLES = 100
+
+
+class UnknownDictionary(LookupError):
+  def __init__(self, dict_id: int) -> None:
+    super().__init__(f"zstd dictionary {dict_id} is not loaded")
+    self.dict_id = dict_id
+
+
+def encode_json(payload: Any) -> bytes:
+  return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def summarize_listing(listing: dict[str, Any]) -> dict[str, Any]:
+  return project_listing(listing, SUMMARY_FIELDS)
+
+
+def summarize_search_payload(payload: dict[str, Any]) -> dict[str, Any]:
+  return {**payload, "jobs": project_listings(payload.get("jobs") or [], SUMMARY_FIELDS)}
+
+
+def train_dictionary(samples: list[bytes], size: int = DICTIONARY_BYTES) -> Optional[tuple[int, bytes]]:
+  """Train a dictionary on encoded listings; None when there is too little data to be worth it."""
+  if zstandard is None or len(samples) < MIN_TRAINING_SAMPLES:
+    return None
+  try:
+    trained = zstandard.train_dictionary(size, samples, level=ZSTD_LEVEL)
+  except zstandard.ZstdError:
+    return None
+  return trained.dict_id(), trained.as_bytes()
+
+
+class PayloadCodec:
+  """zstd frames of compact JSON, compressed with the newest installed dictionary."""
+
+  def __init__(self, enabled: bool = PAYLOAD_COMPRESSION, level: int = ZSTD_LEVEL) -> None:
+    self.enabled = enabled and zstandard is not None
+    self.level = level
+    self.dict_id = 0
+    self._compressor = None
+    self._decompressors: dict[int, Any] = {}
+
+  def install(self, dictionaries: Iterable[tuple[int, bytes]]) -> None:
+    """Register dictionaries, oldest first; the last one compresses new payloads."""
+    if zstandard is None:
+      return
+    for dict_id, data in dictionaries:
+      dictionary = zstandard.ZstdCompressionDict(data)
+      self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+      self._compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+      self.dict_id = dict_id
+
+  def encode(self, payload: Any) -> bytes:
+    if self._compressor is None:
+      self._compressor = zstandard.ZstdCompressor(level=self.level)
+    return self._compressor.compress(encode_json(payload))
+
+  def decode(self, blob: bytes) -> Any:
+    if zstandard is None:
+      raise RuntimeError("zstandard is required to read compressed payloads.")
+    dict_id = zstandard.get_frame_parameters(blob).dict_id
+    decompressor = self._decompressors.get(dict_id)
+    if decompressor is None:
+      if dict_id:
+        raise UnknownDictionary(dict_id)
+      decompressor = self._decompressors[0] = zstandard.ZstdDecompressor()
+    return json.loads(decompressor.decompress(blob))
+
+
+payload_codec = PayloadCodec()
+
+
+async def reload_dictionaries(session: AsyncSession) -> None:
+  if zstandard is not None:
+    payload_codec.install(await list_payload_dictionaries(session))
+
+
+async def load_payload_dictionaries(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  """Load the stored dictionaries at startup so new payloads compress with the newest one."""
+  if zstandard is None:
+    return
+  async with session_factory() as session:
+    await reload_dictionaries(session)
+
+
+async def decode_payload(session: AsyncSession, blob: bytes) -> Any:
+  try:
+    return payload_codec.decode(blob)
+  except UnknownDictionary:
+    # Trained by another process after this one started.
+    await reload_dictionaries(session)
+    return payload_codec.decode(blob)
+
+
+async def training_samples(session: AsyncSession, limit: int) -> list[bytes]:
+  """Encoded listings from recent saved jobs and search cache rows, in either storage format."""
+  samples: list[bytes] = []
+  for job_data, blob in await recent_saved_payloads(session, limit // 2):
+    samples.append(encode_json(job_data if blob is None else await decode_payload(session, blob)))
+  for payload, blob in await recent_search_payloads(session, limit):
+    if len(samples) >= limit:
+      break
+    payload = payload if blob is None else await decode_payload(session, blob)
+    samples.extend(encode_json(listing) for listing in (payload.get("jobs") or [])[: limit - len(samples)])
+  return samples
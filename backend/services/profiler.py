@@ -0,0 +1,185 @@
+"""Sampling profiler for a running worker.
+
+A daemon thread snapshots the target thread's Python stack with ``sys._current_frames()``
+every few milliseconds and counts identical stacks. Nothing is installed while no profile
+is running, so the idle cost is zero; while sampling, the worker pays roughly one stack walk
+per interval. Pydantic validation and serialization run in Rust, so their time is attributed
+to the Python frame that called them (``TypeAdapter.validate_python``, ``model_dump_json``, ...).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Optional
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_PROFILE_SECONDS = 60.0
+STORED_PROFILES = 20
+
+
+def _frame_label(code) -> str:
+  filename = code.co_filename
+  marker = "site-packages" + os.sep
+  if marker in filename:
+    filename = filename.split(marker, 1)[1]
+  elif filename.startswith(_BACKEND_ROOT):
+    filename = os.path.relpath(filename, _BACKEND_ROOT)
+  return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Profile:
+  """Aggregated stack samples; stacks are stored root-first."""
+
+  def __init__(self, interval: float) -> None:
+    self.id = uuid.uuid4().hex
+    self.interval = interval
+    self.started_at = time.time()
+    self.duration = 0.0
+    self.stacks: Counter[tuple[str, ...]] = Counter()
+
+  @property
+  def samples(self) -> int:
+    return sum(self.stacks.values())
+
+  def collapsed(self) -> str:
+    """Brendan Gregg folded-stack format (``a;b;c count``), accepted by flamegraph.pl and speedscope."""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+  def speedscope(self, name: str = "prospra-backend") -> dict[str, Any]:
+    frame_index: dict[str, int] = {}
+    frames: list[dict[str, str]] = []
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for stack, count in self.stacks.items():
+      indices = []
+      for label in stack:
+        if label not in frame_index:
+          frame_index[label] = len(frames)
+          frames.append({"name": label})
+        indices.append(frame_index[label])
+      samples.append(indices)
+      weights.append(count * self.interval)
+    return {
+      "$schema": "https://www.speedscope.app/file-format-schema.json",
+      "shared": {"frames": frames},
+      "profiles": [
+        {
+          "type": "sampled",
+          "name": name,
+          "unit": "seconds",
+          "startValue": 0,
+          "endValue": sum(weights),
+          "samples": samples,
+          "weights": weights,
+        }
+      ],
+      "name": name,
+      "exporter": "prospra-sampling-profiler",
+    }
+
+  def top(self, limit: int = 15) -> list[dict[str, Any]]:
+    """Frames ranked by inclusive sample share."""
+    inclusive: Counter[str] = Counter()
+    for stack, count in self.stacks.items():
+      for label in set(stack):
+        inclusive[label] += count
+    total = self.samples or 1
+    return [
+      {"frame": label, "samples": count, "share": round(count / total, 4)}
+      for label, count in inclusive.most_common(limit)
+    ]
+
+
+class SamplingProfiler:
+  """Samples one thread (default: the caller's) or every thread except the sampler itself."""
+
+  def __init__(self, interval: float = 0.005, *, thread_id: Optional[int] = None, all_threads: bool = False) -> None:
+    self.interval = max(0.001, interval)
+    self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+    self.all_threads = all_threads
+    self.profile = Profile(self.interval)
+    self._stop = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+
+  def _sample(self) -> None:
+    own_id = threading.get_ident()
+    frames = sys._current_frames()
+    targets = (
+      [frame for ident, frame in frames.items() if ident != own_id]
+      if self.all_threads
+      else [frames.get(self.thread_id)]
+    )
+    for frame in targets:
+      stack: list[str] = []
+      while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+      if stack:
+        stack.reverse()
+        self.profile.stacks[tuple(stack)] += 1
+
+  def _run(self) -> None:
+    while not self._stop.wait(self.interval):
+      self._sample()
+
+  def start(self) -> "SamplingProfiler":
+    self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self) -> Profile:
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+    self.profile.duration = time.time() - self.profile.started_at
+    return self.profile
+
+  def __enter__(self) -> "SamplingProfiler":
+    return self.start()
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    self.stop()
+
+
+class ProfileStore:
+  """Recent per-request profiles, looked up by id."""
+
+  def __init__(self, max_entries: int = STORED_PROFILES) -> None:
+    self.max_entries = max_entries
+    self._profiles: OrderedDict[str, Profile] = OrderedDict()
+
+  def add(self, profile: Profile) -> None:
+    self._profiles[profile.id] = profile
+    while len(self._profiles) > self.max_entries:
+      self._profiles.popitem(last=False)
+
+  def get(self, profile_id: str) -> Optional[Profile]:
+    return self._profiles.get(profile_id)
+
+
+profile_store = ProfileStore()
+# One sampler per worker at a time: overlapping samplers would double the overhead and
+# attribute each other's samples.
+profiler_lock = asyncio.Lock()
+
+
+async def profile_for(seconds: float, *, interval: float = 0.005, all_threads: bool = False) -> Profile:
+  """Sample this worker's event loop thread (or all threads) for ``seconds`` without blocking it."""
+  seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+  with SamplingProfiler(interval, all_threads=all_threads) as profiler:
+    await asyncio.sleep(seconds)
+  return profiler.profile
+
+
+def render_profile(profile: Profile, fmt: str) -> tuple[bytes, str]:
+  """Encode a profile as ``collapsed`` text or a ``speedscope`` JSON document."""
+  if fmt == "collapsed":
+    return profile.collapsed().encode(), "text/plain; charset=utf-8"
+  return json.dumps(profile.speedscope()).encode(), "application/json"
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+  """Raised without calling upstream while a circuit breaker is open."""
+
+  def __init__(self, upstream: str, retry_after: float) -> None:
+    super().__init__(f"{upstream} is temporarily unavailable (circuit open)")
+    self.upstream = upstream
+    self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ResiliencePolicy:
+  """Per-upstream timeout, retry, circuit breaker and hedging settings."""
+
+  name: str
+  timeout_seconds: float = 15.0
+  max_attempts: int = 3
+  backoff_base_seconds: float = 0.25
+  backoff_max_seconds: float = 2.0
+  breaker_failure_threshold: int = 5
+  breaker_reset_seconds: float = 30.0
+  hedge_percentile: float = 0.0  # 0 disables hedging, e.g. 0.95 hedges once p95 latency passes
+  hedge_min_samples: int = 20
+
+  @classmethod
+  def from_env(cls, name: str, prefix: str, **defaults) -> "ResiliencePolicy":
+    """Build a policy from `<PREFIX>_TIMEOUT_SECONDS`, `<PREFIX>_RETRY_ATTEMPTS`, etc."""
+    base = cls(name=name, **defaults)
+    return cls(
+      name=name,
+      timeout_seconds=env_float(f"{prefix}_TIMEOUT_SECONDS", base.timeout_seconds),
+      max_attempts=max(1, env_int(f"{prefix}_RETRY_ATTEMPTS", base.max_attempts)),
+      backoff_base_seconds=env_float(f"{prefix}_RETRY_BACKOFF_SECONDS", base.backoff_base_seconds),
+      backoff_max_seconds=env_float(f"{prefix}_RETRY_BACKOFF_MAX_SECONDS", base.backoff_max_seconds),
+      breaker_failure_threshold=max(1, env_int(f"{prefix}_BREAKER_FAILURES", base.breaker_failure_threshold)),
+      breaker_reset_seconds=env_float(f"{prefix}_BREAKER_RESET_SECONDS", base.breaker_reset_seconds),
+      hedge_percentile=env_float(f"{prefix}_HEDGE_PERCENTILE", base.hedge_percentile),
+      hedge_min_samples=env_int(f"{prefix}_HEDGE_MIN_SAMPLES", base.hedge_min_samples),
+    )
+
+
+class CircuitBreaker:
+  """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+  def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+    self.failure_threshold = failure_threshold
+    self.reset_seconds = reset_seconds
+    self.failures = 0
+    self.opened_at: Optional[float] = None
+    self.probe_in_flight = False
+
+  @property
+  def state(self) -> str:
+    if self.opened_at is None:
+      return "closed"
+    if time.monotonic() - self.opened_at >= self.reset_seconds:
+      return "half_open"
+    return "open"
+
+  def retry_after(self) -> float:
+    if self.opened_at is None:
+      return 0.0
+    return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+  def allow(self) -> bool:
+    state = self.state
+    if state == "closed":
+      return True
+    if state == "half_open" and not self.probe_in_flight:
+      self.probe_in_flight = True
+      return True
+    return False
+
+  def record_success(self) -> None:
+    self.failures = 0
+    self.opened_at = None
+    self.probe_in_flight = False
+
+  def record_failure(self) -> None:
+    self.failures += 1
+    if self.probe_in_flight or self.failures >= self.failure_threshold:
+      self.opened_at = time.monotonic()
+    self.probe_in_flight = False
+
+
+class LatencyTracker:
+  """Sliding window of recent successful call latencies."""
+
+  def __init__(self, size: int = 200) -> None:
+    self.samples: deque[float] = deque(maxlen=size)
+
+  def record(self, seconds: float) -> None:
+    self.samples.append(seconds)
+
+  def percentile(self, fraction: float) -> Optional[float]:
+    if not self.samples:
+      return None
+    ordered = sorted(self.samples)
+    index = min(len(ordered) - 1, int(fraction * len(ordered)))
+    return ordered[index]
+
+
+class Upstream:
+  """Resilience wrapper for one upstream service.
+
+  `call` applies a per-attempt timeout, jittered exponential retries for idempotent calls,
+  a circuit breaker, and (optionally) a hedged second request once the first attempt runs
+  past the configured latency percentile.
+  """
+
+  def __init__(
+    self,
+    policy: ResiliencePolicy,
+    *,
+    is_retryable: Callable[[BaseException], bool],
+  ) -> None:
+    self.policy = policy
+    self.is_retryable = is_retryable
+    self.breaker = CircuitBreaker(policy.breaker_failure_threshold, policy.breaker_reset_seconds)
+    self.latency = LatencyTracker()
+    self.retries = 0
+    self.hedges = 0
+
+  def _backoff(self, attempt: int) -> float:
+    ceiling = min(self.policy.backoff_max_seconds, self.policy.backoff_base_seconds * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+  def _hedge_delay(self) -> Optional[float]:
+    if self.policy.hedge_percentile <= 0 or len(self.latency.samples) < self.policy.hedge_min_samples:
+      return None
+    return self.latency.percentile(self.policy.hedge_percentile)
+
+  async def _timed(self, fn: Callable[[], Awaitable[T]]) -> T:
+    started = time.perf_counter()
+    result = await asyncio.wait_for(fn(), timeout=self.policy.timeout_seconds)
+    self.latency.record(time.perf_counter() - started)
+    return result
+
+  async def _attempt(self, fn: Callable[[], Awaitable[T]], *, hedge: bool) -> T:
+    delay = self._hedge_delay() if hedge else None
+    if delay is None:
+      return await self._timed(fn)
+
+    tasks = {asyncio.ensure_future(self._timed(fn))}
+    error: Optional[BaseException] = None
+    try:
+      done, pending = await asyncio.wait(tasks, timeout=delay)
+      if not done:
+        self.hedges += 1
+        tasks.add(asyncio.ensure_future(self._timed(fn)))
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+      while True:
+        for task in done:
+          if task.exception() is None:
+            return task.result()
+          error = task.exception()
+        if not pending:
+          break
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+      # Also runs when the caller is cancelled mid-wait, so no attempt outlives the call.
+      for task in tasks:
+        task.cancel()
+    assert error is not None
+    raise error
+
+  async def call(
+    self,
+    fn: Callable[[], Awaitable[T]],
+    *,
+    idempotent: bool = True,
+    hedge: bool = True,
+  ) -> T:
+    """Run `fn` under this upstream's policy; only idempotent calls are retried or hedged."""
+    attempts = self.policy.max_attempts if idempotent else 1
+    for attempt in range(attempts):
+      if not self.breaker.allow():
+        raise CircuitOpenError(self.policy.name, self.breaker.retry_after())
+      try:
+        result = await self._attempt(fn, hedge=hedge and idempotent)
+      except asyncio.CancelledError:
+        self.breaker.probe_in_flight = False
+        raise
+      except Exception as exc:
+        transient = isinstance(exc, asyncio.TimeoutError) or self.is_retryable(exc)
+        if not transient:
+          self.breaker.record_success()
+          raise
+        self.breaker.record_failure()
+        if attempt + 1 >= attempts:
+          raise
+        self.retries += 1
+        delay = self._backoff(attempt)
+        logger.warning(
+          "%s call failed (%s); retry %s/%s in %.2fs",
+          self.policy.name,
+          type(exc).__name__,
+          attempt + 1,
+          attempts - 1,
+          delay,
+        )
+        await asyncio.sleep(delay)
+      else:
+        self.breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+  def snapshot(self) -> dict:
+    p95 = self.latency.percentile(0.95)
+    return {
+      "upstream": self.policy.name,
+      "circuit": self.breaker.state,
+      "consecutive_failures": self.breaker.failures,
+      "retries": self.retries,
+      "hedged_requests": self.hedges,
+      "p95_latency_seconds": round(p95, 4) if p95 is not None else None,
+    }
@@ -0,0 +1,201 @@
+"""Keep saved job listings current and flag postings that have closed.
+
+``saved_jobs.job_data`` is a snapshot taken at save time. Every
+``SAVED_JOB_REFRESH_INTERVAL_SECONDS`` one worker across the deployment (whichever takes the
+Postgres advisory lock) picks up to ``SAVED_JOB_REFRESH_BATCH_SIZE`` distinct postings that
+have not been checked for ``SAVED_JOB_REFRESH_MAX_AGE_HOURS``. Saved copies are grouped by
+htidocid (falling back to job_id), so one SerpAPI search refreshes a posting for every user
+who saved it, whatever job_id their copy carries. Found listings overwrite the snapshots in
+one bulk update and are written to the shared listing cache. Postings the explicit
+``htidocid:`` search no longer returns (an empty result or SerpAPI's "no results" error) are
+marked expired and are not checked again until re-saved; a miss for an id without an
+htidocid only records the check. Lookups count against ``SAVED_JOB_REFRESH_DAILY_BUDGET``,
+which is tracked in ``upstream_usage`` so restarts and other workers see it, and against the
+global SerpAPI budget. The refresher yields as soon as that budget nears exhaustion or
+searches are being shed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_bool, env_float, env_int
+from db.database import advisory_lock
+from db.repositories.job_listing_repository import store_job_listings
+from db.repositories.saved_job_repository import (
+  expire_saved_jobs,
+  mark_saved_jobs_checked,
+  refresh_saved_jobs,
+  saved_jobs_due_for_refresh,
+)
+from db.repositories.upstream_usage_repository import get_upstream_usage, increment_upstream_usage
+from services.admission import AdmissionRejected, search_admission
+from services.metrics import REGISTRY, Counter
+from services.serpapi_budget import serpapi_budget
+from services.serpapi_client import (
+  SerpAPIBudgetExceeded,
+  SerpAPIError,
+  SerpAPIRateLimited,
+  SerpAPIUnavailable,
+  decode_htidocid,
+  lookup_job_listing,
+)
+
+logger = logging.getLogger(__name__)
+
+ENABLED = env_bool("SAVED_JOB_REFRESH_ENABLED", True)
+INTERVAL_SECONDS = env_float("SAVED_JOB_REFRESH_INTERVAL_SECONDS", 900.0)
+BATCH_SIZE = env_int("SAVED_JOB_REFRESH_BATCH_SIZE", 50)
+MAX_AGE_HOURS = env_float("SAVED_JOB_REFRESH_MAX_AGE_HOURS", 24.0)
+DAILY_BUDGET = env_int("SAVED_JOB_REFRESH_DAILY_BUDGET", 200)
+CONCURRENCY = env_int("SAVED_JOB_REFRESH_CONCURRENCY", 4)
+USAGE_PROVIDER = "serpapi_saved_refresh"
+# Arbitrary application-wide id for pg_try_advisory_lock.
+REFRESH_LOCK_ID = 7_301_047
+
+SAVED_JOB_REFRESH = REGISTRY.register(
+  Counter(
+    "saved_job_refresh_total",
+    "Saved job postings handled by the refresher (refreshed, expired, unresolved, over_budget, error).",
+    ("outcome",),
+  )
+)
+
+
+def group_postings(pairs: list[tuple[str, Optional[str]]]) -> list[dict[str, Any]]:
+  """Group saved job_ids by the posting they point at, so each posting is looked up once."""
+  groups: dict[str, dict[str, Any]] = {}
+  for job_id, stored_htidocid in pairs:
+    htidocid = stored_htidocid or decode_htidocid(job_id)
+    group = groups.setdefault(htidocid or job_id, {"job_ids": [], "htidocid": htidocid})
+    group["job_ids"].append(job_id)
+  return list(groups.values())
+
+
+class SavedJobRefresher:
+  def __init__(
+    self,
+    *,
+    enabled: bool = ENABLED,
+    interval_seconds: float = INTERVAL_SECONDS,
+    batch_size: int = BATCH_SIZE,
+    max_age_hours: float = MAX_AGE_HOURS,
+    daily_budget: int = DAILY_BUDGET,
+    concurrency: int = CONCURRENCY,
+  ) -> None:
+    self.enabled = enabled
+    self.interval_seconds = interval_seconds
+    self.batch_size = max(1, batch_size)
+    self.max_age_hours = max_age_hours
+    self.daily_budget = max(0, daily_budget)
+    self.concurrency = max(1, concurrency)
+    self.last_cycle: Optional[dict[str, Any]] = None
+
+  async def _lookup(self, group: dict[str, Any], semaphore: asyncio.Semaphore) -> tuple[str, Any]:
+    async with semaphore:
+      if serpapi_budget.near_exhausted():
+        return "over_budget", None
+      try:
+        async with search_admission.slot():
+          return "found", await lookup_job_listing(group["job_ids"][0], group["htidocid"])
+      except (AdmissionRejected, SerpAPIBudgetExceeded, SerpAPIRateLimited, SerpAPIUnavailable) as exc:
+        # Searches are being shed or SerpAPI is down; user traffic comes first.
+        logger.info("Saved job refresh deferred: %s", exc)
+        return "over_budget", None
+      except SerpAPIError:
+        logger.warning("Unable to refresh saved job %s", group["job_ids"][0], exc_info=True)
+        return "error", None
+
+  async def refresh_once(self, session_factory: async_sessionmaker[AsyncSession]) -> dict[str, Any]:
+    """Run one refresh cycle if no other worker is; returns counts for the cycle."""
+    async with advisory_lock(REFRESH_LOCK_ID) as acquired:
+      if not acquired:
+        return {"skipped": "locked"}
+      now = datetime.now(timezone.utc)
+      async with session_factory() as session:
+        used = await get_upstream_usage(session, USAGE_PROVIDER, now.date())
+        remaining = self.daily_budget - used if self.daily_budget else self.batch_size
+        if remaining <= 0:
+          return {"skipped": "daily_budget", "used_today": used}
+        pairs = await saved_jobs_due_for_refresh(
+          session, checked_before=now - timedelta(hours=self.max_age_hours), limit=self.batch_size
+        )
+      groups = group_postings(pairs)[:remaining]
+
+      semaphore = asyncio.Semaphore(self.concurrency)
+      outcomes = await asyncio.gather(*(self._lookup(group, semaphore) for group in groups))
+      refreshed: list[dict[str, Any]] = []
+      expired: list[dict[str, Any]] = []
+      unresolved: list[dict[str, Any]] = []
+      checked: list[dict[str, Any]] = []
+      stats = {
+        "postings": len(groups),
+        "job_ids": len(pairs),
+        "refreshed": 0,
+        "expired": 0,
+        "unresolved": 0,
+        "over_budget": 0,
+        "errors": 0,
+      }
+      for group, (outcome, listing) in zip(groups, outcomes):
+        if outcome == "over_budget":
+          stats["over_budget"] += 1
+        elif outcome == "error":
+          # Checked again after a full interval, not every cycle at the head of the queue.
+          stats["errors"] += 1
+          checked.append(group)
+        elif listing is None and group["htidocid"]:
+          expired.append(group)
+        elif listing is None:
+          unresolved.append(group)
+          checked.append(group)
+        else:
+          refreshed.append({**group, "job_data": listing.model_dump()})
+      stats["refreshed"], stats["expired"], stats["unresolved"] = len(refreshed), len(expired), len(unresolved)
+      for outcome in ("refreshed", "expired", "unresolved", "over_budget"):
+        SAVED_JOB_REFRESH.inc((outcome,), stats[outcome])
+      SAVED_JOB_REFRESH.inc(("error",), stats["errors"])
+
+      searches = len(groups) - stats["over_budget"]
+      async with session_factory() as session:
+        await refresh_saved_jobs(session, refreshed)
+        await expire_saved_jobs(session, expired)
+        await mark_saved_jobs_checked(session, checked)
+        if refreshed:
+          await store_job_listings(session, [group["job_data"] for group in refreshed])
+        if searches:
+          stats["used_today"] = await increment_upstream_usage(session, USAGE_PROVIDER, now.date(), searches)
+      return stats
+
+  async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    if not self.enabled:
+      return
+    while True:
+      await asyncio.sleep(self.interval_seconds)
+      try:
+        self.last_cycle = {"at": datetime.now(timezone.utc).isoformat(), **await self.refresh_once(session_factory)}
+        logger.debug("Saved job refresh cycle: %s", self.last_cycle)
+      except Exception:
+        logger.exception("Saved job refresh cycle failed")
+
+  def snapshot(self) -> dict[str, Any]:
+    return {
+      "enabled": self.enabled,
+      "interval_seconds": self.interval_seconds,
+      "batch_size": self.batch_size,
+      "max_age_hours": self.max_age_hours,
+      "daily_budget": self.daily_budget,
+      "last_cycle": self.last_cycle,
+    }
+
+
+saved_job_refresher = SavedJobRefresher()
+
+
+async def run_saved_job_refresher(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  await saved_job_refresher.run(session_factory)
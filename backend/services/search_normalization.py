@@ -0,0 +1,191 @@
+"""Canonical forms for job search queries and locations.
+
+``/jobs/search`` runs every query and location through this module before it builds the
+cache key or calls SerpAPI, so spellings that mean the same search ("Software Engineer",
+"software  engineer ", "SWE jobs") share one cache entry and one upstream call.
+
+The canonical query is also what SerpAPI receives, so only rewrites that keep the meaning
+are applied. Queries are NFKC-normalized, case-folded and stripped of punctuation that does
+not belong to a token (``c++``, ``c#`` and ``node.js`` survive). Unambiguous title
+abbreviations and plurals are expanded, trailing filler ("jobs", "positions") is dropped, and
+a repeated word is collapsed. Connectives and word order are kept ("Head of Engineering",
+"Team Lead"); only "senior" and "junior" move to the front, so "Software Engineer Sr." and
+"Sr. Software Engineer" agree.
+
+Locations are folded the same way. A bare "remote" (or "Remote (US)") and the US spellings
+map to the country-wide search; a remote location that names a region keeps it ("Remote,
+Europe"). Anything else is resolved through ``services.gazetteer``, and places it does not
+know keep a normalized "City, ST" / "City, Country" shape. Both functions are idempotent, so
+a value that is already canonical can be passed through again safely.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from services.gazetteer import resolve_place, us_state_code
+
+DEFAULT_LOCATION = "United States"
+
+# Dropped from the end of a query: "python developer jobs" searches for "python developer".
+TRAILING_FILLER = frozenset(
+  {"job", "jobs", "role", "roles", "position", "positions", "opening", "openings", "vacancy", "vacancies"}
+)
+
+# Whole-phrase rewrites applied before single tokens, longest first.
+PHRASE_ALIASES = {
+  "software development engineer": "software engineer",
+  "software dev engineer": "software engineer",
+  "front end": "frontend",
+  "back end": "backend",
+  "full stack": "fullstack",
+}
+
+# Only abbreviations with a single reading in a job search. "pm", "ai", "em" and "ts" have
+# several, "eng" and "engr" can mean engineer or engineering ("VP Eng"), and "golang" is the
+# unambiguous spelling of "go", so those are sent as typed.
+TOKEN_ALIASES = {
+  "swe": "software engineer",
+  "sde": "software engineer",
+  "sre": "site reliability engineer",
+  "mle": "machine learning engineer",
+  "ml": "machine learning",
+  "tpm": "technical program manager",
+  "qa": "quality assurance",
+  "dev": "developer",
+  "devs": "developer",
+  "developers": "developer",
+  "engineers": "engineer",
+  "mgr": "manager",
+  "managers": "manager",
+  "analysts": "analyst",
+  "scientists": "scientist",
+  "designers": "designer",
+  "sr": "senior",
+  "snr": "senior",
+  "jr": "junior",
+  "jnr": "junior",
+  "internship": "intern",
+  "internships": "intern",
+  "interns": "intern",
+  "js": "javascript",
+  "k8s": "kubernetes",
+}
+
+# Seniority words that mean the same before or after the title; they lead the canonical query.
+LEADING_TOKENS = ("junior", "senior")
+
+COUNTRY_LOCATIONS = frozenset({"", "us", "usa", "u s", "u s a", "united states", "united states of america", "america"})
+# Folded forms of "remote", "Remote (US)" and "Remote (USA)": remote with no region searches the country.
+REMOTE_LOCATIONS = frozenset({"remote", "remote us", "remote usa", "us remote", "usa remote"})
+
+# Keep characters that are part of tech tokens (c++, c#, node.js, .net); everything else splits.
+_SEPARATORS = re.compile(r"[^\w+#.]+")
+_LOCATION_SEPARATORS = re.compile(r"[^\w,]+")
+
+
+def _fold(text: str) -> str:
+  return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _tokens(text: str) -> list[str]:
+  tokens = []
+  for token in _SEPARATORS.split(_fold(text)):
+    # Sentence punctuation ("sr.", "...") is not part of the token; ".net" and "node.js" are.
+    token = token.rstrip(".")
+    if token and token.strip("+#."):
+      tokens.append(token)
+  return tokens
+
+
+def _apply_phrase_aliases(tokens: list[str]) -> list[str]:
+  text = f" {' '.join(tokens)} "
+  for phrase in sorted(PHRASE_ALIASES, key=len, reverse=True):
+    text = text.replace(f" {phrase} ", f" {PHRASE_ALIASES[phrase]} ")
+  return text.split()
+
+
+@lru_cache(maxsize=4096)
+def canonical_query(query: str) -> str:
+  """Canonical text for a keyword query; used for the cache key and sent upstream."""
+  tokens = _apply_phrase_aliases(_tokens(query))
+  while len(tokens) > 1 and tokens[-1] in TRAILING_FILLER:
+    tokens.pop()
+  expanded: list[str] = []
+  for token in tokens:
+    expanded.extend(TOKEN_ALIASES.get(token, token).split())
+
+  leading: list[str] = []
+  rest: list[str] = []
+  for token in expanded:
+    if token in LEADING_TOKENS:
+      if token not in leading:
+        leading.append(token)
+    elif not rest or rest[-1] != token:
+      # "swe engineer" expands to "software engineer engineer".
+      rest.append(token)
+  leading.sort(key=LEADING_TOKENS.index)
+  return " ".join([*leading, *rest])
+
+
+def canonical_terms(values: Optional[Iterable[str]]) -> list[str]:
+  """Canonicalize role or seniority keywords, dropping blanks and duplicates."""
+  terms = {canonical_query(value) for value in values or () if value and value.strip()}
+  return sorted(term for term in terms if term)
+
+
+def _title(text: str) -> str:
+  return " ".join(word.capitalize() for word in text.split())
+
+
+def _region(parts: list[str]) -> str:
+  return ", ".join(part.upper() if len(part) <= 3 else _title(part) for part in parts)
+
+
+def _remote_location(parts: list[str]) -> str:
+  """Remote with a region ("Remote - Europe", "Berlin (remote)") keeps it: "Remote, Europe"."""
+  region = [" ".join(word for word in part.split() if word != "remote") for part in parts]
+  region = [part for part in region if part]
+  if not region or " ".join(region) in COUNTRY_LOCATIONS:
+    return DEFAULT_LOCATION
+  return f"Remote, {_region(region)}"
+
+
+@lru_cache(maxsize=4096)
+def canonical_location(location: Optional[str]) -> str:
+  """Canonical location string: a gazetteer place name, "City, ST", or the country-wide default."""
+  folded = _LOCATION_SEPARATORS.sub(" ", _fold(location or "")).replace(" ,", ",")
+  parts = [" ".join(part.split()) for part in folded.split(",")]
+  parts = [part for part in parts if part]
+  # "Austin, TX, United States" and "Austin, TX, USA" mean "Austin, TX".
+  while len(parts) > 1 and parts[-1] in COUNTRY_LOCATIONS:
+    parts.pop()
+  flat = " ".join(parts)
+  if flat in COUNTRY_LOCATIONS or flat in REMOTE_LOCATIONS:
+    return DEFAULT_LOCATION
+  if "remote" in flat.split():
+    return _remote_location(parts)
+  place = resolve_place(flat)
+  if place is not None:
+    return place.name
+
+  # Not in the gazetteer: normalize the shape so spellings still share a cache key.
+  if len(parts) == 1:
+    # "boise idaho" / "boise id": peel a trailing state off a comma-less value.
+    words = parts[0].split()
+    for size in (2, 1):
+      if len(words) > size and us_state_code(" ".join(words[-size:])):
+        parts = [" ".join(words[:-size]), " ".join(words[-size:])]
+        break
+
+  if len(parts) >= 2:
+    city, region = parts[0], parts[1]
+    code = us_state_code(region)
+    if code:
+      return f"{_title(city)}, {code}"
+    # Short trailing parts are country or region codes ("Leeds, UK").
+    return f"{_title(city)}, {_region(parts[1:])}"
+  return _title(flat)
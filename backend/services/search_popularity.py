@@ -0,0 +1,132 @@
+"""Decayed per-key popularity for canonical job searches.
+
+``/jobs/search`` records every request's canonical cache key here (hits and misses alike).
+Counts accumulate in memory and a background task folds them into ``search_popularity``
+every ``SEARCH_POPULARITY_FLUSH_SECONDS``, decaying the stored score by its age with a
+``SEARCH_POPULARITY_HALF_LIFE_SECONDS`` half-life. All workers add to the same rows, so the
+table ranks searches across the deployment; the cache warmer reads the head of it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_float, env_int
+from db.models.search_popularity import SearchPopularity
+from db.repositories.search_popularity_repository import prune_search_popularity, record_search_popularity
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_SECONDS = env_float("SEARCH_POPULARITY_HALF_LIFE_SECONDS", 6 * 3600.0)
+FLUSH_SECONDS = env_float("SEARCH_POPULARITY_FLUSH_SECONDS", 60.0)
+MAX_PENDING_KEYS = env_int("SEARCH_POPULARITY_MAX_PENDING_KEYS", 10_000)
+PRUNE_SCORE = env_float("SEARCH_POPULARITY_PRUNE_SCORE", 0.05)
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+
+def _key_fields(cache_key: dict[str, Any]) -> dict[str, Any]:
+  return {
+    "query": cache_key["query"],
+    "location": cache_key["location"],
+    "page": cache_key["page"],
+    "employment_type": cache_key.get("employment_type"),
+    "role_filters": sorted(cache_key.get("roles") or []),
+    "seniority_filters": sorted(cache_key.get("seniority_filters") or []),
+  }
+
+
+def cache_key_hash(cache_key: dict[str, Any]) -> str:
+  encoded = json.dumps(_key_fields(cache_key), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+  return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def cache_key_from_row(row: SearchPopularity) -> dict[str, Any]:
+  """The search route's cache key for a stored popularity row."""
+  return {
+    "query": row.query,
+    "location": row.location,
+    "page": row.page,
+    "employment_type": row.employment_type,
+    "roles": list(row.role_filters) or None,
+    "seniority_filters": list(row.seniority_filters) or None,
+  }
+
+
+class SearchPopularityTracker:
+  def __init__(self, max_pending_keys: int = MAX_PENDING_KEYS, half_life_seconds: float = HALF_LIFE_SECONDS) -> None:
+    self.max_pending_keys = max_pending_keys
+    self.half_life_seconds = half_life_seconds
+    self._pending: dict[str, dict[str, Any]] = {}
+    self.dropped_count = 0
+    self._last_pruned = time.monotonic()
+
+  def record(self, cache_key: dict[str, Any], weight: float = 1.0) -> None:
+    key_hash = cache_key_hash(cache_key)
+    row = self._pending.get(key_hash)
+    if row is None:
+      if len(self._pending) >= self.max_pending_keys:
+        # Long-tail keys beyond the cap are dropped until the next flush; the head is
+        # already present by then.
+        self.dropped_count += 1
+        return
+      row = self._pending[key_hash] = {"key_hash": key_hash, **_key_fields(cache_key), "score": 0.0}
+    row["score"] += weight
+
+  @property
+  def pending_keys(self) -> int:
+    return len(self._pending)
+
+  def _restore(self, rows: dict[str, dict[str, Any]]) -> None:
+    for key_hash, row in rows.items():
+      current = self._pending.setdefault(key_hash, {**row, "score": 0.0})
+      current["score"] += row["score"]
+
+  async def flush(self, session: AsyncSession) -> int:
+    pending, self._pending = self._pending, {}
+    if not pending:
+      return 0
+    now = datetime.now(timezone.utc)
+    try:
+      await record_search_popularity(
+        session,
+        list(pending.values()),
+        scored_at=now,
+        half_life_seconds=self.half_life_seconds,
+      )
+    except Exception:
+      self._restore(pending)
+      raise
+    if time.monotonic() - self._last_pruned >= PRUNE_INTERVAL_SECONDS:
+      self._last_pruned = time.monotonic()
+      await prune_search_popularity(session, at=now, half_life_seconds=self.half_life_seconds, min_score=PRUNE_SCORE)
+    return len(pending)
+
+
+search_popularity = SearchPopularityTracker()
+
+
+async def run_popularity_flusher(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  """Background task that periodically persists this worker's popularity counts."""
+  try:
+    while True:
+      await asyncio.sleep(FLUSH_SECONDS)
+      try:
+        async with session_factory() as session:
+          await search_popularity.flush(session)
+      except Exception:
+        logger.exception("Unable to persist search popularity")
+  finally:
+    if search_popularity.pending_keys:
+      try:
+        async with session_factory() as session:
+          await search_popularity.flush(session)
+      except Exception:
+        logger.exception("Unable to persist search popularity on shutdown")
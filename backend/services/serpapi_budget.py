@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_float, env_int
+from db.repositories.upstream_usage_repository import get_upstream_usage, increment_upstream_usage
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = "serpapi"
+
+
+GLOBAL_RATE_PER_SECOND = env_float("SERPAPI_GLOBAL_RATE_PER_SECOND", 2.0)
+GLOBAL_BURST = env_float("SERPAPI_GLOBAL_BURST", 10)
+GLOBAL_MAX_WAIT_SECONDS = env_float("SERPAPI_GLOBAL_MAX_WAIT_SECONDS", 5.0)
+USER_RATE_PER_MINUTE = env_float("SERPAPI_USER_RATE_PER_MINUTE", 20)
+USER_BURST = env_float("SERPAPI_USER_BURST", 10)
+IP_RATE_PER_MINUTE = env_float("SERPAPI_IP_RATE_PER_MINUTE", 30)
+IP_BURST = env_float("SERPAPI_IP_BURST", 15)
+DAILY_BUDGET = env_int("SERPAPI_DAILY_BUDGET", 0)  # 0 disables the daily budget
+DEGRADE_RATIO = env_float("SERPAPI_DEGRADE_RATIO", 0.9)
+USAGE_FLUSH_SECONDS = env_float("SERPAPI_USAGE_FLUSH_SECONDS", 15.0)
+STALE_CACHE_TTL_SECONDS = env_int("SERPAPI_STALE_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+
+
+class TokenBucket:
+  """Classic token bucket refilled continuously at `rate` tokens per second up to `capacity`."""
+
+  def __init__(self, rate: float, capacity: float) -> None:
+    self.rate = rate
+    self.capacity = capacity
+    self.tokens = capacity
+    self.updated = time.monotonic()
+
+  def _refill(self) -> None:
+    now = time.monotonic()
+    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+  def available(self) -> float:
+    self._refill()
+    return self.tokens
+
+  def can_acquire(self, cost: float = 1.0) -> bool:
+    return self.available() >= cost
+
+  def consume(self, cost: float = 1.0) -> None:
+    self._refill()
+    self.tokens -= cost
+
+  def try_acquire(self, cost: float = 1.0) -> bool:
+    if not self.can_acquire(cost):
+      return False
+    self.tokens -= cost
+    return True
+
+  def seconds_until(self, cost: float = 1.0) -> float:
+    """Seconds until `cost` tokens are available (inf when the bucket can never hold them)."""
+    missing = cost - self.available()
+    if missing <= 0:
+      return 0.0
+    if self.rate <= 0 or cost > self.capacity:
+      return float("inf")
+    return missing / self.rate
+
+  async def acquire(self, cost: float = 1.0, *, timeout: float) -> bool:
+    """Wait up to `timeout` seconds for tokens; return False without consuming on timeout."""
+    deadline = time.monotonic() + timeout
+    while not self.try_acquire(cost):
+      wait = self.seconds_until(cost)
+      if time.monotonic() + wait > deadline:
+        return False
+      await asyncio.sleep(wait)
+    return True
+
+
+class KeyedTokenBuckets:
+  """Per-key sub-buckets (users, client IPs) with LRU eviction to bound memory."""
+
+  def __init__(self, rate: float, capacity: float, max_keys: int = 10_000) -> None:
+    self.rate = rate
+    self.capacity = capacity
+    self.max_keys = max_keys
+    self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+  def get(self, key: str) -> TokenBucket:
+    bucket = self._buckets.get(key)
+    if bucket is None:
+      bucket = TokenBucket(self.rate, self.capacity)
+      self._buckets[key] = bucket
+      if len(self._buckets) > self.max_keys:
+        self._buckets.popitem(last=False)
+    else:
+      self._buckets.move_to_end(key)
+    return bucket
+
+  def __len__(self) -> int:
+    return len(self._buckets)
+
+
+class SerpAPIBudget:
+  """Rate limits SerpAPI traffic and accounts for the searches spent per UTC day.
+
+  Usage is counted locally and flushed to Postgres periodically; each flush returns the
+  cross-worker total so every worker sees roughly the same remaining budget.
+  """
+
+  def __init__(self) -> None:
+    self.global_bucket = TokenBucket(GLOBAL_RATE_PER_SECOND, GLOBAL_BURST)
+    self.user_buckets = KeyedTokenBuckets(USER_RATE_PER_MINUTE / 60, USER_BURST)
+    self.ip_buckets = KeyedTokenBuckets(IP_RATE_PER_MINUTE / 60, IP_BURST)
+    self.daily_budget = DAILY_BUDGET
+    self.degrade_ratio = DEGRADE_RATIO
+    self.usage_date = self._today()
+    self.synced_count = 0
+    self.pending_count = 0
+    self.rejected_count = 0
+    self.degraded_count = 0
+    self.last_flush_at: Optional[datetime] = None
+
+  @staticmethod
+  def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+  def _roll_day(self) -> None:
+    today = self._today()
+    if today != self.usage_date:
+      # Usage not yet flushed at midnight is counted towards the new day.
+      self.usage_date = today
+      self.synced_count = 0
+
+  @property
+  def used_today(self) -> int:
+    self._roll_day()
+    return self.synced_count + self.pending_count
+
+  def remaining(self) -> Optional[int]:
+    if self.daily_budget <= 0:
+      return None
+    return max(0, self.daily_budget - self.used_today)
+
+  def exhausted(self) -> bool:
+    return self.daily_budget > 0 and self.used_today >= self.daily_budget
+
+  def near_exhausted(self) -> bool:
+    """True once usage crosses the degrade ratio; callers should prefer cached or stale data."""
+    return self.daily_budget > 0 and self.used_today >= self.daily_budget * self.degrade_ratio
+
+  def admit(self, *, user_id: Optional[str], client_ip: Optional[str], cost: int = 1) -> bool:
+    """Charge the per-user and per-IP sub-buckets for `cost` upstream searches."""
+    buckets = []
+    if user_id:
+      buckets.append(self.user_buckets.get(user_id))
+    if client_ip:
+      buckets.append(self.ip_buckets.get(client_ip))
+    if not all(bucket.can_acquire(cost) for bucket in buckets):
+      self.rejected_count += 1
+      return False
+    for bucket in buckets:
+      bucket.consume(cost)
+    return True
+
+  def retry_after(self, *, user_id: Optional[str], client_ip: Optional[str], cost: int = 1) -> int:
+    waits = [0.0]
+    if user_id:
+      waits.append(self.user_buckets.get(user_id).seconds_until(cost))
+    if client_ip:
+      waits.append(self.ip_buckets.get(client_ip).seconds_until(cost))
+    wait = max(waits)
+    return 60 if wait == float("inf") else max(1, int(wait + 0.999))
+
+  async def acquire_upstream_slot(self) -> bool:
+    """Wait for the global bucket; False when no slot frees up within the configured wait."""
+    return await self.global_bucket.acquire(1, timeout=GLOBAL_MAX_WAIT_SECONDS)
+
+  def record_search(self, count: int = 1) -> None:
+    self._roll_day()
+    self.pending_count += count
+
+  def record_degraded(self) -> None:
+    self.degraded_count += 1
+
+  async def load(self, session: AsyncSession) -> None:
+    self._roll_day()
+    self.synced_count = await get_upstream_usage(session, PROVIDER, self.usage_date)
+
+  async def flush(self, session: AsyncSession) -> None:
+    usage_date = self.usage_date
+    self._roll_day()
+    pending, self.pending_count = self.pending_count, 0
+    try:
+      total = await increment_upstream_usage(session, PROVIDER, usage_date, pending)
+    except Exception:
+      self.pending_count += pending
+      raise
+    if usage_date == self.usage_date:
+      self.synced_count = total
+    self.last_flush_at = datetime.now(timezone.utc)
+
+  def snapshot(self) -> dict[str, Any]:
+    used = self.used_today
+    return {
+      "provider": PROVIDER,
+      "date": self.usage_date.isoformat(),
+      "used": used,
+      "pending_flush": self.pending_count,
+      "daily_budget": self.daily_budget or None,
+      "remaining": self.remaining(),
+      "near_exhausted": self.near_exhausted(),
+      "exhausted": self.exhausted(),
+      "global_tokens_available": round(self.global_bucket.available(), 2),
+      "global_rate_per_second": self.global_bucket.rate,
+      "tracked_users": len(self.user_buckets),
+      "tracked_ips": len(self.ip_buckets),
+      "rejected_requests": self.rejected_count,
+      "degraded_responses": self.degraded_count,
+      "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+    }
+
+
+serpapi_budget = SerpAPIBudget()
+
+
+async def run_usage_flusher(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  """Background task that loads today's usage and periodically persists the local counter."""
+  try:
+    async with session_factory() as session:
+      await serpapi_budget.load(session)
+  except Exception:
+    logger.exception("Unable to load SerpAPI usage counter")
+
+  try:
+    while True:
+      await asyncio.sleep(USAGE_FLUSH_SECONDS)
+      try:
+        async with session_factory() as session:
+          await serpapi_budget.flush(session)
+      except Exception:
+        logger.exception("Unable to persist SerpAPI usage counter")
+  finally:
+    if serpapi_budget.pending_count:
+      try:
+        async with session_factory() as session:
+          await serpapi_budget.flush(session)
+      except Exception:
+        logger.exception("Unable to persist SerpAPI usage counter on shutdown")
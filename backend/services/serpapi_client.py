@@ -1,26 +1,89 @@
+import asyncio
 import base64
 import json
-import os
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 import httpx
-from dotenv import load_dotenv
+from pydantic import TypeAdapter
 
-from models.jobs import JobApplyOption, JobHighlight, JobListing
+from config import env_float, get_settings
+from models.jobs import JobListing
+from services.metrics import instrument_upstream
+from services.resilience import CircuitOpenError, ResiliencePolicy, Upstream
+from services.gazetteer import resolve_place
+from services.search_normalization import DEFAULT_LOCATION, canonical_location
+from services.serpapi_budget import serpapi_budget
+from services.tracing import span, traced
 
-load_dotenv()
-
-SERP_API_KEY = os.getenv("SERPAPI_API_KEY")
-SERP_API_URL = "https://serpapi.com/search.json"
+SERP_API_KEY = get_settings().serpapi_api_key
+SERP_API_URL = get_settings().serpapi_url
 
 JOB_CACHE: Dict[str, JobListing] = {}
 HTID_CACHE: Dict[str, JobListing] = {}
 
+_JOB_LISTINGS_ADAPTER = TypeAdapter(List[JobListing])
+
 
 class SerpAPIError(Exception):
   """Raised when SerpAPI returns an error payload."""
 
 
+class SerpAPIRateLimited(SerpAPIError):
+  """Raised when the local SerpAPI rate limiter has no capacity for another search."""
+
+  def __init__(self, message: str, retry_after: int = 1) -> None:
+    super().__init__(message)
+    self.retry_after = retry_after
+
+
+class SerpAPIBudgetExceeded(SerpAPIError):
+  """Raised when the daily SerpAPI search budget is spent."""
+
+
+class SerpAPITransientError(SerpAPIError):
+  """Raised for timeouts, connection failures and 5xx/429 responses that are worth retrying."""
+
+
+class SerpAPINoResults(SerpAPIError):
+  """Raised when SerpAPI reports that Google returned no results for the search."""
+
+
+class SerpAPIUnavailable(SerpAPIError):
+  """Raised without calling SerpAPI while its circuit breaker is open."""
+
+  def __init__(self, message: str, retry_after: int = 30) -> None:
+    super().__init__(message)
+    self.retry_after = retry_after
+
+
+# SerpAPI answers an empty search with an error payload instead of an empty jobs_results.
+NO_RESULTS_ERROR = "Google hasn't returned any results"
+
+SERPAPI_POLICY = ResiliencePolicy.from_env("serpapi", "SERPAPI", timeout_seconds=15.0, max_attempts=3)
+serpapi_upstream = Upstream(SERPAPI_POLICY, is_retryable=lambda exc: isinstance(exc, SerpAPITransientError))
+
+# A detail lookup starts its title/company search early only when the htidocid search is this slow.
+DETAIL_HEDGE_SECONDS = env_float("SERPAPI_DETAIL_HEDGE_SECONDS", 3.0)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+  """Shared client so SerpAPI calls reuse pooled keep-alive connections."""
+  global _http_client
+  if _http_client is None or _http_client.is_closed:
+    _http_client = httpx.AsyncClient(timeout=SERPAPI_POLICY.timeout_seconds)
+  return _http_client
+
+
+async def close_http_client() -> None:
+  global _http_client
+  if _http_client is not None:
+    await _http_client.aclose()
+    _http_client = None
+
+
 def _ensure_api_key() -> None:
   if not SERP_API_KEY:
     raise ValueError("SERPAPI_API_KEY is not configured")
@@ -36,7 +99,9 @@ def _decode_job_payload(job_id: Optional[str]) -> Optional[Dict[str, Any]]:
     return None
 
 
-def _decode_htidocid(job_id: Optional[str]) -> Optional[str]:
+@lru_cache(maxsize=4096)
+def decode_htidocid(job_id: Optional[str]) -> Optional[str]:
+  """Extract the htidocid embedded in a SerpAPI job_id (memoized, job_ids repeat across pages and workers)."""
   payload = _decode_job_payload(job_id)
   return payload.get("htidocid") if payload else None
 
@@ -48,59 +113,81 @@ def _cache_job(job: JobListing) -> None:
     HTID_CACHE[job.htidocid] = job
 
 
-def _map_job(job: dict) -> JobListing:
+def _job_fields(job: dict) -> Dict[str, Any]:
+  """Project a raw SerpAPI result onto plain JobListing fields without building models."""
   detected_extensions = job.get("detected_extensions") or {}
-  apply_options_raw = job.get("apply_options") or []
-  highlights_raw = job.get("job_highlights") or []
-
-  apply_options = [
-    JobApplyOption(title=option.get("title"), link=option.get("link"))
-    for option in apply_options_raw
-    if option.get("link")
-  ]
-
-  highlights = [
-    JobHighlight(title=highlight.get("title"), items=highlight.get("items") or [])
-    for highlight in highlights_raw
-  ]
-
   job_id = job.get("job_id")
-
-  mapped_job = JobListing(
-    job_id=job_id,
-    htidocid=_decode_htidocid(job_id) or job.get("htidocid"),
-    title=job.get("title") or job.get("job_title"),
-    company=job.get("company_name"),
-    location=job.get("location"),
-    via=job.get("via"),
-    description=job.get("description") or job.get("description_full"),
-    posted_at=detected_extensions.get("posted_at"),
-    salary=detected_extensions.get("salary"),
-    extensions=job.get("extensions") or [],
-    detected_extensions=detected_extensions,
-    apply_options=apply_options,
-    job_highlights=highlights,
-    share_link=job.get("share_link"),
-  )
-
-  _cache_job(mapped_job)
-  return mapped_job
+  return {
+    "job_id": job_id,
+    "htidocid": decode_htidocid(job_id) or job.get("htidocid"),
+    "title": job.get("title") or job.get("job_title"),
+    "company": job.get("company_name"),
+    "location": job.get("location"),
+    "via": job.get("via"),
+    "description": job.get("description") or job.get("description_full"),
+    "posted_at": detected_extensions.get("posted_at"),
+    "salary": detected_extensions.get("salary"),
+    "extensions": job.get("extensions") or [],
+    "detected_extensions": detected_extensions,
+    "apply_options": [
+      {"title": option.get("title"), "link": option.get("link")}
+      for option in job.get("apply_options") or []
+      if option.get("link")
+    ],
+    "job_highlights": [
+      {"title": highlight.get("title"), "items": highlight.get("items") or []}
+      for highlight in job.get("job_highlights") or []
+    ],
+    "share_link": job.get("share_link"),
+  }
+
+
+def _map_jobs(jobs_raw: List[dict]) -> List[JobListing]:
+  """Map a page of SerpAPI results with a single validation pass."""
+  mapped = _JOB_LISTINGS_ADAPTER.validate_python([_job_fields(job) for job in jobs_raw])
+  for job in mapped:
+    _cache_job(job)
+  return mapped
 
 
-async def _serp_api_request(params: dict) -> dict:
-  async with httpx.AsyncClient(timeout=15) as client:
-    try:
-      response = await client.get(SERP_API_URL, params=params)
-      response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
-      raise SerpAPIError(exc.response.text) from exc
-    data = response.json()
+@instrument_upstream("serpapi", "search_attempt")
+async def _serp_api_attempt(params: dict) -> dict:
+  serpapi_budget.record_search()
+  try:
+    response = await _get_http_client().get(SERP_API_URL, params=params)
+  except httpx.TransportError as exc:
+    raise SerpAPITransientError(f"SerpAPI connection failed: {exc!r}") from exc
+  if response.status_code == 429 or response.status_code >= 500:
+    raise SerpAPITransientError(response.text)
+  try:
+    response.raise_for_status()
+  except httpx.HTTPStatusError as exc:
+    raise SerpAPIError(exc.response.text) from exc
+  data = response.json()
 
   if "error" in data:
+    if str(data["error"]).startswith(NO_RESULTS_ERROR):
+      raise SerpAPINoResults(data["error"])
     raise SerpAPIError(data["error"])
   return data
 
 
+@instrument_upstream("serpapi", "search")
+async def _serp_api_request(params: dict) -> dict:
+  if serpapi_budget.exhausted():
+    raise SerpAPIBudgetExceeded("Daily SerpAPI search budget exhausted")
+  if not await serpapi_budget.acquire_upstream_slot():
+    raise SerpAPIRateLimited("SerpAPI rate limit reached", retry_after=1)
+
+  try:
+    return await serpapi_upstream.call(lambda: _serp_api_attempt(params))
+  except CircuitOpenError as exc:
+    raise SerpAPIUnavailable(str(exc), retry_after=max(1, int(exc.retry_after))) from exc
+  except asyncio.TimeoutError as exc:
+    raise SerpAPITransientError("SerpAPI request timed out") from exc
+
+
+@traced("serpapi.fetch_jobs")
 async def fetch_jobs_from_serpapi(
   query: str,
   location: str,
@@ -113,9 +200,8 @@ async def fetch_jobs_from_serpapi(
   seniority_keywords: Optional[List[str]] = None,
 ) -> List[JobListing]:
   _ensure_api_key()
-  normalized_location = location.strip()
-  if normalized_location.lower() in {"remote", "remote (us)", "remote (usa)"}:
-    normalized_location = "United States"
+  normalized_location = canonical_location(location)
+  place = resolve_place(normalized_location)
 
   current_page = 1
   next_page_token: Optional[str] = None
@@ -132,8 +218,9 @@ async def fetch_jobs_from_serpapi(
       "q": combined_query,
       "api_key": SERP_API_KEY,
     }
-    if use_uule and uule:
-      params["uule"] = uule
+    if use_uule and (uule or place):
+      # Known places go upstream as their precomputed uule, never as free text.
+      params["uule"] = uule or place.uule
     elif normalized_location:
       params["location"] = normalized_location
     if employment_type:
@@ -157,19 +244,73 @@ async def fetch_jobs_from_serpapi(
     current_page += 1
 
   jobs_raw = data.get("jobs_results", []) if data else []
-  mapped = [_map_job(job) for job in jobs_raw]
-  return mapped
+  with span("serpapi.map_jobs", results=len(jobs_raw)):
+    return _map_jobs(jobs_raw)
 
 
-async def fetch_job_detail_from_serpapi(job_id: str) -> Optional[JobListing]:
-  _ensure_api_key()
-  if job_id in JOB_CACHE:
-    return JOB_CACHE[job_id]
-  if job_id in HTID_CACHE:
-    return HTID_CACHE[job_id]
+def get_cached_job(job_id: str) -> Optional[JobListing]:
+  """Return a listing already mapped by this worker, keyed by job_id or htidocid."""
+  return JOB_CACHE.get(job_id) or HTID_CACHE.get(job_id)
+
+
+def remember_job(job: JobListing) -> None:
+  """Make a listing loaded from elsewhere (e.g. the database) available to the in-process caches."""
+  _cache_job(job)
+
+
+async def _first_matching_job(
+  strategies: List[Callable[[], Awaitable[List[JobListing]]]],
+  matches: Callable[[JobListing], bool],
+  hedge_delay: float = DETAIL_HEDGE_SECONDS,
+) -> Optional[JobListing]:
+  """Run lookup strategies in order and return the first matching job.
 
+  The next strategy starts once every running one has missed, or as a hedge when none has
+  answered within ``hedge_delay`` seconds (0 disables hedging), so a detail view normally
+  costs one search. Strategies still running when a match arrives are cancelled.
+  """
+  remaining = list(strategies)
+  running: set[asyncio.Future] = set()
+  last_error: Optional[SerpAPIError] = None
+  failures = 0
+  try:
+    while remaining or running:
+      if remaining and not running:
+        running.add(asyncio.ensure_future(remaining.pop(0)()))
+      timeout = hedge_delay if remaining and hedge_delay > 0 else None
+      done, running = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+      if not done:
+        running.add(asyncio.ensure_future(remaining.pop(0)()))
+        continue
+      for task in done:
+        try:
+          jobs = task.result()
+        except SerpAPIError as exc:
+          last_error = exc
+          failures += 1
+          continue
+        for job in jobs:
+          if matches(job):
+            return job
+  finally:
+    for task in running:
+      task.cancel()
+
+  if last_error and failures == len(strategies):
+    raise last_error
+  return None
+
+
+def _detail_lookups(
+  job_id: str,
+  htidocid: Optional[str] = None,
+) -> tuple[List[Callable[[], Awaitable[List[JobListing]]]], Callable[[JobListing], bool]]:
+  """Search strategies for a job_id, most specific (htidocid) first, and the match predicate.
+
+  ``htidocid`` is used when the id itself does not carry one (e.g. a stored column).
+  """
   payload = _decode_job_payload(job_id)
-  htidocid = payload.get("htidocid") if payload else None
+  htidocid = htidocid or (payload.get("htidocid") if payload else None)
   title = payload.get("job_title") if payload else None
   company = payload.get("company_name") if payload else None
   location = payload.get("address_city") if payload else None
@@ -177,33 +318,46 @@ async def fetch_job_detail_from_serpapi(job_id: str) -> Optional[JobListing]:
 
   search_query_parts = [part for part in [title, company] if part]
   search_query = " ".join(search_query_parts) or title or company or "software engineer"
-  location = location or "United States"
-
-  async def _fetch_jobs_with_fallback(query: str, loc: str, use_uule_flag: bool = True) -> List[JobListing]:
-    try:
-      return await fetch_jobs_from_serpapi(query, loc, 1, encoded_uule, use_uule=use_uule_flag)
-    except SerpAPIError as exc:
-      if loc.strip().lower() != "united states":
-        return await fetch_jobs_from_serpapi(query, "United States", 1, uule=None, use_uule=False)
-      raise exc
+  # Without a uule from the job payload, only search a location the gazetteer can encode;
+  # anything else goes country-wide up front rather than failing and retrying.
+  location = canonical_location(location)
+  if not encoded_uule and resolve_place(location) is None:
+    location = DEFAULT_LOCATION
 
-  # First attempt: query directly by htidocid if available
+  strategies: List[Callable[[], Awaitable[List[JobListing]]]] = []
   if htidocid:
-    try:
-      targeted_jobs = await _fetch_jobs_with_fallback(f"htidocid:{htidocid}", "United States")
-      for job in targeted_jobs:
-        if job.job_id == job_id or job.htidocid == htidocid:
-          return job
-    except SerpAPIError:
-      pass
-
-  jobs = await _fetch_jobs_with_fallback(search_query, location)
-  if not jobs:
-    return None
+    strategies.append(lambda: fetch_jobs_from_serpapi(f"htidocid:{htidocid}", DEFAULT_LOCATION, 1, encoded_uule))
+  strategies.append(lambda: fetch_jobs_from_serpapi(search_query, location, 1, encoded_uule))
+
+  def _matches(job: JobListing) -> bool:
+    return job.job_id == job_id or bool(htidocid and job.htidocid == htidocid)
+
+  return strategies, _matches
+
+
+@traced("serpapi.fetch_job_detail")
+async def fetch_job_detail_from_serpapi(job_id: str) -> Optional[JobListing]:
+  _ensure_api_key()
+  cached = get_cached_job(job_id)
+  if cached:
+    return cached
+
+  strategies, matches = _detail_lookups(job_id)
+  return await _first_matching_job(strategies, matches)
+
 
-  for job in jobs:
-    if job.job_id == job_id or (htidocid and job.htidocid == htidocid):
-      return job
+@traced("serpapi.lookup_job_listing")
+async def lookup_job_listing(job_id: str, htidocid: Optional[str] = None) -> Optional[JobListing]:
+  """Re-fetch a listing with a single search, bypassing the worker caches.
 
-  # fallback: return first job if we can't match
-  return jobs[0]
+  Only the most specific strategy runs: the explicit ``htidocid:`` search when the id carries
+  an htidocid or one is passed in, so a refresh costs one SerpAPI search. A miss on that
+  search, including SerpAPI's "no results" error, means the posting is gone.
+  """
+  _ensure_api_key()
+  strategies, matches = _detail_lookups(job_id, htidocid)
+  try:
+    jobs = await strategies[0]()
+  except SerpAPINoResults:
+    return None
+  return next((job for job in jobs if matches(job)), None)
@@ -1,11 +1,19 @@
+from __future__ import annotations
+
 import asyncio
-import os
+import uuid
+from datetime import datetime, timezone
 from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
+
+import httpx
 
-import stripe
-from dotenv import load_dotenv
+from config import env_float, env_int, get_settings
+from services.metrics import instrument_upstream
+from services.resilience import CircuitOpenError, ResiliencePolicy, Upstream
 
-load_dotenv()
+if TYPE_CHECKING:
+  import stripe
 
 
 class StripeCheckoutError(Exception):
@@ -16,13 +24,33 @@ class StripeWebhookError(Exception):
   """Raised when Stripe webhook payload verification fails."""
 
 
-def _get_required_env(name: str) -> str:
-  value = os.getenv(name)
+def _require(value: str | None, name: str) -> str:
   if not value:
     raise StripeCheckoutError(f"{name} environment variable is required for Stripe checkout.")
   return value
 
 
+@lru_cache
+def _sdk():
+  """Import the Stripe SDK on first use; it is the slowest import in the app (~0.5s)."""
+  import stripe
+
+  return stripe
+
+
+STRIPE_POLICY = ResiliencePolicy.from_env("stripe", "STRIPE", timeout_seconds=20.0, max_attempts=3)
+STRIPE_CONNECT_TIMEOUT_SECONDS = env_float("STRIPE_CONNECT_TIMEOUT_SECONDS", 5.0)
+STRIPE_MAX_CONNECTIONS = env_int("STRIPE_MAX_CONNECTIONS", 20)
+
+
+def _is_transient(exc: BaseException) -> bool:
+  error = _sdk().error
+  return isinstance(exc, (error.APIConnectionError, error.RateLimitError, error.APIError))
+
+
+stripe_upstream = Upstream(STRIPE_POLICY, is_retryable=_is_transient)
+
+
 PLAN_ENV_KEYS = {
   "monthly": "STRIPE_MONTHLY_PRICE_ID",
   "lifetime": "STRIPE_LIFETIME_PRICE_ID",
@@ -34,73 +62,175 @@ PLAN_MODE = {
 }
 
 
+_client: Optional["stripe.StripeClient"] = None
+_http_client: Optional["stripe.HTTPClient"] = None
+
+
+def _async_http_client() -> httpx.AsyncClient:
+  """The pooled httpx client every Stripe request goes through."""
+  return httpx.AsyncClient(
+    verify=_sdk().ca_bundle_path,
+    timeout=httpx.Timeout(STRIPE_POLICY.timeout_seconds, connect=STRIPE_CONNECT_TIMEOUT_SECONDS),
+    limits=httpx.Limits(max_connections=STRIPE_MAX_CONNECTIONS, max_keepalive_connections=STRIPE_MAX_CONNECTIONS),
+  )
+
+
 @lru_cache
-def _get_api_key() -> str:
-  value = os.getenv("STRIPE_SECRET_KEY")
-  if not value:
-    raise StripeCheckoutError("STRIPE_SECRET_KEY environment variable is required for Stripe checkout.")
-  return value
+def _http_client_class() -> type:
+  """``stripe.HTTPClient`` subclass over our own ``httpx.AsyncClient``, defined once the SDK is loaded.
 
+  ``HTTPClient`` is the SDK's extension point for custom transports: subclasses implement the
+  ``*_async`` methods and the SDK handles retries, telemetry and response parsing. Owning the
+  httpx client lets us size its pool and close it on shutdown.
+  """
+  stripe = _sdk()
 
-def get_stripe_client() -> stripe:
-  stripe.api_key = _get_api_key()
-  return stripe
+  class PooledHTTPXClient(stripe.HTTPClient):
+    name = "httpx"
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+      super().__init__()
+      self.client = client
+
+    def _connection_error(self, exc: Exception) -> Exception:
+      message = f"Unexpected error communicating with Stripe ({type(exc).__name__})."
+      return stripe.error.APIConnectionError(message, should_retry=True)
+
+    async def request_async(self, method, url, headers, post_data=None):
+      try:
+        response = await self.client.request(method, url, headers=headers, content=post_data)
+      except httpx.HTTPError as exc:
+        raise self._connection_error(exc) from exc
+      return response.content, response.status_code, response.headers
+
+    async def request_stream_async(self, method, url, headers, post_data=None):
+      request = self.client.build_request(method, url, headers=headers, content=post_data)
+      try:
+        response = await self.client.send(request, stream=True)
+      except httpx.HTTPError as exc:
+        raise self._connection_error(exc) from exc
+      return response.aiter_bytes(), response.status_code, response.headers
+
+    def sleep_async(self, secs: float):
+      return asyncio.sleep(secs)
+
+    async def close_async(self) -> None:
+      await self.client.aclose()
+
+  return PooledHTTPXClient
+
+
+def get_stripe_client() -> "stripe.StripeClient":
+  """Shared async client; keys and base URL are per client, never set on the ``stripe`` module."""
+  global _client, _http_client
+  if _client is None:
+    stripe = _sdk()
+    settings = get_settings()
+    api_key = _require(settings.stripe_secret_key, "STRIPE_SECRET_KEY")
+    _http_client = _http_client_class()(_async_http_client())
+    _client = stripe.StripeClient(
+      api_key,
+      http_client=_http_client,
+      base_addresses={"api": settings.stripe_api_base} if settings.stripe_api_base else {},
+      # Retries are handled by the resilience layer.
+      max_network_retries=0,
+    )
+  return _client
+
+
+async def close_stripe_client() -> None:
+  global _client, _http_client
+  if _http_client is not None:
+    await _http_client.close_async()
+  _client = None
+  _http_client = None
 
 
 def normalize_plan(plan: str | None = "monthly") -> str:
   return (plan or "monthly").lower()
 
 
+def metadata_value(payload: Any, field: str) -> str | None:
+  """Read ``metadata[field]`` from a Stripe object or its plain-dict form."""
+  metadata = None
+  if isinstance(payload, dict):
+    metadata = payload.get("metadata")
+  else:
+    metadata = getattr(payload, "metadata", None)
+  if not metadata:
+    return None
+  try:
+    return metadata.get(field)  # type: ignore[attr-defined]
+  except AttributeError:
+    return getattr(metadata, field, None)
+
+
+def timestamp_to_datetime(timestamp: Any) -> datetime | None:
+  if not timestamp:
+    return None
+  try:
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+  except (TypeError, ValueError, OSError):
+    return None
+
+
 def _resolve_price_id(plan: str | None) -> str:
   normalized = (plan or "monthly").lower()
-  env_name = PLAN_ENV_KEYS.get(normalized)
-  if env_name:
-    price = os.getenv(env_name)
-    if price:
-      return price
-  fallback = os.getenv("STRIPE_PRICE_ID")
-  if fallback:
-    return fallback
+  settings = get_settings()
+  price = settings.stripe_plan_price_ids.get(normalized)
+  if price:
+    return price
+  if settings.stripe_price_id:
+    return settings.stripe_price_id
   available_plans = ", ".join(PLAN_ENV_KEYS.keys())
   raise StripeCheckoutError(
     f"No Stripe price configured for plan '{normalized}'. Set STRIPE_PRICE_ID or STRIPE_<PLAN>_PRICE_ID ({available_plans})."
   )
 
 
+@instrument_upstream("stripe", "create_checkout_session")
 async def create_checkout_session(user_id: str, plan: str | None = "monthly") -> stripe.checkout.Session:
   """Create a Stripe Checkout session for the current user."""
   normalized_plan = normalize_plan(plan)
   price_id = _resolve_price_id(plan)
-  success_url = _get_required_env("STRIPE_SUCCESS_URL")
-  cancel_url = _get_required_env("STRIPE_CANCEL_URL")
+  settings = get_settings()
+  success_url = _require(settings.stripe_success_url, "STRIPE_SUCCESS_URL")
+  cancel_url = _require(settings.stripe_cancel_url, "STRIPE_CANCEL_URL")
   checkout_mode = PLAN_MODE.get(normalized_plan, "subscription")
   metadata = {"user_id": user_id, "plan": normalized_plan}
 
-  def _create_session() -> stripe.checkout.Session:
-    client = get_stripe_client()
-    session_params: dict = {
-      "mode": checkout_mode,
-      "line_items": [{"price": price_id, "quantity": 1}],
-      "success_url": success_url,
-      "cancel_url": cancel_url,
-      "client_reference_id": user_id,
-      "metadata": metadata,
-    }
-    if checkout_mode == "subscription":
-      session_params["subscription_data"] = {"metadata": metadata}
-    else:
-      session_params["payment_intent_data"] = {"metadata": metadata}
-    return client.checkout.Session.create(**session_params)
+  session_params: dict = {
+    "mode": checkout_mode,
+    "line_items": [{"price": price_id, "quantity": 1}],
+    "success_url": success_url,
+    "cancel_url": cancel_url,
+    "client_reference_id": user_id,
+    "metadata": metadata,
+  }
+  if checkout_mode == "subscription":
+    session_params["subscription_data"] = {"metadata": metadata}
+  else:
+    session_params["payment_intent_data"] = {"metadata": metadata}
+  # The same idempotency key is sent on every retry so Stripe never creates a duplicate session.
+  options = {"idempotency_key": f"checkout-{user_id}-{uuid.uuid4()}"}
 
+  client = get_stripe_client()
+  stripe = _sdk()
   try:
-    return await asyncio.to_thread(_create_session)
+    return await stripe_upstream.call(
+      lambda: client.checkout.sessions.create_async(params=session_params, options=options),
+      hedge=False,
+    )
+  except (CircuitOpenError, asyncio.TimeoutError) as exc:
+    raise StripeCheckoutError("Stripe is temporarily unavailable. Please try again shortly.") from exc
   except stripe.error.StripeError as exc:  # type: ignore[attr-defined]
     user_message = getattr(exc, "user_message", None) or "Unable to create Stripe checkout session."
     raise StripeCheckoutError(user_message) from exc
 
 
 def construct_webhook_event(payload: bytes, signature_header: str) -> stripe.Event:
-  secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+  stripe = _sdk()
+  secret = get_settings().stripe_webhook_secret
   if not secret:
     raise StripeWebhookError("STRIPE_WEBHOOK_SECRET environment variable is required for Stripe webhooks.")
   try:
@@ -111,27 +241,29 @@ def construct_webhook_event(payload: bytes, signature_header: str) -> stripe.Eve
     raise StripeWebhookError("Invalid Stripe webhook signature.") from exc
 
 
+@instrument_upstream("stripe", "fetch_checkout_session")
 async def fetch_checkout_session(session_id: str) -> stripe.checkout.Session:
   """Retrieve a Checkout session directly from Stripe."""
-  def _fetch() -> stripe.checkout.Session:
-    client = get_stripe_client()
-    return client.checkout.Session.retrieve(session_id)
-
+  client = get_stripe_client()
+  stripe = _sdk()
   try:
-    return await asyncio.to_thread(_fetch)
+    return await stripe_upstream.call(lambda: client.checkout.sessions.retrieve_async(session_id))
+  except (CircuitOpenError, asyncio.TimeoutError) as exc:
+    raise StripeCheckoutError("Stripe is temporarily unavailable. Please try again shortly.") from exc
   except stripe.error.StripeError as exc:  # type: ignore[attr-defined]
     user_message = getattr(exc, "user_message", None) or "Unable to load Stripe checkout session."
     raise StripeCheckoutError(user_message) from exc
 
 
+@instrument_upstream("stripe", "fetch_subscription")
 async def fetch_subscription(subscription_id: str) -> stripe.Subscription:
   """Retrieve a subscription for additional metadata (e.g., expiration)."""
-  def _fetch() -> stripe.Subscription:
-    client = get_stripe_client()
-    return client.Subscription.retrieve(subscription_id)
-
+  client = get_stripe_client()
+  stripe = _sdk()
   try:
-    return await asyncio.to_thread(_fetch)
+    return await stripe_upstream.call(lambda: client.subscriptions.retrieve_async(subscription_id))
+  except (CircuitOpenError, asyncio.TimeoutError) as exc:
+    raise StripeCheckoutError("Stripe is temporarily unavailable. Please try again shortly.") from exc
   except stripe.error.StripeError as exc:  # type: ignore[attr-defined]
     user_message = getattr(exc, "user_message", None) or "Unable to load Stripe subscription."
     raise StripeCheckoutError(user_message) from exc
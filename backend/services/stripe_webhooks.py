@@ -0,0 +1,213 @@
+"""Queued Stripe webhook processing.
+
+The webhook route only verifies the signature and inserts the event into
+``stripe_webhook_events`` (``ON CONFLICT DO NOTHING`` on the event id), so Stripe retries
+and duplicate deliveries are acknowledged without re-processing. A background worker per
+app process claims pending events oldest-first with ``FOR UPDATE SKIP LOCKED`` and applies
+a batch in one transaction. Only the oldest pending event per ordering key (subscription or
+checkout session) is claimed, so events for one key are applied one at a time, in order. An
+event whose handler fails is retried after an exponential backoff
+(``STRIPE_WEBHOOK_RETRY_BASE_SECONDS``, doubling per attempt) until
+``STRIPE_WEBHOOK_MAX_ATTEMPTS``; later events for its key wait for it. Each subscription
+upsert is guarded by the row's ``last_event_at``, so events that arrive late, or are
+applied by another worker out of order, cannot overwrite newer state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import env_float, env_int
+from db.models.stripe_webhook_event import StripeWebhookEvent
+from db.repositories.stripe_webhook_event_repository import claim_pending_webhook_events, insert_webhook_event
+from db.repositories.user_subscription_repository import KEEP, apply_subscription_event, get_subscription_by_stripe_id
+from services.metrics import REGISTRY, UPSTREAM_BUCKETS, Counter, Histogram
+from services.stripe_client import metadata_value, normalize_plan, timestamp_to_datetime
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = env_int("STRIPE_WEBHOOK_BATCH_SIZE", 100)
+POLL_SECONDS = env_float("STRIPE_WEBHOOK_POLL_SECONDS", 2.0)
+MAX_ATTEMPTS = env_int("STRIPE_WEBHOOK_MAX_ATTEMPTS", 5)
+RETRY_BASE_SECONDS = env_float("STRIPE_WEBHOOK_RETRY_BASE_SECONDS", 5.0)
+
+WEBHOOK_EVENTS = REGISTRY.register(
+  Counter(
+    "stripe_webhook_events_total",
+    "Stripe webhook events by outcome (received, duplicate, processed, stale, ignored, retry, failed).",
+    ("outcome",),
+  )
+)
+WEBHOOK_APPLY_LAG = REGISTRY.register(
+  Histogram("stripe_webhook_apply_lag_seconds", "Time from webhook receipt to the event being applied.", (), UPSTREAM_BUCKETS)
+)
+
+CHECKOUT_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+SUBSCRIPTION_EVENTS = {"customer.subscription.updated", "customer.subscription.deleted"}
+HANDLED_EVENT_TYPES = CHECKOUT_EVENTS | SUBSCRIPTION_EVENTS
+
+
+def ordering_key(event_type: str, payload: dict[str, Any]) -> Optional[str]:
+  if event_type in SUBSCRIPTION_EVENTS:
+    return payload.get("id")
+  return payload.get("subscription") or payload.get("id")
+
+
+async def ingest_event(session: AsyncSession, event: dict[str, Any]) -> Optional[bool]:
+  """Queue a verified event; False for a duplicate delivery, None for types we do not handle."""
+  event_type = event.get("type") or ""
+  if event_type not in HANDLED_EVENT_TYPES or not event.get("id"):
+    WEBHOOK_EVENTS.inc(("ignored",))
+    return None
+  payload = event.get("data", {}).get("object", {})
+  inserted = await insert_webhook_event(
+    session,
+    event_id=event["id"],
+    event_type=event_type,
+    ordering_key=ordering_key(event_type, payload),
+    stripe_created_at=timestamp_to_datetime(event.get("created")) or datetime.now(timezone.utc),
+    payload=payload,
+  )
+  WEBHOOK_EVENTS.inc(("received" if inserted else "duplicate",))
+  if inserted:
+    webhook_processor.wake()
+  return inserted
+
+
+async def _apply_checkout_session_completed(session: AsyncSession, event: StripeWebhookEvent) -> str:
+  payload = event.payload
+  user_id = payload.get("client_reference_id") or metadata_value(payload, "user_id")
+  if not user_id:
+    logger.warning("Stripe checkout session %s missing user_id metadata", payload.get("id"))
+    return "ignored"
+
+  # A lifetime purchase never expires, and a new subscription's period end arrives with its
+  # customer.subscription.updated event, so the old expiry is cleared. It is kept only when it
+  # already belongs to this subscription (its update event was applied first).
+  subscription_id = payload.get("subscription")
+  known_subscription = subscription_id and await get_subscription_by_stripe_id(session, subscription_id)
+  applied = await apply_subscription_event(
+    session,
+    user_id=user_id,
+    event_id=event.event_id,
+    event_at=event.stripe_created_at,
+    plan=normalize_plan(metadata_value(payload, "plan")),
+    status="active" if payload.get("payment_status") == "paid" else payload.get("status", "open"),
+    stripe_customer_id=payload.get("customer"),
+    stripe_subscription_id=subscription_id,
+    stripe_checkout_session_id=payload.get("id"),
+    stripe_payment_intent_id=payload.get("payment_intent"),
+    entitlement_expires_at=KEEP if known_subscription else None,
+  )
+  return "processed" if applied else "stale"
+
+
+async def _apply_subscription_updated(session: AsyncSession, event: StripeWebhookEvent) -> str:
+  payload = event.payload
+  user_id = metadata_value(payload, "user_id")
+  if not user_id:
+    record = await get_subscription_by_stripe_id(session, payload.get("id"))
+    user_id = record.user_id if record else None
+  if not user_id:
+    logger.warning("Stripe subscription %s missing user mapping", payload.get("id"))
+    return "ignored"
+
+  plan_value = metadata_value(payload, "plan")
+  status = payload.get("status") or ("canceled" if event.event_type == "customer.subscription.deleted" else None)
+  applied = await apply_subscription_event(
+    session,
+    user_id=user_id,
+    event_id=event.event_id,
+    event_at=event.stripe_created_at,
+    plan=normalize_plan(plan_value) if plan_value else None,
+    status=status,
+    stripe_customer_id=payload.get("customer"),
+    stripe_subscription_id=payload.get("id"),
+    entitlement_expires_at=timestamp_to_datetime(payload.get("current_period_end")),
+  )
+  return "processed" if applied else "stale"
+
+
+HANDLERS: dict[str, Callable[[AsyncSession, StripeWebhookEvent], Awaitable[str]]] = {
+  **{event_type: _apply_checkout_session_completed for event_type in CHECKOUT_EVENTS},
+  **{event_type: _apply_subscription_updated for event_type in SUBSCRIPTION_EVENTS},
+}
+
+
+class StripeWebhookProcessor:
+  """Applies queued events in ``stripe_created_at`` order, one transaction per batch."""
+
+  def __init__(
+    self,
+    batch_size: int = BATCH_SIZE,
+    poll_seconds: float = POLL_SECONDS,
+    max_attempts: int = MAX_ATTEMPTS,
+    retry_base_seconds: float = RETRY_BASE_SECONDS,
+  ) -> None:
+    self.batch_size = max(1, batch_size)
+    self.poll_seconds = poll_seconds
+    self.max_attempts = max(1, max_attempts)
+    self.retry_base_seconds = retry_base_seconds
+    self._wake = asyncio.Event()
+
+  def _retry_delay(self, attempts: int) -> float:
+    return self.retry_base_seconds * 2 ** (attempts - 1)
+
+  def wake(self) -> None:
+    """Start the next batch now instead of at the next poll."""
+    self._wake.set()
+
+  async def process_batch(self, session: AsyncSession) -> int:
+    events = await claim_pending_webhook_events(session, self.batch_size)
+    now = datetime.now(timezone.utc)
+    for event in events:
+      attempts = event.attempts + 1
+      handler = HANDLERS.get(event.event_type)
+      try:
+        # A savepoint per event keeps one bad payload from rolling back the whole batch.
+        async with session.begin_nested():
+          outcome = await handler(session, event) if handler else "ignored"
+      except Exception as exc:
+        logger.exception("Unable to apply Stripe event %s (%s)", event.event_id, event.event_type)
+        outcome = "failed" if attempts >= self.max_attempts else "pending"
+        event.last_error = repr(exc)[:1000]
+        event.next_attempt_at = now + timedelta(seconds=self._retry_delay(attempts))
+      event.attempts = attempts
+      event.status = outcome
+      if outcome != "pending":
+        event.processed_at = now
+        WEBHOOK_APPLY_LAG.observe(max(0.0, (now - event.received_at).total_seconds()))
+      WEBHOOK_EVENTS.inc(("retry" if outcome == "pending" else outcome,))
+    await session.commit()
+    return len(events)
+
+  async def run(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    while True:
+      started = time.perf_counter()
+      try:
+        async with session_factory() as session:
+          claimed = await self.process_batch(session)
+      except Exception:
+        logger.exception("Stripe webhook batch failed")
+        claimed = 0
+      if claimed:
+        continue  # Keep draining: later events for the keys just applied are claimable now.
+      self._wake.clear()
+      try:
+        await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, self.poll_seconds - (time.perf_counter() - started)))
+      except asyncio.TimeoutError:
+        pass
+
+
+webhook_processor = StripeWebhookProcessor()
+
+
+async def run_webhook_worker(session_factory: async_sessionmaker[AsyncSession]) -> None:
+  """Background task that drains the webhook queue for this process."""
+  await webhook_processor.run(session_factory)
@@ -0,0 +1,286 @@
+"""Lightweight request tracing with OpenTelemetry-shaped spans.
+
+Spans carry W3C trace/span ids, parent links, nanosecond timestamps, attributes and an
+OK/ERROR status, so exported JSON lines map one-to-one onto OTLP span fields. Exporters:
+
+* ``TRACE_EXPORTER=console`` logs an indented per-request breakdown when the root span ends.
+* ``TRACE_EXPORTER=file`` appends one JSON object per span to ``TRACE_FILE``. Spans are
+  buffered in memory and written every ``TRACE_FLUSH_SECONDS`` by ``run_trace_flusher`` in a
+  worker thread, so a slow disk never blocks the event loop.
+* unset/``none`` records nothing; ``span``/``traced`` reduce to a flag check.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, Optional, TypeVar
+
+from config import env_float, env_int, get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+FLUSH_SECONDS = env_float("TRACE_FLUSH_SECONDS", 1.0)
+# Spans beyond this are dropped (and counted) rather than growing memory while the disk stalls.
+MAX_BUFFERED_SPANS = env_int("TRACE_MAX_BUFFERED_SPANS", 50_000)
+
+
+class Span:
+  __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status", "trace")
+
+  def __init__(self, name: str, trace_id: str, parent_id: Optional[str], trace: list["Span"]) -> None:
+    self.trace_id = trace_id
+    self.span_id = secrets.token_hex(8)
+    self.parent_id = parent_id
+    self.name = name
+    self.start_ns = time.time_ns()
+    self.end_ns: Optional[int] = None
+    self.attributes: dict[str, Any] = {}
+    self.status = "OK"
+    self.trace = trace
+    trace.append(self)
+
+  def set_attribute(self, key: str, value: Any) -> None:
+    self.attributes[key] = value
+
+  def update_name(self, name: str) -> None:
+    self.name = name
+
+  def record_exception(self, exc: BaseException) -> None:
+    self.status = "ERROR"
+    self.attributes["exception.type"] = type(exc).__name__
+    self.attributes["exception.message"] = str(exc)[:500]
+
+  @property
+  def duration_ms(self) -> float:
+    return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+  def to_dict(self) -> dict[str, Any]:
+    return {
+      "traceId": self.trace_id,
+      "spanId": self.span_id,
+      "parentSpanId": self.parent_id,
+      "name": self.name,
+      "startTimeUnixNano": self.start_ns,
+      "endTimeUnixNano": self.end_ns,
+      "durationMs": round(self.duration_ms, 3),
+      "attributes": self.attributes,
+      "status": self.status,
+    }
+
+
+class _NoopSpan:
+  """Returned when tracing is off so call sites can set attributes unconditionally."""
+
+  def set_attribute(self, key: str, value: Any) -> None:
+    return None
+
+  def update_name(self, name: str) -> None:
+    return None
+
+  def record_exception(self, exc: BaseException) -> None:
+    return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class ConsoleExporter:
+  def export(self, spans: list[Span]) -> None:
+    children: dict[Optional[str], list[Span]] = {}
+    for item in spans:
+      children.setdefault(item.parent_id, []).append(item)
+    ids = {item.span_id for item in spans}
+    roots = [item for item in spans if item.parent_id not in ids]
+    lines = [f"trace {spans[0].trace_id}"]
+
+    def walk(node: Span, depth: int) -> None:
+      flag = " !" if node.status == "ERROR" else ""
+      lines.append(f"{'  ' * depth}{node.name} {node.duration_ms:.1f}ms{flag}")
+      for child in sorted(children.get(node.span_id, []), key=lambda item: item.start_ns):
+        walk(child, depth + 1)
+
+    for root in roots:
+      walk(root, 1)
+    logger.info("\n".join(lines))
+
+
+class FileExporter:
+  """Buffers span lines in memory; ``write`` appends them to ``path`` and may block."""
+
+  def __init__(self, path: str, max_buffered: int = MAX_BUFFERED_SPANS) -> None:
+    self.path = path
+    self.max_buffered = max_buffered
+    self.dropped = 0
+    self._buffer: list[str] = []
+    self._lock = threading.Lock()
+    atexit.register(self.flush)
+
+  def export(self, spans: list[Span]) -> None:
+    if len(self._buffer) + len(spans) > self.max_buffered:
+      self.dropped += len(spans)
+      return
+    self._buffer.extend(json.dumps(item.to_dict(), default=str) + "\n" for item in spans)
+
+  def drain(self) -> list[str]:
+    lines, self._buffer = self._buffer, []
+    return lines
+
+  def write(self, lines: list[str]) -> None:
+    if not lines:
+      return
+    with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+      handle.write("".join(lines))
+
+  def flush(self) -> None:
+    self.write(self.drain())
+
+
+_exporter: Optional[ConsoleExporter | FileExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+
+def configure_tracing(exporter: Optional[str] = None, path: Optional[str] = None) -> None:
+  """Select the span exporter (``console``, ``file`` or ``none``); defaults come from the environment."""
+  global _exporter
+  kind = (exporter if exporter is not None else get_settings().trace_exporter).strip().lower()
+  if kind == "console":
+    _exporter = ConsoleExporter()
+  elif kind == "file":
+    _exporter = FileExporter(path or get_settings().trace_file)
+  else:
+    _exporter = None
+
+
+async def run_trace_flusher() -> None:
+  """Append buffered file-exporter spans every ``TRACE_FLUSH_SECONDS`` from a worker thread."""
+  while True:
+    await asyncio.sleep(FLUSH_SECONDS)
+    exporter = _exporter
+    if isinstance(exporter, FileExporter):
+      try:
+        # Drained on the loop so no export can land in a list that is already being written.
+        await asyncio.to_thread(exporter.write, exporter.drain())
+      except OSError:
+        logger.exception("Unable to write traces to %s", exporter.path)
+
+
+def tracing_enabled() -> bool:
+  return _exporter is not None
+
+
+def current_trace_id() -> Optional[str]:
+  return _trace_id.get()
+
+
+def parse_traceparent(header: Optional[str]) -> tuple[Optional[str], Optional[str], bool]:
+  """Return (trace_id, parent_span_id, sampled) from a W3C ``traceparent`` header."""
+  match = TRACEPARENT_RE.match((header or "").strip().lower())
+  if not match or match.group(1) == "0" * 32:
+    return None, None, True
+  return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+@contextmanager
+def start_trace(
+  name: str,
+  *,
+  traceparent: Optional[str] = None,
+  attributes: Optional[dict[str, Any]] = None,
+) -> Iterator[tuple[str, Span | _NoopSpan]]:
+  """Open the root span for one request; yields the trace id (always) and the span."""
+  trace_id, parent_id, sampled = parse_traceparent(traceparent)
+  trace_id = trace_id or secrets.token_hex(16)
+  id_token = _trace_id.set(trace_id)
+  if _exporter is None or not sampled:
+    try:
+      yield trace_id, NOOP_SPAN
+    finally:
+      _trace_id.reset(id_token)
+    return
+
+  root = Span(name, trace_id, parent_id, [])
+  root.attributes.update(attributes or {})
+  span_token = _current_span.set(root)
+  try:
+    yield trace_id, root
+  except BaseException as exc:
+    root.record_exception(exc)
+    raise
+  finally:
+    root.end_ns = time.time_ns()
+    _current_span.reset(span_token)
+    _trace_id.reset(id_token)
+    exporter = _exporter
+    if exporter is not None:
+      try:
+        exporter.export(root.trace)
+      except Exception:
+        logger.exception("Unable to export trace %s", trace_id)
+
+
+class span:
+  """Child span of the current span; a no-op outside a sampled trace.
+
+  A plain class rather than ``@contextmanager`` so the disabled path costs one ContextVar read.
+  """
+
+  __slots__ = ("name", "attributes", "_span", "_token")
+
+  def __init__(self, name: str, **attributes: Any) -> None:
+    self.name = name
+    self.attributes = attributes
+    self._span: Optional[Span] = None
+    self._token = None
+
+  def __enter__(self) -> Span | _NoopSpan:
+    parent = _current_span.get()
+    if parent is None:
+      return NOOP_SPAN
+    child = self._span = Span(self.name, parent.trace_id, parent.span_id, parent.trace)
+    if self.attributes:
+      child.attributes.update(self.attributes)
+    self._token = _current_span.set(child)
+    return child
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    child = self._span
+    if child is None:
+      return None
+    if exc is not None:
+      child.record_exception(exc)
+    child.end_ns = time.time_ns()
+    _current_span.reset(self._token)
+    return None
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+  """Decorator wrapping an async function in a span named ``name``."""
+
+  def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+      if _current_span.get() is None:
+        return await fn(*args, **kwargs)
+      with span(name):
+        return await fn(*args, **kwargs)
+
+    return wrapper
+
+  return decorator
+
+
+configure_tracing()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from services.metrics import HTTP_RESPONSE_BYTES_SAVED, UNMATCHED_ROUTE
+
+
+@dataclass
+class EndpointTransfer:
+  responses: int = 0
+  compressed_responses: int = 0
+  not_modified_responses: int = 0
+  uncompressed_bytes: int = 0
+  sent_bytes: int = 0
+  not_modified_bytes_saved: int = 0
+
+  @property
+  def bytes_saved(self) -> int:
+    return self.uncompressed_bytes - self.sent_bytes + self.not_modified_bytes_saved
+
+
+class TransferStats:
+  """Per-endpoint accounting of bytes saved by compression and 304 responses."""
+
+  def __init__(self, max_etags: int = 20_000) -> None:
+    self.endpoints: defaultdict[str, EndpointTransfer] = defaultdict(EndpointTransfer)
+    self._etag_sizes: OrderedDict[str, int] = OrderedDict()
+    self._max_etags = max_etags
+
+  def record_response(self, endpoint: str, uncompressed: int, sent: int) -> None:
+    stats = self.endpoints[endpoint]
+    stats.responses += 1
+    stats.uncompressed_bytes += uncompressed
+    stats.sent_bytes += sent
+    if sent < uncompressed:
+      stats.compressed_responses += 1
+      HTTP_RESPONSE_BYTES_SAVED.inc((endpoint,), uncompressed - sent)
+
+  def remember_etag(self, etag: str, size: int) -> None:
+    self._etag_sizes[etag] = size
+    self._etag_sizes.move_to_end(etag)
+    if len(self._etag_sizes) > self._max_etags:
+      self._etag_sizes.popitem(last=False)
+
+  def record_not_modified(self, endpoint: str, etag: str) -> None:
+    stats = self.endpoints[endpoint]
+    saved = self._etag_sizes.get(etag, 0)
+    stats.not_modified_responses += 1
+    stats.not_modified_bytes_saved += saved
+    HTTP_RESPONSE_BYTES_SAVED.inc((endpoint,), saved)
+
+  def snapshot(self) -> dict[str, Any]:
+    return {
+      endpoint: {**asdict(stats), "bytes_saved": stats.bytes_saved}
+      for endpoint, stats in sorted(self.endpoints.items())
+    }
+
+
+transfer_stats = TransferStats()
+
+
+def endpoint_name(scope: dict) -> str:
+  """Route template (e.g. `/jobs/detail/{job_id}`) so stats do not explode per path value.
+
+  Requests that matched no route (404s for arbitrary paths) share the ``unmatched`` label.
+  """
+  route = scope.get("route")
+  path = getattr(route, "path", None) or UNMATCHED_ROUTE
+  return f"{scope.get('method', 'GET')} {path}"
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from middleware import compression
+from middleware.compression import CompressionMiddleware
+from services.http_cache import etag_matches
+
+ETAG = '"listing-v1"'
+BODY = json.dumps({"jobs": [{"title": "Software Engineer", "company": "Acme"}] * 100}).encode()
+
+
+def _listing(request: Request) -> Response:
+  if etag_matches(request, ETAG):
+    return Response(status_code=304, headers={"ETag": ETAG})
+  return Response(BODY, media_type="application/json", headers={"ETag": ETAG})
+
+
+@pytest.fixture
+def client():
+  app = Starlette(routes=[Route("/listing", _listing)])
+  app.add_middleware(CompressionMiddleware)
+  return TestClient(app)
+
+
+def test_identity_body_keeps_the_strong_etag(client):
+  response = client.get("/listing", headers={"Accept-Encoding": "identity"})
+  assert "content-encoding" not in response.headers
+  assert response.headers["etag"] == ETAG
+
+
+@pytest.mark.parametrize("coding", ["gzip", "br"])
+def test_compressed_body_gets_a_weak_etag(client, coding):
+  if coding == "br" and compression.brotli is None:
+    pytest.skip("brotli is not installed")
+  response = client.get("/listing", headers={"Accept-Encoding": coding})
+  assert response.headers["content-encoding"] == coding
+  assert response.headers["etag"] == f"W/{ETAG}"
+  assert response.content == BODY
+
+
+def test_weak_etag_still_revalidates(client):
+  first = client.get("/listing", headers={"Accept-Encoding": "gzip"})
+  revalidated = client.get("/listing", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+  assert revalidated.status_code == 304
+  assert revalidated.headers["etag"] == first.headers["etag"]
@@ -0,0 +1,23 @@
+import pytest
+
+from db.database import UNPOOLED_CONNECTIONS, pool_limits
+
+
+def test_zero_budget_keeps_configured_values():
+  assert pool_limits(5, 10, 0, 8, reserved=UNPOOLED_CONNECTIONS) == (5, 10)
+
+
+@pytest.mark.parametrize("budget,processes", [(40, 4), (100, 4), (100, 9), (20, 3)])
+def test_pools_and_reserved_connections_fit_the_budget(budget, processes):
+  size, overflow = pool_limits(5, 10, budget, processes, reserved=UNPOOLED_CONNECTIONS)
+  assert size >= 1
+  assert processes * (size + overflow + UNPOOLED_CONNECTIONS) <= budget
+
+
+def test_reserved_connections_come_out_of_the_pool_share():
+  assert pool_limits(5, 10, 40, 4) == (5, 5)
+  assert pool_limits(5, 10, 40, 4, reserved=3) == (5, 2)
+
+
+def test_every_process_keeps_one_pooled_connection():
+  assert pool_limits(5, 10, 4, 4, reserved=3) == (1, 0)
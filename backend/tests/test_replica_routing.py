@@ -0,0 +1,58 @@
+import asyncio
+
+from db.repositories.job_listing_repository import get_cached_listing
+from db.repositories.saved_job_repository import get_saved_job, list_saved_jobs_for_user
+from db.repositories.user_subscription_repository import get_subscription_for_user
+from db.routing import replica_eligible, replica_read
+
+
+class Result:
+  def first(self):
+    return None
+
+  def all(self):
+    return []
+
+  def scalar_one_or_none(self):
+    return None
+
+
+class RoutingProbe:
+  """Session stand-in recording whether each statement would be bound to the replica."""
+
+  def __init__(self) -> None:
+    self.replica = []
+
+  async def connection(self):
+    self.replica.append(replica_eligible())
+    return self
+
+  async def execute(self, *args):
+    if len(args) == 1:
+      self.replica.append(replica_eligible())
+    return Result()
+
+
+def _routes(call) -> list[bool]:
+  probe = RoutingProbe()
+  asyncio.run(call(probe))
+  return probe.replica
+
+
+def test_replica_read_marks_only_the_wrapped_call():
+  @replica_read
+  async def read():
+    return replica_eligible()
+
+  assert asyncio.run(read()) is True
+  assert replica_eligible() is False
+
+
+def test_cache_lookups_may_use_the_replica():
+  assert _routes(lambda session: get_cached_listing(session, job_id="job-1", htidocid=None)) == [True]
+
+
+def test_reads_of_a_users_own_writes_stay_on_the_primary():
+  assert _routes(lambda session: list_saved_jobs_for_user(session, "user-1", summary=True)) == [False]
+  assert _routes(lambda session: get_saved_job(session, "user-1", "job-1")) == [False]
+  assert _routes(lambda session: get_subscription_for_user(session, "user-1")) == [False]
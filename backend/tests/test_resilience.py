@@ -0,0 +1,218 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services import serpapi_client
+from services.resilience import CircuitOpenError, ResiliencePolicy, Upstream
+
+
+class Transient(Exception):
+  pass
+
+
+def _upstream(**overrides) -> Upstream:
+  settings = {
+    "timeout_seconds": 0.2,
+    "max_attempts": 3,
+    "backoff_base_seconds": 0.0,
+    "backoff_max_seconds": 0.0,
+    "breaker_failure_threshold": 2,
+    "breaker_reset_seconds": 0.05,
+    **overrides,
+  }
+  return Upstream(ResiliencePolicy(name="test", **settings), is_retryable=lambda exc: isinstance(exc, Transient))
+
+
+def _scripted(*outcomes):
+  """A call that returns or raises the next outcome each time; sleeps for float outcomes."""
+  calls = []
+
+  async def fn():
+    outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+    calls.append(outcome)
+    if isinstance(outcome, float):
+      await asyncio.sleep(outcome)
+      return "slow"
+    if isinstance(outcome, BaseException):
+      raise outcome
+    return outcome
+
+  return fn, calls
+
+
+def _warm_latency(upstream: Upstream, seconds: float) -> None:
+  for _ in range(upstream.policy.hedge_min_samples):
+    upstream.latency.record(seconds)
+
+
+def test_transient_errors_are_retried_until_success():
+  upstream = _upstream(breaker_failure_threshold=5)
+  fn, calls = _scripted(Transient(), Transient(), "ok")
+  assert asyncio.run(upstream.call(fn)) == "ok"
+  assert len(calls) == 3
+  assert upstream.retries == 2
+  assert upstream.breaker.state == "closed"
+
+
+def test_timeouts_are_retried_then_raised():
+  upstream = _upstream(timeout_seconds=0.01, max_attempts=2, breaker_failure_threshold=5)
+  fn, calls = _scripted(1.0)
+  with pytest.raises(asyncio.TimeoutError):
+    asyncio.run(upstream.call(fn))
+  assert len(calls) == 2
+
+
+def test_non_idempotent_calls_are_not_retried():
+  upstream = _upstream()
+  fn, calls = _scripted(Transient(), "ok")
+  with pytest.raises(Transient):
+    asyncio.run(upstream.call(fn, idempotent=False))
+  assert len(calls) == 1
+
+
+def test_permanent_errors_are_not_retried_and_do_not_trip_the_breaker():
+  upstream = _upstream(breaker_failure_threshold=1)
+  fn, calls = _scripted(ValueError("bad request"))
+  with pytest.raises(ValueError):
+    asyncio.run(upstream.call(fn))
+  assert len(calls) == 1
+  assert upstream.breaker.state == "closed"
+
+
+def test_breaker_opens_then_half_open_probe_closes_it():
+  upstream = _upstream(max_attempts=1, breaker_failure_threshold=2)
+  failing, _ = _scripted(Transient())
+  for _ in range(2):
+    with pytest.raises(Transient):
+      asyncio.run(upstream.call(failing))
+  assert upstream.breaker.state == "open"
+
+  healthy, calls = _scripted("ok")
+  with pytest.raises(CircuitOpenError) as raised:
+    asyncio.run(upstream.call(healthy))
+  assert raised.value.retry_after > 0
+  assert calls == []
+
+  time.sleep(0.06)
+  assert upstream.breaker.state == "half_open"
+  assert asyncio.run(upstream.call(healthy)) == "ok"
+  assert upstream.breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe():
+  upstream = _upstream(max_attempts=1, breaker_failure_threshold=1)
+  failing, _ = _scripted(Transient())
+  with pytest.raises(Transient):
+    asyncio.run(upstream.call(failing))
+  time.sleep(0.06)
+
+  async def probe_and_second_caller():
+    slow, calls = _scripted(0.05)
+    probe = asyncio.ensure_future(upstream.call(slow))
+    await asyncio.sleep(0)
+    with pytest.raises(CircuitOpenError):
+      await upstream.call(slow)
+    return await probe, calls
+
+  result, calls = asyncio.run(probe_and_second_caller())
+  assert result == "slow"
+  assert len(calls) == 1
+  assert upstream.breaker.state == "closed"
+
+
+def test_failed_half_open_probe_reopens_the_breaker():
+  upstream = _upstream(max_attempts=1, breaker_failure_threshold=3)
+  failing, _ = _scripted(Transient())
+  for _ in range(3):
+    with pytest.raises(Transient):
+      asyncio.run(upstream.call(failing))
+  time.sleep(0.06)
+  assert upstream.breaker.state == "half_open"
+
+  with pytest.raises(Transient):
+    asyncio.run(upstream.call(failing))
+  assert upstream.breaker.state == "open"
+
+
+def test_hedge_winner_cancels_the_slow_attempt():
+  upstream = _upstream(hedge_percentile=0.5, hedge_min_samples=5, timeout_seconds=1.0)
+  _warm_latency(upstream, 0.01)
+  cancelled = []
+  calls = []
+
+  async def fn():
+    calls.append(len(calls))
+    if len(calls) == 1:
+      try:
+        await asyncio.sleep(0.5)
+      except asyncio.CancelledError:
+        cancelled.append(True)
+        raise
+      return "primary"
+    return "hedge"
+
+  async def run():
+    result = await upstream.call(fn)
+    await asyncio.sleep(0.01)
+    assert cancelled == [True]
+    return result
+
+  assert asyncio.run(run()) == "hedge"
+  assert upstream.hedges == 1
+
+
+def test_cancelled_caller_cancels_in_flight_attempts():
+  upstream = _upstream(hedge_percentile=0.5, hedge_min_samples=5, timeout_seconds=5.0)
+  _warm_latency(upstream, 0.05)
+  started = []
+  cancelled = []
+
+  async def fn():
+    started.append(True)
+    try:
+      await asyncio.sleep(5)
+    except asyncio.CancelledError:
+      cancelled.append(True)
+      raise
+
+  async def run():
+    # Cancel while the primary is still inside the hedge delay.
+    call = asyncio.ensure_future(upstream.call(fn))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+      await call
+    await asyncio.sleep(0.01)
+    # Checked inside the loop: asyncio.run would cancel a leaked task on the way out.
+    assert cancelled == [True]
+
+  asyncio.run(run())
+  assert started == [True]
+  assert upstream.breaker.probe_in_flight is False
+
+
+def test_serpapi_5xx_is_retried_through_the_upstream(monkeypatch):
+  responses = iter([httpx.Response(503, text="busy"), httpx.Response(200, json={"jobs_results": []})])
+  seen = []
+
+  def handler(request: httpx.Request) -> httpx.Response:
+    seen.append(request.url.params.get("q"))
+    return next(responses)
+
+  upstream = Upstream(
+    ResiliencePolicy(name="serpapi", backoff_base_seconds=0.0, backoff_max_seconds=0.0),
+    is_retryable=lambda exc: isinstance(exc, serpapi_client.SerpAPITransientError),
+  )
+  monkeypatch.setattr(serpapi_client, "serpapi_upstream", upstream)
+
+  async def run():
+    serpapi_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+      return await serpapi_client._serp_api_request({"q": "python"})
+    finally:
+      await serpapi_client.close_http_client()
+
+  assert asyncio.run(run()) == {"jobs_results": []}
+  assert seen == ["python", "python"]
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import serpapi_client
+from services.resilience import ResiliencePolicy, Upstream
+from services.saved_job_refresher import SavedJobRefresher, group_postings
+
+NO_RESULTS = {"error": "Google hasn't returned any results for this query."}
+
+
+@pytest.fixture
+def serpapi(monkeypatch):
+  """Answer SerpAPI searches with the next queued payload; yields (queue, seen queries)."""
+  payloads: list[dict] = []
+  seen: list[str] = []
+
+  def handler(request: httpx.Request) -> httpx.Response:
+    seen.append(request.url.params.get("q"))
+    return httpx.Response(200, json=payloads.pop(0))
+
+  monkeypatch.setattr(
+    serpapi_client,
+    "serpapi_upstream",
+    Upstream(
+      ResiliencePolicy(name="serpapi", backoff_base_seconds=0.0, backoff_max_seconds=0.0),
+      is_retryable=lambda exc: isinstance(exc, serpapi_client.SerpAPITransientError),
+    ),
+  )
+  monkeypatch.setattr(serpapi_client, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+  yield payloads, seen
+  asyncio.run(serpapi_client.close_http_client())
+
+
+def _lookup(group):
+  return asyncio.run(SavedJobRefresher()._lookup(group, asyncio.Semaphore(1)))
+
+
+def test_stored_htidocid_drives_an_explicit_htidocid_search(serpapi):
+  payloads, seen = serpapi
+  payloads.append({"jobs_results": [{"job_id": "other-id", "title": "Engineer", "htidocid": "htid-1"}]})
+  [group] = group_postings([("opaque-id", "htid-1")])
+  outcome, listing = _lookup(group)
+  assert seen == ["htidocid:htid-1"]
+  assert outcome == "found"
+  assert listing.htidocid == "htid-1"
+
+
+def test_no_results_error_is_a_miss_not_a_failure(serpapi):
+  payloads, seen = serpapi
+  payloads.append(NO_RESULTS)
+  [group] = group_postings([("opaque-id", "htid-gone")])
+  assert _lookup(group) == ("found", None)
+  assert seen == ["htidocid:htid-gone"]
+
+
+def test_lookup_treats_no_results_as_empty(serpapi):
+  payloads, _ = serpapi
+  payloads.append(NO_RESULTS)
+  assert asyncio.run(serpapi_client.lookup_job_listing("opaque-id", "htid-gone")) is None
+
+
+def test_other_serpapi_errors_still_fail_the_lookup(serpapi):
+  payloads, _ = serpapi
+  payloads.append({"error": "Invalid API key."})
+  [group] = group_postings([("opaque-id", "htid-1")])
+  assert _lookup(group) == ("error", None)
@@ -0,0 +1,89 @@
+import pytest
+
+from services.search_normalization import DEFAULT_LOCATION, canonical_location, canonical_query, canonical_terms
+
+
+@pytest.mark.parametrize(
+  ("query", "expected"),
+  [
+    ("Software Engineer", "software engineer"),
+    ("software  engineer ", "software engineer"),
+    ("SWE jobs", "software engineer"),
+    ("Software Development Engineer", "software engineer"),
+    ("Software Engineer Sr.", "senior software engineer"),
+    ("Sr. Software Engineer", "senior software engineer"),
+    ("Python developers positions", "python developer"),
+    ("C++ / C# developer", "c++ c# developer"),
+    ("Full Stack Node.js dev", "fullstack node.js developer"),
+  ],
+)
+def test_equivalent_spellings_share_a_canonical_query(query, expected):
+  assert canonical_query(query) == expected
+
+
+@pytest.mark.parametrize(
+  ("query", "expected"),
+  [
+    ("Head of Engineering", "head of engineering"),
+    ("Head of Eng", "head of eng"),
+    ("VP Eng", "vp eng"),
+    ("Director of Product and Design", "director of product and design"),
+    ("Team Lead", "team lead"),
+    ("Staff Accountant", "staff accountant"),
+    ("Marketing Intern", "marketing intern"),
+    ("Hiring Manager", "hiring manager"),
+    ("Entry Level Analyst", "entry level analyst"),
+    ("Jobs", "jobs"),
+  ],
+)
+def test_connectives_and_word_order_are_kept(query, expected):
+  assert canonical_query(query) == expected
+
+
+@pytest.mark.parametrize(
+  "query",
+  ["pm", "ai engineer", "go developer", "golang developer", "em physician", "ts sci analyst", "vp eng", "head of eng", "eng manager", "software engr"],
+)
+def test_ambiguous_abbreviations_are_sent_as_typed(query):
+  assert canonical_query(query) == query
+
+
+def test_canonical_query_is_idempotent():
+  for query in ("Sr. SWE jobs", "Head of Engineering", "Team Lead", "Full Stack devs"):
+    assert canonical_query(canonical_query(query)) == canonical_query(query)
+
+
+def test_canonical_terms_drop_blanks_and_duplicates():
+  assert canonical_terms(["Sr", "senior", " ", "Team Lead"]) == ["senior", "team lead"]
+
+
+@pytest.mark.parametrize("location", [None, "", "  ", "remote", "Remote", "Remote (US)", "remote (usa)", "USA", "Remote, United States"])
+def test_unqualified_remote_and_us_search_the_country(location):
+  assert canonical_location(location) == DEFAULT_LOCATION
+
+
+@pytest.mark.parametrize(
+  ("location", "expected"),
+  [
+    ("Remote - Europe", "Remote, Europe"),
+    ("Remote, CA", "Remote, CA"),
+    ("remote (UK)", "Remote, UK"),
+    ("Berlin (Remote)", "Remote, Berlin"),
+    ("Europe, remote", "Remote, Europe"),
+  ],
+)
+def test_remote_keeps_its_region(location, expected):
+  assert canonical_location(location) == expected
+  assert canonical_location(expected) == expected
+
+
+@pytest.mark.parametrize(
+  ("location", "expected"),
+  [
+    ("Austin, TX, USA", canonical_location("Austin, TX")),
+    ("boise idaho", "Boise, ID"),
+    ("Leeds, UK", "Leeds, UK"),
+  ],
+)
+def test_places_outside_remote_keep_their_shape(location, expected):
+  assert canonical_location(location) == expected
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from models.jobs import JobListing
+from services.serpapi_client import SerpAPIError, _first_matching_job
+
+
+def _strategy(calls: list[str], name: str, jobs: list[JobListing], delay: float = 0.0, error: bool = False):
+  async def run() -> list[JobListing]:
+    calls.append(name)
+    await asyncio.sleep(delay)
+    if error:
+      raise SerpAPIError(f"{name} failed")
+    return jobs
+
+  return run
+
+
+def _job(job_id: str) -> JobListing:
+  return JobListing(job_id=job_id, title="Engineer")
+
+
+def _matches(job: JobListing) -> bool:
+  return job.job_id == "wanted"
+
+
+def test_hit_on_first_strategy_costs_one_search():
+  calls: list[str] = []
+  strategies = [_strategy(calls, "htidocid", [_job("wanted")]), _strategy(calls, "title", [_job("wanted")])]
+  job = asyncio.run(_first_matching_job(strategies, _matches, hedge_delay=1.0))
+  assert job.job_id == "wanted"
+  assert calls == ["htidocid"]
+
+
+def test_fallback_starts_only_after_a_miss():
+  calls: list[str] = []
+  strategies = [_strategy(calls, "htidocid", [_job("other")]), _strategy(calls, "title", [_job("wanted")])]
+  job = asyncio.run(_first_matching_job(strategies, _matches, hedge_delay=0))
+  assert job.job_id == "wanted"
+  assert calls == ["htidocid", "title"]
+
+
+def test_slow_first_strategy_is_hedged_and_cancelled():
+  calls: list[str] = []
+
+  async def scenario():
+    slow_done = []
+
+    async def slow() -> list[JobListing]:
+      calls.append("htidocid")
+      try:
+        await asyncio.sleep(5)
+      except asyncio.CancelledError:
+        slow_done.append("cancelled")
+        raise
+      return []
+
+    strategies = [slow, _strategy(calls, "title", [_job("wanted")])]
+    job = await _first_matching_job(strategies, _matches, hedge_delay=0.01)
+    await asyncio.sleep(0)
+    return job, slow_done
+
+  job, slow_done = asyncio.run(scenario())
+  assert job.job_id == "wanted"
+  assert calls == ["htidocid", "title"]
+  assert slow_done == ["cancelled"]
+
+
+def test_error_then_miss_returns_none():
+  calls: list[str] = []
+  strategies = [_strategy(calls, "htidocid", [], error=True), _strategy(calls, "title", [_job("other")])]
+  assert asyncio.run(_first_matching_job(strategies, _matches, hedge_delay=0)) is None
+  assert calls == ["htidocid", "title"]
+
+
+def test_all_strategies_failing_raises_last_error():
+  calls: list[str] = []
+  strategies = [_strategy(calls, "htidocid", [], error=True), _strategy(calls, "title", [], error=True)]
+  with pytest.raises(SerpAPIError, match="title failed"):
+    asyncio.run(_first_matching_job(strategies, _matches, hedge_delay=0))
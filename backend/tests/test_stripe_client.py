@@ -0,0 +1,106 @@
+import asyncio
+import dataclasses
+
+import httpx
+import pytest
+
+from benchmarks import mock_upstreams
+from config import get_settings
+from services import stripe_client
+from services.resilience import ResiliencePolicy, Upstream
+
+STUB_URL = "http://stripe.stub"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+  """Route the Stripe SDK to the benchmark mock over an in-process transport; yields request log."""
+  requests: list[httpx.Request] = []
+
+  async def record(request: httpx.Request) -> None:
+    requests.append(request)
+
+  def async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_upstreams.app), event_hooks={"request": [record]})
+
+  settings = dataclasses.replace(
+    get_settings(),
+    stripe_secret_key="sk_test_stub",
+    stripe_api_base=STUB_URL,
+    stripe_success_url="http://localhost/success",
+    stripe_cancel_url="http://localhost/cancel",
+    stripe_price_id="price_stub",
+  )
+  monkeypatch.setattr(stripe_client, "get_settings", lambda: settings)
+  monkeypatch.setattr(stripe_client, "_async_http_client", async_http_client)
+  monkeypatch.setattr(
+    stripe_client,
+    "stripe_upstream",
+    Upstream(
+      ResiliencePolicy(name="stripe", max_attempts=3, backoff_base_seconds=0.0, backoff_max_seconds=0.0),
+      is_retryable=stripe_client._is_transient,
+    ),
+  )
+  monkeypatch.setitem(mock_upstreams.BEHAVIOUR, "stripe", mock_upstreams.UpstreamBehaviour())
+  yield requests
+  asyncio.run(stripe_client.close_stripe_client())
+
+
+def _run(coro):
+  async def run():
+    try:
+      return await coro
+    finally:
+      await stripe_client.close_stripe_client()
+
+  return asyncio.run(run())
+
+
+def test_checkout_session_goes_through_the_pooled_client(stub):
+  session = _run(stripe_client.create_checkout_session("user-1", "monthly"))
+  assert session.id.startswith("cs_test_")
+  assert session.url.startswith("https://checkout.stripe.test/")
+  assert [(request.method, request.url.path) for request in stub] == [("POST", "/v1/checkout/sessions")]
+  assert b"price_stub" in stub[0].content
+
+
+def test_retrieves_parse_stub_objects(stub):
+  async def both():
+    session = await stripe_client.fetch_checkout_session("cs_test_abc")
+    subscription = await stripe_client.fetch_subscription("sub_abc")
+    return session, subscription
+
+  session, subscription = _run(both())
+  assert session.id == "cs_test_abc"
+  assert session.payment_status == "paid"
+  assert subscription.status == "active"
+
+
+def test_injected_5xx_is_retried_with_the_same_idempotency_key(stub, monkeypatch):
+  monkeypatch.setitem(mock_upstreams.BEHAVIOUR, "stripe", mock_upstreams.UpstreamBehaviour(error_rate=1.0))
+  with pytest.raises(stripe_client.StripeCheckoutError):
+    _run(stripe_client.create_checkout_session("user-1", "monthly"))
+  assert len(stub) == 3
+  assert len({request.headers["Idempotency-Key"] for request in stub}) == 1
+  assert stripe_client.stripe_upstream.breaker.failures == 3
+
+
+def test_connection_errors_become_retryable_stripe_errors(stub, monkeypatch):
+  def refuse(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("refused", request=request)
+
+  monkeypatch.setattr(stripe_client, "_async_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(refuse)))
+  with pytest.raises(stripe_client.StripeCheckoutError):
+    _run(stripe_client.fetch_checkout_session("cs_test_abc"))
+  assert stripe_client.stripe_upstream.retries == 2
+
+
+def test_close_closes_the_shared_httpx_client(stub):
+  async def open_then_close():
+    await stripe_client.fetch_subscription("sub_abc")
+    http_client = stripe_client._http_client.client
+    await stripe_client.close_stripe_client()
+    return http_client
+
+  assert asyncio.run(open_then_close()).is_closed
+  assert stripe_client._client is None
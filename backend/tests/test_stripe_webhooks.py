@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from db.models.stripe_webhook_event import StripeWebhookEvent
+from db.repositories import stripe_webhook_event_repository
+from services import stripe_webhooks
+
+
+class FakeSession:
+  def __init__(self) -> None:
+    self.commits = 0
+
+  @contextlib.asynccontextmanager
+  async def begin_nested(self):
+    yield
+
+  async def commit(self) -> None:
+    self.commits += 1
+
+
+def _event(event_type: str = "customer.subscription.updated", attempts: int = 0, **payload) -> StripeWebhookEvent:
+  now = datetime.now(timezone.utc)
+  return StripeWebhookEvent(
+    event_id=f"evt_{attempts}",
+    event_type=event_type,
+    ordering_key="sub_1",
+    stripe_created_at=now,
+    payload=payload,
+    status="pending",
+    attempts=attempts,
+    received_at=now,
+  )
+
+
+def _process(monkeypatch, processor, events, handler):
+  async def claim(session, limit):
+    return events
+
+  monkeypatch.setattr(stripe_webhooks, "claim_pending_webhook_events", claim)
+  monkeypatch.setitem(stripe_webhooks.HANDLERS, events[0].event_type, handler)
+  return asyncio.run(processor.process_batch(FakeSession()))
+
+
+def test_failed_event_backs_off_exponentially(monkeypatch):
+  async def boom(session, event):
+    raise RuntimeError("bad payload")
+
+  processor = stripe_webhooks.StripeWebhookProcessor(max_attempts=5, retry_base_seconds=5.0)
+  events = [_event(attempts=0), _event(attempts=2)]
+  started = datetime.now(timezone.utc)
+  assert _process(monkeypatch, processor, events, boom) == 2
+
+  first, third = events
+  assert (first.status, first.attempts) == ("pending", 1)
+  assert (third.status, third.attempts) == ("pending", 3)
+  assert timedelta(seconds=5) <= first.next_attempt_at - started < timedelta(seconds=6)
+  assert timedelta(seconds=20) <= third.next_attempt_at - started < timedelta(seconds=21)
+  assert "bad payload" in first.last_error
+
+
+def test_event_fails_for_good_after_max_attempts(monkeypatch):
+  async def boom(session, event):
+    raise RuntimeError("bad payload")
+
+  processor = stripe_webhooks.StripeWebhookProcessor(max_attempts=3)
+  events = [_event(attempts=2)]
+  _process(monkeypatch, processor, events, boom)
+  assert events[0].status == "failed"
+  assert events[0].processed_at is not None
+
+
+def test_claim_skips_events_behind_an_earlier_pending_event_for_the_same_key():
+  statements = []
+
+  class Result:
+    def scalars(self):
+      return []
+
+  class RecordingSession:
+    async def execute(self, stmt):
+      statements.append(stmt)
+      return Result()
+
+  asyncio.run(stripe_webhook_event_repository.claim_pending_webhook_events(RecordingSession(), 10))
+  sql = " ".join(str(statements[0].compile(dialect=postgresql.dialect())).split())
+  assert "NOT (EXISTS (SELECT * FROM stripe_webhook_events AS stripe_webhook_events_1 WHERE" in sql
+  assert "stripe_webhook_events_1.ordering_key = stripe_webhook_events.ordering_key" in sql
+  assert "stripe_webhook_events_1.status = %(status_2)s" in sql
+  assert (
+    "(stripe_webhook_events_1.stripe_created_at, stripe_webhook_events_1.received_at, stripe_webhook_events_1.event_id)"
+    " < (stripe_webhook_events.stripe_created_at, stripe_webhook_events.received_at, stripe_webhook_events.event_id)"
+  ) in sql
+  assert "stripe_webhook_events.next_attempt_at <= now()" in sql
+  assert sql.endswith("FOR UPDATE SKIP LOCKED")
+
+
+def _checkout_expiry(monkeypatch, payload, stored_subscription=None):
+  calls = []
+
+  async def apply(session, **fields):
+    calls.append(fields)
+    return True
+
+  async def by_stripe_id(session, stripe_subscription_id):
+    return stored_subscription if stripe_subscription_id == "sub_1" else None
+
+  monkeypatch.setattr(stripe_webhooks, "apply_subscription_event", apply)
+  monkeypatch.setattr(stripe_webhooks, "get_subscription_by_stripe_id", by_stripe_id)
+  event = _event("checkout.session.completed", client_reference_id="user-1", payment_status="paid", **payload)
+  assert asyncio.run(stripe_webhooks._apply_checkout_session_completed(FakeSession(), event)) == "processed"
+  return calls[0]["entitlement_expires_at"]
+
+
+def test_lifetime_checkout_clears_an_old_expiry(monkeypatch):
+  assert _checkout_expiry(monkeypatch, {"metadata": {"plan": "lifetime"}}) is None
+
+
+def test_new_subscription_checkout_clears_an_old_expiry(monkeypatch):
+  assert _checkout_expiry(monkeypatch, {"subscription": "sub_2"}, stored_subscription=object()) is None
+
+
+def test_checkout_keeps_the_expiry_already_recorded_for_its_subscription(monkeypatch):
+  assert _checkout_expiry(monkeypatch, {"subscription": "sub_1"}, stored_subscription=object()) is stripe_webhooks.KEEP
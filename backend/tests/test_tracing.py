@@ -0,0 +1,43 @@
+import asyncio
+import json
+
+from services import tracing
+
+
+def _trace(name: str = "GET /jobs/search") -> None:
+  with tracing.start_trace(name):
+    with tracing.span("db.query"):
+      pass
+
+
+def test_file_exporter_buffers_and_flusher_writes(tmp_path, monkeypatch):
+  path = tmp_path / "traces.jsonl"
+  monkeypatch.setattr(tracing, "FLUSH_SECONDS", 0.01)
+  tracing.configure_tracing("file", str(path))
+  try:
+    _trace()
+    assert not path.exists()
+
+    async def flush_once():
+      flusher = asyncio.create_task(tracing.run_trace_flusher())
+      await asyncio.sleep(0.1)
+      flusher.cancel()
+
+    asyncio.run(flush_once())
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [item["name"] for item in spans] == ["GET /jobs/search", "db.query"]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+  finally:
+    tracing.configure_tracing("none")
+
+
+def test_file_exporter_drops_spans_past_the_buffer_limit(tmp_path):
+  exporter = tracing.FileExporter(str(tmp_path / "traces.jsonl"), max_buffered=3)
+  tracing._exporter = exporter
+  try:
+    _trace()
+    _trace()
+    assert len(exporter.drain()) == 2
+    assert exporter.dropped == 2
+  finally:
+    tracing.configure_tracing("none")
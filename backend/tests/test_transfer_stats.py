@@ -0,0 +1,29 @@
+from starlette.routing import Route
+
+from services.metrics import HTTP_RESPONSE_BYTES_SAVED
+from services.transfer_stats import TransferStats, endpoint_name
+
+
+def test_endpoint_name_uses_route_template():
+  route = Route("/jobs/detail/{job_id}", endpoint=lambda request: None)
+  assert endpoint_name({"method": "GET", "route": route, "path": "/jobs/detail/abc"}) == "GET /jobs/detail/{job_id}"
+
+
+def test_unmatched_paths_share_one_endpoint():
+  stats = TransferStats()
+  for index in range(50):
+    stats.record_response(endpoint_name({"method": "GET", "path": f"/random/{index}"}), 100, 100)
+  assert list(stats.endpoints) == ["GET unmatched"]
+  assert stats.endpoints["GET unmatched"].responses == 50
+
+
+def test_bytes_saved_are_exported_as_a_counter():
+  stats = TransferStats()
+  endpoint = "GET /tests/bytes-saved"
+  before = HTTP_RESPONSE_BYTES_SAVED.value((endpoint,))
+  stats.record_response(endpoint, 1000, 300)
+  stats.remember_etag('"abc"', 1000)
+  stats.record_not_modified(endpoint, '"abc"')
+  assert HTTP_RESPONSE_BYTES_SAVED.value((endpoint,)) - before == 1700
+  assert HTTP_RESPONSE_BYTES_SAVED.kind == "counter"
+  assert HTTP_RESPONSE_BYTES_SAVED.name.endswith("_total")
@@ -0,0 +1,47 @@
+"""Train a zstd dictionary for compressed listing payloads from the stored rows.
+
+Run from backend/:
+
+  python -m train_payload_dictionary [--samples 5000] [--size 65536]
+
+The new dictionary is stored in ``payload_dictionaries`` and compresses every payload
+written after the API processes restart (or after they meet a frame that uses it). Older
+dictionaries are kept, so existing rows stay readable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from db.database import SessionLocal, dispose_db
+from db.repositories.payload_dictionary_repository import store_payload_dictionary
+from services.payload_codec import DICTIONARY_BYTES, MIN_TRAINING_SAMPLES, train_dictionary, training_samples, zstandard
+
+
+async def train(sample_limit: int, size: int) -> None:
+  try:
+    async with SessionLocal() as session:
+      samples = await training_samples(session, sample_limit)
+      trained = train_dictionary(samples, size)
+      if trained is None:
+        raise SystemExit(f"Not enough data to train: {len(samples)} samples (need {MIN_TRAINING_SAMPLES}).")
+      dict_id, data = trained
+      await store_payload_dictionary(session, dict_id=dict_id, data=data, sample_count=len(samples))
+    print(f"Stored dictionary {dict_id}: {len(data)} bytes from {len(samples)} listings.", flush=True)
+  finally:
+    await dispose_db()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--samples", type=int, default=5000)
+  parser.add_argument("--size", type=int, default=DICTIONARY_BYTES)
+  args = parser.parse_args()
+  if zstandard is None:
+    raise SystemExit("zstandard is not installed.")
+  asyncio.run(train(args.samples, args.size))
+
+
+if __name__ == "__main__":
+  main()